@@ -6,10 +6,9 @@ Titanic Survival Analysis Dashboard
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from src.config import *
-from src.utils.data_loader import load_titanic_data, get_data_summary
+from src.utils.data_loader import get_data_summary
+from src.utils.dataset_registry import get_dataset
 from src.components.metrics import create_overview_metrics
 from src.components.charts import create_survival_overview_chart, create_class_distribution_chart
 
@@ -20,7 +19,7 @@ def main():
     """Funzione principale dell'applicazione"""
     
     # ----------------2. Caricamento dati (da notebook sezione 2.1 - Dataset Loading)
-    df = load_titanic_data()
+    df = get_dataset('original')
     if df is None:
         st.error("Errore nel caricamento dei dati")
         return
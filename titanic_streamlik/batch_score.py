@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+batch_score.py
+Predizioni batch da riga di comando (senza Streamlit): carica un bundle di
+modelli (save_model_bundle) o modelli e pipeline salvati singolarmente
+(ModelPersistence / save_preprocessing_pipeline), divide il
+CSV di input in shard di righe su un pool di processi e scrive una
+partizione di output per shard, con il riepilogo del throughput.
+
+Uso:
+    python batch_score.py --input manifest.csv --output-dir predizioni/ \
+        --bundle src/models/titanic_models_20240101_120000.joblib --workers 4
+    python batch_score.py --input manifest.csv --output-dir predizioni/ \
+        --model RandomForest --model LogisticRegression --workers 4
+    python batch_score.py --input manifest.csv --output-dir predizioni/ \
+        --model src/models/RandomForest_20240101_120000.pkl \
+        --pipeline src/models/preprocessing_pipeline_RandomForest_20240101_120000.pkl
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.config import BATCH_SCORING_CONFIG, SHARDED_SCORING_CONFIG
+from src.models.batch_scoring import (
+    artifact_name, resolve_artifact, load_reference_frame, score_csv_sharded
+)
+from src.models.model_bundle import list_model_bundles
+from src.models.model_registry import get_model_registry
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', required=True, help="CSV da valutare (stesse colonne del dataset)")
+    parser.add_argument('--output-dir', required=True, help="Directory delle partizioni di output")
+    parser.add_argument('--bundle', default=None,
+                        help="Bundle dei modelli: file .joblib, 'latest' (piu' recente) o 'best' "
+                             "(modello con la metrica --metric migliore nel registro)")
+    parser.add_argument('--metric', default='f1', help="Metrica per --bundle best (default f1)")
+    parser.add_argument('--model', action='append', default=None,
+                        help="File del modello o nome usato in save_model (ripetibile); "
+                             "con --bundle, i modelli del bundle da usare")
+    parser.add_argument('--pipeline', default=None,
+                        help="File o nome della pipeline (default: preprocessing_pipeline_<primo modello>)")
+    parser.add_argument('--preprocessor', action='append', default=None,
+                        help="File del DataPreprocessor: uno per tutti o uno per modello, nello stesso ordine")
+    parser.add_argument('--reference', default=None,
+                        help="CSV dei dati di training della pipeline (default: split di training del dataset)")
+    parser.add_argument('--models-dir', default=None, help="Directory dei modelli salvati (default MODELS_DIR)")
+    parser.add_argument('--workers', type=int, default=SHARDED_SCORING_CONFIG['workers'],
+                        help="Processi (default: tutti i core)")
+    parser.add_argument('--shards', type=int, default=None, help="Numero di shard (default: workers)")
+    parser.add_argument('--format', choices=['parquet', 'csv'], default=BATCH_SCORING_CONFIG['output_format'])
+    parser.add_argument('--chunksize', type=int, default=BATCH_SCORING_CONFIG['chunksize'])
+    parser.add_argument('--overwrite', action='store_true', help="Sostituisce partizioni esistenti")
+    args = parser.parse_args(argv)
+    if not args.bundle and not args.model:
+        parser.error("indicare --bundle oppure almeno un --model")
+    return args
+
+def build_artifacts(args):
+    """Percorsi di bundle o modelli, pipeline e preprocessor e dati di riferimento"""
+    if args.bundle:
+        bundle_path = args.bundle
+        model_names = args.model
+        if bundle_path == 'latest':
+            bundles = list_model_bundles(args.models_dir)
+            if not bundles:
+                raise FileNotFoundError("Nessun bundle di modelli salvato")
+            bundle_path = bundles[0]['filepath']
+        elif bundle_path == 'best':
+            registry = get_model_registry(args.models_dir)
+            best = registry.best(args.metric, kind='bundle') if registry is not None else None
+            if best is None:
+                raise FileNotFoundError(f"Nessun bundle registrato con la metrica {args.metric}")
+            bundle_path, model_names = best['path'], model_names or [best['member']]
+            print(f"Modello migliore per {args.metric}: {best['member']} ({best['path']})")
+        return {'bundle_path': bundle_path, 'model_names': model_names}
+
+    model_paths = {}
+    for spec in args.model:
+        path = resolve_artifact(spec, args.models_dir)
+        model_paths[artifact_name(path)] = path
+
+    pipeline_spec = args.pipeline or f"preprocessing_pipeline_{next(iter(model_paths))}"
+    preprocessor_paths = {}
+    if args.preprocessor:
+        if len(args.preprocessor) not in (1, len(model_paths)):
+            raise ValueError("Indicare un preprocessor per tutti i modelli o uno per modello")
+        specs = args.preprocessor * len(model_paths) if len(args.preprocessor) == 1 else args.preprocessor
+        preprocessor_paths = {name: resolve_artifact(spec, args.models_dir)
+                              for name, spec in zip(model_paths, specs)}
+
+    return {
+        'model_paths': model_paths,
+        'pipeline_path': resolve_artifact(pipeline_spec, args.models_dir),
+        'X_reference': load_reference_frame(args.reference),
+        'preprocessor_paths': preprocessor_paths
+    }
+
+def print_summary(summary):
+    print(f"Righe: {summary['rows']:,}  in {summary['seconds']:.2f} s  "
+          f"({summary['rows_per_second']:,.0f} righe/s, {summary['n_workers']} processi)")
+    if summary['survival_rate'] is not None:
+        print(f"Sopravvivenza predetta: {summary['survival_rate']:.1%}")
+    print(f"{'worker (pid)':<14}{'shard':>7}{'righe':>14}{'secondi':>10}{'righe/s':>14}")
+    for worker in summary['workers']:
+        print(f"{worker['pid']:<14}{worker['shards']:>7}{worker['rows']:>14,}"
+              f"{worker['seconds']:>10.2f}{worker['rows_per_second']:>14,.0f}")
+    print(f"Partizioni: {summary['output_dir']}  riepilogo: {summary['summary_path']}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    artifacts = build_artifacts(args)
+    summary = score_csv_sharded(
+        args.input, args.output_dir, artifacts,
+        workers=args.workers, shards=args.shards, output_format=args.format,
+        chunksize=args.chunksize, overwrite=args.overwrite
+    )
+    print_summary(summary)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
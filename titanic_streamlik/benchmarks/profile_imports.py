@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+benchmarks/profile_imports.py
+Profilo del tempo di import (cold start) di ogni pagina Streamlit.
+
+Per ogni pagina vengono estratti gli import di primo livello e rieseguiti
+in un processo Python pulito con `-X importtime`; il report mostra il
+tempo totale e i pacchetti che pesano di più. La riga "(streamlit)" è il
+costo fisso comune a tutte le pagine.
+
+Uso:
+    python benchmarks/profile_imports.py --top 8
+    python benchmarks/profile_imports.py --json import_profile.json
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# ----------------1. Import di Primo Livello
+def page_files():
+    """app.py e le pagine in pages/ nell'ordine della sidebar"""
+    return [os.path.join(ROOT, 'app.py')] + sorted(glob.glob(os.path.join(ROOT, 'pages', '*.py')))
+
+def page_imports(path):
+    """
+    Istruzioni di import eseguite al caricamento della pagina
+
+    Args:
+        path: File della pagina
+
+    Returns:
+        Codice Python con i soli import di primo livello (anche dentro try)
+    """
+    with open(path, encoding='utf-8') as f:
+        source = f.read()
+
+    statements = []
+    for node in ast.parse(source).body:
+        nodes = [node]
+        if isinstance(node, ast.Try):
+            nodes = node.body
+        for child in nodes:
+            if isinstance(child, (ast.Import, ast.ImportFrom)):
+                statements.append(ast.get_source_segment(source, child))
+    return '\n'.join(statements)
+
+# ----------------2. Esecuzione con -X importtime
+def parse_importtime(stderr):
+    """
+    Converte l'output di -X importtime in una lista di moduli
+
+    Returns:
+        Lista di dizionari {module, self_us, cumulative_us, depth}
+    """
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        stripped = name.lstrip()
+        modules.append({
+            'module': stripped.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(name) - len(stripped) - 1) // 2
+        })
+    return modules
+
+def profile_code(code, label):
+    """Esegue gli import in un interprete nuovo e ne riassume i tempi"""
+    python_path = os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')]))
+    env = dict(os.environ, PYTHONPATH=python_path, PYTHONDONTWRITEBYTECODE='1')
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    wall_seconds = time.perf_counter() - start
+
+    modules = parse_importtime(result.stderr)
+    packages = defaultdict(int)
+    for module in modules:
+        packages[module['module'].split('.')[0]] += module['self_us']
+
+    error = None
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'errore sconosciuto'
+
+    return {
+        'page': label,
+        'import_ms': sum(module['self_us'] for module in modules) / 1000,
+        'wall_ms': wall_seconds * 1000,
+        'modules': len(modules),
+        'packages': dict(sorted(packages.items(), key=lambda item: item[1], reverse=True)),
+        'error': error
+    }
+
+def profile_pages():
+    """Profilo di streamlit (baseline) e di ogni pagina"""
+    reports = [profile_code('import streamlit', '(streamlit)')]
+    for path in page_files():
+        reports.append(profile_code(page_imports(path), os.path.relpath(path, ROOT)))
+    return reports
+
+# ----------------3. Report
+def print_report(reports, top):
+    for report in reports:
+        print(f"\n{report['page']}")
+        if report['error']:
+            print(f"  import fallito: {report['error']}")
+        print(f"  import: {report['import_ms']:8.1f} ms   processo: {report['wall_ms']:8.1f} ms   "
+              f"moduli: {report['modules']}")
+        for package, self_us in list(report['packages'].items())[:top]:
+            print(f"    {package:<28} {self_us / 1000:8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[1])
+    parser.add_argument('--top', type=int, default=8, help="Pacchetti mostrati per pagina")
+    parser.add_argument('--json', dest='json_path', help="Salva il report completo in JSON")
+    args = parser.parse_args()
+
+    reports = profile_pages()
+    print_report(reports, args.top)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(reports, f, indent=2)
+
+if __name__ == '__main__':
+    main()
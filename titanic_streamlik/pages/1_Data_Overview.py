@@ -7,19 +7,17 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
-import seaborn as sns
-import matplotlib.pyplot as plt
 from src.config import *
-from src.utils.data_loader import load_titanic_data, get_data_summary, get_missing_values_info, check_duplicates
-from src.utils.data_processor import clean_dataset_basic, detect_outliers_summary
+from src.utils.data_loader import get_data_summary, get_missing_values_info, check_duplicates, get_dtype_memory_report
+from src.utils.data_processor import detect_outliers_summary
+from src.utils.dataset_registry import get_datasets
 from src.components.charts import create_missing_values_heatmap, create_data_types_chart
 
 # ----------------1. Configurazione pagina (da config.py)
 st.set_page_config(**PAGE_CONFIG)
 
 # ----------------2. Caricamento dati (da notebook sezione 2.1 - Structure of dataset)
-df_original = load_titanic_data()
+df_original, df_cleaned = get_datasets('original', 'cleaned')
 if df_original is None:
     st.error("Impossibile caricare i dati")
     st.stop()
@@ -88,6 +86,17 @@ with col2:
     )
     st.plotly_chart(fig_types, use_container_width=True)
 
+# Report memoria dello schema dei tipi applicato in caricamento
+with st.expander("Occupazione Memoria per Tipo di Dato"):
+    memory_report = get_dtype_memory_report(df_original)
+    total_row = memory_report.iloc[-1]
+    st.write(
+        f"Memoria con tipi di default: **{total_row['Memoria_Prima_KB']:.1f} KB** - "
+        f"con schema dichiarato: **{total_row['Memoria_Dopo_KB']:.1f} KB** "
+        f"(risparmio {total_row['Risparmio_Percentuale']:.1f}%)"
+    )
+    st.dataframe(memory_report.round(2), use_container_width=True)
+
 # ----------------8. Analisi valori mancanti (da notebook sezione 2.2 - Missing values)
 st.header("2. Analisi Valori Mancanti")
 
@@ -123,9 +132,6 @@ else:
 # ----------------10. Data Cleaning Preview (da notebook sezione 3 - Data Cleaning)
 st.header("3. Anteprima Pulizia Dati")
 
-# Applica pulizia base
-df_cleaned = clean_dataset_basic(df_original)
-
 col1, col2 = st.columns(2)
 
 with col1:
@@ -166,7 +172,7 @@ if show_statistics:
     
     # Statistiche per variabili categoriche
     st.subheader("Variabili Categoriche")
-    categorical_cols = df_cleaned.select_dtypes(include=['object']).columns
+    categorical_cols = df_cleaned.select_dtypes(include=['object', 'category']).columns
     categorical_cols = [col for col in categorical_cols if col != 'Name']  # Escludi Name
     
     if len(categorical_cols) > 0:
@@ -7,13 +7,9 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import seaborn as sns
-import matplotlib.pyplot as plt
 from src.config import *
-from src.utils.data_loader import load_titanic_data
-from src.utils.data_processor import clean_dataset_basic, detect_outliers_iqr, handle_outliers
+from src.utils.data_processor import detect_outliers_iqr, handle_outliers
+from src.utils.dataset_registry import get_datasets
 from src.components.charts import create_age_distribution_chart, create_survival_overview_chart
 from src.components.univariate_charts import *
 
@@ -21,13 +17,11 @@ from src.components.univariate_charts import *
 st.set_page_config(**PAGE_CONFIG)
 
 # ----------------2. Caricamento e pulizia dati (da notebook sezione 2.1 e 3)
-df_original = load_titanic_data()
+df_original, df = get_datasets('original', 'cleaned')
 if df_original is None:
     st.error("Impossibile caricare i dati")
     st.stop()
 
-df = clean_dataset_basic(df_original)
-
 # ----------------3. Header pagina
 st.title("Analisi Univariata - Variabili Singole")
 st.markdown("Esplorazione dettagliata delle caratteristiche individuali di ogni variabile")
@@ -39,7 +33,7 @@ with st.sidebar:
     # Selezione variabile da analizzare
     numeric_variables = [col for col in df.select_dtypes(include=[np.number]).columns 
                         if col not in ['PassengerId']]
-    categorical_variables = [col for col in df.select_dtypes(include=['object']).columns 
+    categorical_variables = [col for col in df.select_dtypes(include=['object', 'category']).columns 
                            if col not in ['Name', 'Ticket']]
     
     analysis_type = st.selectbox(
@@ -6,26 +6,19 @@ Analisi bivariata dei fattori che influenzano la sopravvivenza
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from src.config import *
-from src.utils.data_loader import load_titanic_data
-from src.utils.data_processor import clean_dataset_basic, create_basic_features
+from src.utils.dataset_registry import get_datasets
 from src.components.bivariate_charts import *
 
 # ----------------1. Configurazione pagina (da config.py)
 st.set_page_config(**PAGE_CONFIG)
 
 # ----------------2. Caricamento e preparazione dati (da notebook sezioni 2.1, 3, e feature engineering)
-df_original = load_titanic_data()
+df_original, df = get_datasets('original', 'featured')
 if df_original is None:
     st.error("Impossibile caricare i dati")
     st.stop()
 
-df = clean_dataset_basic(df_original)
-df = create_basic_features(df)
-
 # ----------------3. Header pagina
 st.title("Analisi Bivariata - Fattori di Sopravvivenza")
 st.markdown("Esplorazione delle relazioni tra variabili e la sopravvivenza dei passeggeri")
@@ -6,12 +6,10 @@ Analisi avanzate, correlazioni e feature engineering
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from src.config import *
-from src.utils.data_loader import load_titanic_data
-from src.utils.data_processor import clean_dataset_basic, create_basic_features, handle_outliers
+from src.utils.data_processor import handle_outliers
+from src.utils.dataset_registry import get_datasets
+from src.utils.headless import collect_events, render_events
 from src.components.advanced_charts import *
 from src.utils.feature_engineering import *
 from src.utils.statistical_analysis import *
@@ -20,14 +18,11 @@ from src.utils.statistical_analysis import *
 st.set_page_config(**PAGE_CONFIG)
 
 # ----------------2. Caricamento e preparazione dati (da notebook sezioni 2.1, 3, e feature engineering)
-df_original = load_titanic_data()
+df_original, df = get_datasets('original', 'featured')
 if df_original is None:
     st.error("Impossibile caricare i dati")
     st.stop()
 
-df = clean_dataset_basic(df_original)
-df = create_basic_features(df)
-
 # ----------------3. Header pagina
 st.title("Analisi Avanzate e Feature Engineering")
 st.markdown("Correlazioni approfondite, feature engineering e analisi statistiche avanzate")
@@ -62,17 +57,23 @@ with st.sidebar:
         index=0
     )
 
-# ----------------5. Applicazione feature engineering avanzate
-df_engineered = df.copy()
-
-if create_title_feature:
-    df_engineered = extract_title_from_name(df_engineered)
+# ----------------5. Applicazione feature engineering avanzate (ogni funzione restituisce un nuovo frame)
+df_engineered = df
 
-if create_deck_feature:
-    df_engineered = extract_deck_from_cabin(df_engineered)
+# Eventi delle funzioni di calcolo raccolti e mostrati in un unico pannello
+with collect_events() as feature_events:
+    if create_title_feature:
+        df_engineered = extract_title_from_name(df_engineered)
+    
+    if create_deck_feature:
+        df_engineered = extract_deck_from_cabin(df_engineered)
+    
+    if create_fare_per_person:
+        df_engineered = calculate_fare_per_person(df_engineered)
 
-if create_fare_per_person:
-    df_engineered = calculate_fare_per_person(df_engineered)
+if feature_events:
+    with st.sidebar.expander("Log feature engineering"):
+        render_events(feature_events)
 
 # Gestione outliers se richiesta
 if outlier_method != "Nessuno":
@@ -8,12 +8,12 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import time
+import os
 from datetime import datetime
 
 # Import dei moduli ML sviluppati
 from src.config import *
-from src.utils.data_loader import load_titanic_data
-from src.utils.data_processor import clean_dataset_basic
+from src.utils.dataset_registry import get_datasets
 from src.utils.ml_preprocessing import (
     create_titanic_preprocessing_pipeline, 
     DataQualityChecker,
@@ -21,7 +21,7 @@ from src.utils.ml_preprocessing import (
     validate_preprocessing_pipeline
 )
 from src.models.ml_models import ModelFactory, ModelConfigurations, HyperparameterGrids
-from src.models.model_trainer import ModelTrainer, TrainingPipelineManager, ModelPersistence
+from src.models.model_trainer import ModelTrainer, TrainingPipelineManager
 from src.models.model_evaluator import ModelEvaluator, ModelComparison, StatisticalTests, ErrorAnalysis
 from src.components.ml_charts import (
     TrainingVisualizer, PerformanceVisualizer, CurveVisualizer,
@@ -32,18 +32,8 @@ from src.components.ml_charts import (
 # ----------------1. Configurazione pagina (da config.py)
 st.set_page_config(**PAGE_CONFIG)
 
-# ----------------2. Caricamento e preparazione dati base
-@st.cache_data(ttl=3600)
-def load_and_prepare_base_data():
-    """Carica e prepara dati base"""
-    df_original = load_titanic_data()
-    if df_original is None:
-        return None, None
-    
-    df_cleaned = clean_dataset_basic(df_original)
-    return df_original, df_cleaned
-
-df_original, df = load_and_prepare_base_data()
+# ----------------2. Caricamento e preparazione dati base (registro condiviso)
+df_original, df = get_datasets('original', 'cleaned')
 if df is None:
     st.error("Impossibile caricare i dati")
     st.stop()
@@ -296,19 +286,21 @@ elif ml_section == "🏋️ Model Training":
             trainer.X_train = pd.DataFrame(X_train_processed) if hasattr(X_train_processed, 'shape') else X_train_processed
             trainer.X_test = pd.DataFrame(X_test_processed) if hasattr(X_test_processed, 'shape') else X_test_processed
         
-        training_results = {}
         evaluation_results = {}
         cv_results = {}
         
-        # Training loop
-        for i, model_type in enumerate(selected_models):
-            update_progress(i / len(selected_models), f"Training {ML_MODELS[model_type]['name']}...")
+        # Training parallelo (un processo per modello, core divisi con l'n_jobs interno)
+        training_results = trainer.train_multiple_models(
+            selected_models,
+            lambda p, msg: update_progress(0.7 * p, msg)
+        )
+        
+        # Cross validation ed evaluation sui modelli addestrati
+        for i, model_type in enumerate(training_results):
+            update_progress(0.7 + 0.3 * i / len(training_results), f"Valutazione {ML_MODELS[model_type]['name']}...")
+            result = training_results[model_type]
             
             try:
-                # Training
-                result = trainer.train_single_model(model_type)
-                training_results[model_type] = result
-                
                 # Cross validation se richiesto
                 if use_cross_validation:
                     cv_result = trainer.cross_validate_model(model_type)
@@ -321,7 +313,7 @@ elif ml_section == "🏋️ Model Training":
                 evaluation_results[model_type] = eval_result
                 
             except Exception as e:
-                st.error(f"Errore nel training di {model_type}: {str(e)}")
+                st.error(f"Errore nella valutazione di {model_type}: {str(e)}")
                 continue
         
         update_progress(1.0, "Training completato!")
@@ -331,6 +323,7 @@ elif ml_section == "🏋️ Model Training":
         st.session_state['evaluation_results'] = evaluation_results
         st.session_state['cv_results'] = cv_results
         st.session_state['trained_models'] = trainer.trained_models
+        st.session_state['trained_preprocessors'] = trainer.preprocessors
         
         # ----------------12. Training Results Display
         st.success("🎉 Training completato con successo!")
@@ -618,37 +611,43 @@ elif ml_section == "🔮 Predictions & Deployment":
         st.info(f"**Solo:** {is_alone}")
     
     # ----------------25. Esegui Predizione
+    # Servizio di scoring (pipeline compilata) ricreato solo se cambiano pipeline o modelli
+    scoring_key = (id(st.session_state['preprocessing_pipeline']), id(st.session_state['trained_models']))
+    if st.session_state.get('scoring_service_key') != scoring_key:
+        from src.models.scoring_service import ScoringService
+        st.session_state['scoring_service'] = ScoringService(
+            st.session_state['preprocessing_pipeline'],
+            st.session_state['trained_models'],
+            X_reference=st.session_state['prepared_data'][0],
+            preprocessors=st.session_state.get('trained_preprocessors')
+        )
+        st.session_state['scoring_service_key'] = scoring_key
+    scoring_service = st.session_state['scoring_service']
+    
     if st.button("🔮 Predici Sopravvivenza", type="primary"):
-        # Crea DataFrame input
-        input_data = pd.DataFrame({
-            'Pclass': [new_pclass],
-            'Sex': [new_sex],
-            'Age': [new_age],
-            'SibSp': [new_sibsp],
-            'Parch': [new_parch],
-            'Fare': [new_fare],
-            'Embarked': [new_embarked]
-        })
+        input_data = {
+            'Pclass': new_pclass,
+            'Sex': new_sex,
+            'Age': new_age,
+            'SibSp': new_sibsp,
+            'Parch': new_parch,
+            'Fare': new_fare,
+            'Embarked': new_embarked
+        }
         
-        # Applica preprocessing
-        pipeline = st.session_state['preprocessing_pipeline']
-        input_processed = pipeline.transform(input_data)
+        # Preprocessing e predizioni di tutti i modelli in un'unica chiamata
+        try:
+            result = scoring_service.score_one(input_data)
+        except Exception as e:
+            st.error(f"Errore nella predizione: {str(e)}")
+            st.stop()
+        predictions = {name: model_result['prediction'] for name, model_result in result['models'].items()}
+        probabilities = {name: model_result['probability'] for name, model_result in result['models'].items()}
         
-        # Predizioni da tutti i modelli
-        predictions = {}
-        probabilities = {}
-        
-        for model_name, model_data in st.session_state['trained_models'].items():
-            model = model_data['model']
-            
-            pred = model.predict(input_processed)[0]
-            predictions[model_name] = pred
-            
-            if hasattr(model, 'predict_proba'):
-                proba = model.predict_proba(input_processed)[0][1]
-                probabilities[model_name] = proba
-            else:
-                probabilities[model_name] = None
+        latency = scoring_service.latency.summary()
+        st.caption(f"Scoring {'compilato' if scoring_service.is_compiled else 'tramite pipeline'}: "
+                   f"p50 {latency['p50_ms']:.2f} ms, p99 {latency['p99_ms']:.2f} ms "
+                   f"su {latency['count']} richieste")
         
         # ----------------26. Visualizza Risultati
         st.subheader("🎯 Risultati Predizione")
@@ -704,6 +703,36 @@ elif ml_section == "🔮 Predictions & Deployment":
                 fig_pred = pred_viz.create_prediction_confidence_chart(prob_df)
                 st.plotly_chart(fig_pred, use_container_width=True)
     
+    # Endpoint HTTP locale con lo stesso servizio di scoring
+    with st.expander("🌐 Endpoint HTTP Locale"):
+        from src.models.scoring_service import start_http_server, stop_http_server
+        
+        scoring_server = st.session_state.get('scoring_http_server')
+        if scoring_server is None:
+            if st.button("▶️ Avvia Endpoint"):
+                try:
+                    scoring_server = start_http_server(scoring_service)
+                    st.session_state['scoring_http_server'] = scoring_server
+                except OSError as e:
+                    st.error(f"Impossibile avviare l'endpoint: {str(e)}")
+        
+        if scoring_server is not None:
+            host, port = scoring_server.server_address[:2]
+            st.code(f"curl -X POST http://{host}:{port}/predict "
+                    f"-d '{{\"Pclass\": 3, \"Sex\": \"male\", \"Age\": 30, \"Fare\": 8.05}}'\n"
+                    f"curl http://{host}:{port}/stats", language='bash')
+            
+            http_latency = scoring_server.http_latency.summary()
+            if http_latency['count']:
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Richieste HTTP", http_latency['count'])
+                col2.metric("Latenza p50", f"{http_latency['p50_ms']:.2f} ms")
+                col3.metric("Latenza p99", f"{http_latency['p99_ms']:.2f} ms")
+            
+            if st.button("⏹️ Ferma Endpoint"):
+                stop_http_server(scoring_server)
+                del st.session_state['scoring_http_server']
+    
     # ----------------27. Batch Predictions
     st.subheader("📊 Predizioni Batch")
     
@@ -712,21 +741,37 @@ elif ml_section == "🔮 Predictions & Deployment":
         type=['csv'],
         help="Il file deve contenere le stesse colonne del dataset di training"
     )
-    
-    if uploaded_file is not None:
-        batch_data = pd.read_csv(uploaded_file)
+    server_path = st.text_input(
+        "Oppure percorso di un CSV sul server (file troppo grandi per l'upload):",
+        value=""
+    )
+    batch_source = uploaded_file if uploaded_file is not None else (server_path.strip() or None)
+    
+    if batch_source is not None:
+        # Anteprima: solo le prime righe, il file viene poi letto a chunk
+        try:
+            batch_preview = pd.read_csv(batch_source, nrows=5)
+            if uploaded_file is not None:
+                uploaded_file.seek(0)
+        except Exception as e:
+            st.error(f"File non leggibile: {str(e)}")
+            st.stop()
         st.write("**Preview dati caricati:**")
-        st.dataframe(batch_data.head(), use_container_width=True)
+        st.dataframe(batch_preview, use_container_width=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            batch_format = st.radio("Formato output", ['parquet', 'csv'], horizontal=True,
+                                    index=['parquet', 'csv'].index(BATCH_SCORING_CONFIG['output_format']))
+        with col2:
+            batch_chunksize = st.number_input("Righe per chunk", min_value=1_000, max_value=1_000_000,
+                                              value=BATCH_SCORING_CONFIG['chunksize'], step=10_000)
         
         if st.button("🚀 Esegui Predizioni Batch"):
+            from src.models.batch_scoring import score_csv_in_chunks
+            from src.models.scoring_service import ScoringService
+            
             try:
-                # Preprocessing
-                pipeline = st.session_state['preprocessing_pipeline']
-                batch_processed = pipeline.transform(batch_data)
-                
-                # Predizioni
-                batch_results = batch_data.copy()
-                
                 # Usa il miglior modello per batch predictions
                 evaluation_results = st.session_state['evaluation_results']
                 comparison = ModelComparison(evaluation_results)
@@ -734,27 +779,58 @@ elif ml_section == "🔮 Predictions & Deployment":
                 
                 if best_model_info:
                     best_model_name = best_model_info['model_type']
-                    best_model = st.session_state['trained_models'][best_model_name]['model']
+                    batch_service = ScoringService(
+                        st.session_state['preprocessing_pipeline'],
+                        {best_model_name: st.session_state['trained_models'][best_model_name]},
+                        X_reference=st.session_state['prepared_data'][0],
+                        preprocessors=st.session_state.get('trained_preprocessors')
+                    )
                     
-                    predictions = best_model.predict(batch_processed)
-                    batch_results['Predicted_Survival'] = predictions
-                    batch_results['Predicted_Survival_Text'] = batch_results['Predicted_Survival'].map({0: 'Non Sopravvive', 1: 'Sopravvive'})
+                    # Lettura, predizione e scrittura a chunk: memoria limitata a un chunk
+                    batch_progress = st.progress(0)
+                    batch_status = st.empty()
                     
-                    if hasattr(best_model, 'predict_proba'):
-                        probabilities = best_model.predict_proba(batch_processed)[:, 1]
-                        batch_results['Survival_Probability'] = probabilities
+                    def update_batch_progress(progress, rows, rows_per_second):
+                        batch_progress.progress(progress)
+                        batch_status.text(f"{rows:,} righe elaborate ({rows_per_second:,.0f} righe/s)")
                     
-                    st.success(f"Predizioni completate usando {best_model_info['model_name']}")
-                    st.dataframe(batch_results, use_container_width=True)
+                    # Un solo file di output per sessione: quello della run precedente viene eliminato
+                    previous_output = st.session_state.pop('batch_output_path', None)
+                    if previous_output and os.path.exists(previous_output):
+                        os.remove(previous_output)
                     
-                    # Download risultati
-                    csv = batch_results.to_csv(index=False)
-                    st.download_button(
-                        label="📥 Scarica Risultati CSV",
-                        data=csv,
-                        file_name=f"titanic_predictions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                        mime='text/csv'
+                    batch_report = score_csv_in_chunks(
+                        batch_source, batch_service,
+                        output_format=batch_format,
+                        chunksize=int(batch_chunksize),
+                        progress_callback=update_batch_progress
                     )
+                    st.session_state['batch_output_path'] = batch_report['output_path']
+                    batch_progress.progress(1.0)
+                    
+                    st.success(f"Predizioni completate usando {best_model_info['model_name']}")
+                    col1, col2, col3 = st.columns(3)
+                    col1.metric("Righe", f"{batch_report['rows']:,}")
+                    col2.metric("Righe/s", f"{batch_report['rows_per_second']:,.0f}")
+                    col3.metric("Sopravvivenza Predetta", f"{batch_report['survival_rate']:.1%}"
+                                if batch_report['survival_rate'] is not None else "-")
+                    st.dataframe(batch_report['preview'], use_container_width=True)
+                    
+                    # Download risultati (solo file entro download_max_mb)
+                    output_path = batch_report['output_path']
+                    if output_path is None:
+                        st.warning("Il file non contiene righe")
+                    elif batch_report['output_bytes'] <= BATCH_SCORING_CONFIG['download_max_mb'] * 1024 ** 2:
+                        with open(output_path, 'rb') as f:
+                            st.download_button(
+                                label=f"📥 Scarica Risultati {batch_format.upper()}",
+                                data=f,
+                                file_name=f"titanic_predictions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{batch_format}",
+                                mime='application/octet-stream' if batch_format == 'parquet' else 'text/csv'
+                            )
+                    else:
+                        st.info(f"Risultati salvati in `{output_path}` "
+                                f"({batch_report['output_bytes'] / 1024 ** 2:,.0f} MB, oltre il limite di download)")
                 
             except Exception as e:
                 st.error(f"Errore nelle predizioni batch: {str(e)}")
@@ -789,31 +865,54 @@ elif ml_section == "🔮 Predictions & Deployment":
         st.subheader("💾 Salvataggio Modelli")
         
         if st.button("💾 Salva Tutti i Modelli"):
-            saved_models = []
+            # Un solo bundle: pipeline salvata una volta per tutti i modelli
+            from src.models.model_bundle import save_model_bundle
+            from src.utils.helpers import compute_data_fingerprint
             
-            for model_name, model_data in st.session_state['trained_models'].items():
-                try:
-                    # Salva modello
-                    model_path = ModelPersistence.save_model(
-                        model_data['model'], 
-                        model_name
-                    )
-                    saved_models.append(f"{model_name}: {model_path}")
-                    
-                    # Salva anche preprocessing pipeline
-                    pipeline_path = ModelPersistence.save_model(
-                        st.session_state['preprocessing_pipeline'],
-                        f"preprocessing_pipeline_{model_name}"
-                    )
-                    saved_models.append(f"Pipeline {model_name}: {pipeline_path}")
-                    
-                except Exception as e:
-                    st.error(f"Errore salvando {model_name}: {str(e)}")
-            
-            if saved_models:
+            evaluation_results = st.session_state.get('evaluation_results', {})
+            X_train, _, y_train, _ = st.session_state['prepared_data']
+            try:
+                bundle_path = save_model_bundle(
+                    st.session_state['trained_models'],
+                    st.session_state['preprocessing_pipeline'],
+                    preprocessors=st.session_state.get('trained_preprocessors'),
+                    X_reference=X_train,
+                    metadata={
+                        'accuracy': {name: result.get('accuracy') for name, result in evaluation_results.items()},
+                        'n_train_rows': len(X_train)
+                    },
+                    metrics=evaluation_results,
+                    cv_scores=st.session_state.get('cv_results'),
+                    data_fingerprint=compute_data_fingerprint(X_train, y_train)
+                )
                 st.success("Modelli salvati con successo!")
-                for saved in saved_models:
-                    st.write(f"✅ {saved}")
+                for model_name in st.session_state['trained_models']:
+                    st.write(f"✅ {model_name}")
+                st.caption(f"Bundle: {bundle_path} "
+                           f"({os.path.getsize(bundle_path) / 1024 ** 2:.1f} MB) - "
+                           f"`python batch_score.py --bundle {bundle_path} ...` per le predizioni offline")
+            except Exception as e:
+                st.error(f"Errore nel salvataggio dei modelli: {str(e)}")
+        
+        # Registro dei modelli salvati: letto dal database, nessun file caricato
+        with st.expander("📚 Modelli Registrati"):
+            from src.models.model_registry import get_model_registry
+            
+            registry = get_model_registry()
+            records = registry.find(order_by='f1') if registry is not None else []
+            if records:
+                st.dataframe(pd.DataFrame([{
+                    'Id': record['id'],
+                    'Modello': record['member'] or record['name'],
+                    'File': os.path.basename(record['path']),
+                    'F1': record['f1'],
+                    'Accuracy': record['accuracy'],
+                    'CV Mean': record['cv_mean'],
+                    'Dimensione (MB)': (record['size_bytes'] or 0) / 1024 ** 2,
+                    'Salvato': datetime.fromtimestamp(record['created_at']).strftime('%Y-%m-%d %H:%M')
+                } for record in records]), use_container_width=True)
+            else:
+                st.info("Nessun modello registrato")
 
 # ----------------29. Model Reports
 elif ml_section == "📋 Model Reports":
@@ -20,7 +20,7 @@ def create_survival_by_class_detailed(df):
         return None
     
     # Calcola statistiche per classe
-    class_stats = df.groupby('Pclass')['Survived'].agg(['sum', 'count', 'mean']).reset_index()
+    class_stats = df.groupby('Pclass', observed=True)['Survived'].agg(['sum', 'count', 'mean']).reset_index()
     class_stats.columns = ['Pclass', 'Sopravvissuti', 'Totale', 'Tasso']
     
     # Mappa le classi
@@ -68,7 +68,7 @@ def create_survival_by_gender_detailed(df):
         return None
     
     # Calcola percentuali sopravvivenza per genere
-    gender_survival = df.groupby('Sex')['Survived'].mean() * 100
+    gender_survival = df.groupby('Sex', observed=True)['Survived'].mean() * 100
     
     # Mappa i generi
     gender_labels = [VALUE_MAPPINGS['Sex'][sex] for sex in gender_survival.index]
@@ -167,7 +167,7 @@ def create_survival_rates_by_class(df):
     if df is None:
         return None
     
-    survival_rates = df.groupby('Pclass')['Survived'].mean() * 100
+    survival_rates = df.groupby('Pclass', observed=True)['Survived'].mean() * 100
     class_labels = [VALUE_MAPPINGS['Pclass'][pclass] for pclass in survival_rates.index]
     
     fig = go.Figure(data=[go.Bar(
@@ -197,7 +197,7 @@ def create_class_survival_detailed_analysis(df):
         return None
     
     # Calcola statistiche dettagliate
-    class_detail = df.groupby(['Pclass', 'Survived']).size().unstack(fill_value=0)
+    class_detail = df.groupby(['Pclass', 'Survived'], observed=True).size().unstack(fill_value=0)
     class_detail.columns = ['Morti', 'Sopravvissuti']
     class_detail['Totale'] = class_detail['Morti'] + class_detail['Sopravvissuti']
     class_detail['Tasso_Sopravvivenza'] = (class_detail['Sopravvissuti'] / class_detail['Totale']) * 100
@@ -244,7 +244,7 @@ def create_gender_survival_comparison(df):
     if df is None:
         return None
     
-    gender_survival = df.groupby(['Sex', 'Survived']).size().unstack(fill_value=0)
+    gender_survival = df.groupby(['Sex', 'Survived'], observed=True).size().unstack(fill_value=0)
     gender_survival.columns = ['Morti', 'Sopravvissuti']
     
     gender_labels = [VALUE_MAPPINGS['Sex'][sex] for sex in gender_survival.index]
@@ -283,7 +283,7 @@ def create_gender_class_distribution(df):
     if df is None:
         return None
     
-    gender_class = df.groupby(['Pclass', 'Sex']).size().unstack(fill_value=0)
+    gender_class = df.groupby(['Pclass', 'Sex'], observed=True).size().unstack(fill_value=0)
     class_labels = [VALUE_MAPPINGS['Pclass'][pclass] for pclass in gender_class.index]
     
     fig = go.Figure()
@@ -317,7 +317,7 @@ def create_gender_class_survival_analysis(df):
         return None
     
     # Calcola tassi sopravvivenza per genere e classe
-    survival_by_gender_class = df.groupby(['Pclass', 'Sex'])['Survived'].mean() * 100
+    survival_by_gender_class = df.groupby(['Pclass', 'Sex'], observed=True)['Survived'].mean() * 100
     survival_pivot = survival_by_gender_class.unstack()
     
     class_labels = [VALUE_MAPPINGS['Pclass'][pclass] for pclass in survival_pivot.index]
@@ -388,7 +388,7 @@ def create_age_group_survival_rates(df):
     if df is None or 'Age_Group' not in df.columns:
         return None
     
-    age_group_survival = df.groupby('Age_Group')['Survived'].mean() * 100
+    age_group_survival = df.groupby('Age_Group', observed=True)['Survived'].mean() * 100
     
     fig = go.Figure(data=[go.Bar(
         x=age_group_survival.index,
@@ -417,7 +417,7 @@ def create_age_gender_survival_analysis(df):
         return None
     
     # Calcola tassi per età e genere
-    age_gender_survival = df.groupby(['Age_Group', 'Sex'])['Survived'].mean() * 100
+    age_gender_survival = df.groupby(['Age_Group', 'Sex'], observed=True)['Survived'].mean() * 100
     survival_pivot = age_gender_survival.unstack()
     
     fig = go.Figure()
@@ -450,7 +450,7 @@ def create_fare_category_survival(df):
     if df is None or 'Fare_Category' not in df.columns:
         return None
     
-    fare_survival = df.groupby('Fare_Category')['Survived'].mean() * 100
+    fare_survival = df.groupby('Fare_Category', observed=True)['Survived'].mean() * 100
     
     fig = go.Figure(data=[go.Bar(
         x=fare_survival.index,
@@ -507,7 +507,7 @@ def create_fare_class_survival_analysis(df):
         return None
     
     # Media prezzi per classe e sopravvivenza
-    fare_class_survival = df.groupby(['Pclass', 'Survived'])['Fare'].mean().unstack()
+    fare_class_survival = df.groupby(['Pclass', 'Survived'], observed=True)['Fare'].mean().unstack()
     fare_class_survival.columns = ['Morti', 'Sopravvissuti']
     
     class_labels = [VALUE_MAPPINGS['Pclass'][pclass] for pclass in fare_class_survival.index]
@@ -547,7 +547,7 @@ def create_family_size_survival(df):
     if df is None or 'Family_Size' not in df.columns:
         return None
     
-    family_survival = df.groupby('Family_Size')['Survived'].mean() * 100
+    family_survival = df.groupby('Family_Size', observed=True)['Survived'].mean() * 100
     
     fig = go.Figure(data=[go.Scatter(
         x=family_survival.index,
@@ -575,7 +575,7 @@ def create_alone_vs_family_analysis(df):
     if df is None or 'Is_Alone' not in df.columns:
         return None
     
-    alone_survival = df.groupby('Is_Alone')['Survived'].mean() * 100
+    alone_survival = df.groupby('Is_Alone', observed=True)['Survived'].mean() * 100
     labels = ['Con Famiglia', 'Solo']
     
     fig = go.Figure(data=[go.Bar(
@@ -611,7 +611,7 @@ def create_family_composition_analysis(df):
     )
     
     # SibSp analysis
-    sibsp_survival = df.groupby('SibSp')['Survived'].mean() * 100
+    sibsp_survival = df.groupby('SibSp', observed=True)['Survived'].mean() * 100
     fig.add_trace(
         go.Bar(x=sibsp_survival.index, y=sibsp_survival.values, 
                name='SibSp', marker_color=COLOR_PALETTES['primary']),
@@ -619,7 +619,7 @@ def create_family_composition_analysis(df):
     )
     
     # Parch analysis
-    parch_survival = df.groupby('Parch')['Survived'].mean() * 100
+    parch_survival = df.groupby('Parch', observed=True)['Survived'].mean() * 100
     fig.add_trace(
         go.Bar(x=parch_survival.index, y=parch_survival.values, 
                name='Parch', marker_color=COLOR_PALETTES['secondary']),
@@ -638,7 +638,7 @@ def create_multivariate_survival_analysis(df):
         return None
     
     # Heatmap sopravvivenza per classe e genere
-    survival_matrix = df.groupby(['Pclass', 'Sex'])['Survived'].mean() * 100
+    survival_matrix = df.groupby(['Pclass', 'Sex'], observed=True)['Survived'].mean() * 100
     survival_pivot = survival_matrix.unstack()
     
     class_labels = [VALUE_MAPPINGS['Pclass'][pclass] for pclass in survival_pivot.index]
@@ -677,26 +677,26 @@ def calculate_survival_factors_ranking(df):
     # Calcola range di sopravvivenza per ogni fattore
     
     # Genere
-    gender_range = df.groupby('Sex')['Survived'].mean().max() - df.groupby('Sex')['Survived'].mean().min()
+    gender_range = df.groupby('Sex', observed=True)['Survived'].mean().max() - df.groupby('Sex', observed=True)['Survived'].mean().min()
     factors_impact.append({'Fattore': 'Genere', 'Range_Impatto': gender_range * 100, 'Importanza': 'Molto Alta'})
     
     # Classe
-    class_range = df.groupby('Pclass')['Survived'].mean().max() - df.groupby('Pclass')['Survived'].mean().min()
+    class_range = df.groupby('Pclass', observed=True)['Survived'].mean().max() - df.groupby('Pclass', observed=True)['Survived'].mean().min()
     factors_impact.append({'Fattore': 'Classe', 'Range_Impatto': class_range * 100, 'Importanza': 'Alta'})
     
     # Età (se disponibile)
     if 'Age_Group' in df.columns:
-        age_range = df.groupby('Age_Group')['Survived'].mean().max() - df.groupby('Age_Group')['Survived'].mean().min()
+        age_range = df.groupby('Age_Group', observed=True)['Survived'].mean().max() - df.groupby('Age_Group', observed=True)['Survived'].mean().min()
         factors_impact.append({'Fattore': 'Gruppo Età', 'Range_Impatto': age_range * 100, 'Importanza': 'Media'})
     
     # Famiglia
     if 'Family_Size' in df.columns:
-        family_range = df.groupby('Family_Size')['Survived'].mean().max() - df.groupby('Family_Size')['Survived'].mean().min()
+        family_range = df.groupby('Family_Size', observed=True)['Survived'].mean().max() - df.groupby('Family_Size', observed=True)['Survived'].mean().min()
         factors_impact.append({'Fattore': 'Dimensione Famiglia', 'Range_Impatto': family_range * 100, 'Importanza': 'Media'})
     
     # Prezzo
     if 'Fare_Category' in df.columns:
-        fare_range = df.groupby('Fare_Category')['Survived'].mean().max() - df.groupby('Fare_Category')['Survived'].mean().min()
+        fare_range = df.groupby('Fare_Category', observed=True)['Survived'].mean().max() - df.groupby('Fare_Category', observed=True)['Survived'].mean().min()
         factors_impact.append({'Fattore': 'Categoria Prezzo', 'Range_Impatto': fare_range * 100, 'Importanza': 'Media'})
     
     factors_df = pd.DataFrame(factors_impact)
@@ -68,6 +68,39 @@ def ensure_directories():
 DATA_FILE = os.path.join(DATA_DIR, "data_titanic.csv")
 DATA_URL = "https://raw.githubusercontent.com/FabriceGhislain7/data_analyst_scientist/main/titanic_project/data_titanic.csv"
 
+# Snapshot colonnare del CSV (Arrow/Parquet) per evitare il re-parsing ad ogni avvio
+SNAPSHOT_CONFIG = {
+    'enabled': True,
+    'format': 'feather',          # 'feather' (Arrow IPC, memory-mappabile) o 'parquet'
+    'memory_map': True,
+    'hash_algorithm': 'sha256',
+    'hash_block_size': 1024 * 1024
+}
+
+# Ingestione a chunk per dataset piu' grandi della memoria disponibile
+STREAMING_CONFIG = {
+    'chunksize': 100_000,
+    'output_format': 'parquet'   # 'parquet' o 'csv'
+}
+
+# Pulizia incrementale: stato persistito tra un'esecuzione e l'altra
+# (metadati + hash di riga in sola aggiunta); verify_rows = righe gia'
+# processate ricontrollate a campione (None = tutte)
+INCREMENTAL_CLEAN_CONFIG = {
+    'state_dir': os.path.join(DATA_DIR, 'clean_state'),
+    'state_file': 'clean_dataset_basic.pkl',
+    'state_version': 2,
+    'verify_rows': 256
+}
+
+# Backend dei quantili (bounds IQR): 'exact', 'kll' (sketch approssimato) o 'auto'
+QUANTILE_CONFIG = {
+    'backend': 'auto',
+    'epsilon': 0.01,              # Errore di rango normalizzato dello sketch KLL
+    'seed': 42,
+    'sketch_min_rows': 1_000_000  # Con 'auto': sketch solo sopra questa soglia
+}
+
 # Colonne del dataset
 DATASET_COLUMNS = {
     'NUMERICAL': ['PassengerId', 'Age', 'SibSp', 'Parch', 'Fare'],
@@ -76,6 +109,22 @@ DATASET_COLUMNS = {
     'TARGET': 'Survived'
 }
 
+# Schema dei tipi applicato in fase di caricamento (costruito da DATASET_COLUMNS)
+# Pclass resta numerica (int8): e' usata in correlazioni e feature aritmetiche
+DTYPE_DEFAULTS = {
+    'NUMERICAL': 'float32',
+    'CATEGORICAL': 'category',
+    'TEXT': 'object'
+}
+
+DTYPE_OVERRIDES = {
+    'PassengerId': 'int32',
+    'SibSp': 'int8',
+    'Parch': 'int8',
+    'Survived': 'int8',
+    'Pclass': 'int8'
+}
+
 # Mapping per etichette leggibili
 COLUMN_LABELS = {
     'PassengerId': 'ID Passeggero',
@@ -251,6 +300,128 @@ CACHE_CONFIG = {
     'allow_output_mutation': True
 }
 
+# Registro condiviso dei dataset preparati (condiviso tra pagine e sessioni)
+DATASET_REGISTRY_CONFIG = {
+    'max_versions': 2,
+    'stages': ['original', 'cleaned', 'featured']
+}
+
+# Training parallelo di piu' modelli (un processo per tipo di modello)
+# max_workers: core totali a disposizione (None = tutti); vengono divisi tra
+# i processi esterni e l'n_jobs interno (GridSearch, learning curves, stimatori)
+PARALLEL_TRAINING_CONFIG = {
+    'backend': 'loky',
+    'max_workers': None,
+    'min_models': 2
+}
+
+# Predizione di ModelEnsemble: thread per valutare i membri (1 = sequenziale)
+ENSEMBLE_CONFIG = {
+    'n_jobs': 1
+}
+
+# Servizio di scoring a bassa latenza (src/models/scoring_service.py):
+# micro-batching delle richieste concorrenti ed endpoint HTTP locale
+SCORING_SERVICE_CONFIG = {
+    'host': '127.0.0.1',
+    'port': 8765,
+    'max_batch_size': 64,
+    'max_wait_ms': 0.5,
+    'latency_window': 10_000,
+    'verify_tolerance': 1e-6,
+    'vectorize_min_rows': 64
+}
+
+# Predizioni batch a chunk (src/models/batch_scoring.py): output su file
+# temporaneo (output_dir None = cartella temporanea di sistema), eliminato
+# dopo output_max_age_hours; download dalla pagina solo sotto download_max_mb
+BATCH_SCORING_CONFIG = {
+    'chunksize': 50_000,
+    'output_format': 'parquet',
+    'output_dir': None,
+    'output_max_age_hours': 24,
+    'preview_rows': 100,
+    'download_max_mb': 200
+}
+
+# Predizioni batch a shard da riga di comando (batch_score.py): workers None =
+# tutti i core; ogni worker carica i modelli e scrive una partizione per shard
+SHARDED_SCORING_CONFIG = {
+    'workers': None,
+    'shards_per_worker': 1,
+    'backend': 'loky',
+    'summary_file': '_scoring_summary.json'
+}
+
+# Bundle dei modelli (src/models/model_bundle.py): un file joblib con pipeline,
+# modelli e metadati. compress 0 permette il memory mapping degli array
+# (pagine condivise tra i worker); compress > 0 (es. 3 o ('lz4', 3)) riduce
+# il file ma lo carica sempre per intero
+MODEL_BUNDLE_CONFIG = {
+    'name': 'titanic_models',
+    'compress': 0,
+    'mmap_mode': 'r'
+}
+
+# Registro SQLite dei modelli salvati (src/models/model_registry.py): un file
+# per directory dei modelli, con metriche, schema e impronta dei dati
+MODEL_REGISTRY_CONFIG = {
+    'enabled': True,
+    'filename': 'registry.sqlite',
+    'timeout': 30
+}
+
+# Cross validation senza leakage: matrici preprocessate per fold in cache su
+# disco (joblib.Memory), riusate da tutti i modelli valutati sugli stessi dati
+CV_CACHE_CONFIG = {
+    'cache_dir': os.path.join(DATA_DIR, 'cv_cache'),
+    'bytes_limit': '512M',
+    'verbose': 0
+}
+
+# Ricerca iperparametri: 'auto', 'grid', 'random', 'halving_grid',
+# 'halving_random' o 'bayesian'; time_budget in secondi (None = nessun limite)
+HYPERPARAMETER_SEARCH_CONFIG = {
+    'strategy': 'auto',
+    'grid_max_candidates': 50,
+    'n_iter': 30,
+    'time_budget': None,
+    'early_stopping_rounds': 10,
+    'min_improvement': 1e-4,
+    'halving_factor': 3,
+    'bayesian_initial_points': 8,
+    'bayesian_kappa': 1.0,
+    'max_pool': 5000,
+    'random_state': 42
+}
+
+# Archivio SQLite dei candidati valutati (ricerche riprendibili)
+TRIAL_STORE_CONFIG = {
+    'enabled': True,
+    'path': os.path.join(DATA_DIR, 'trials.sqlite'),
+    'timeout': 30
+}
+
+# Warm start dei modelli a ensemble (Random Forest, Extra Trees, Gradient Boosting):
+# stimatori aggiunti = max(min_additional_estimators, growth_ratio * stimatori attuali)
+WARM_START_CONFIG = {
+    'growth_ratio': 0.25,
+    'min_additional_estimators': 10
+}
+
+# Training out-of-core con partial_fit (LogisticRegression via SGD, GaussianNB, MLP):
+# le righe di validazione sono scelte per hash del contenuto (validation_fraction)
+STREAMING_TRAINING_CONFIG = {
+    'batch_size': 10_000,
+    'epochs': 5,
+    'validation_fraction': 0.1,
+    'early_stopping_rounds': 2,
+    'tol': 1e-4,
+    'random_state': 42,
+    'numeric_features': ['Pclass', 'Age', 'SibSp', 'Parch', 'Fare'],
+    'categorical_features': ['Sex', 'Embarked']
+}
+
 # Mapping delle sezioni del notebook alle pagine Streamlit
 NOTEBOOK_SECTIONS = {
     'data_loading': {
@@ -0,0 +1,540 @@
+"""
+src/models/batch_scoring.py
+Predizioni batch in streaming per file CSV grandi: lettura, preprocessing,
+predizione e scrittura a chunk su un file temporaneo (CSV o Parquet), anche
+a shard di righe su un pool di processi (batch_score.py da riga di comando)
+"""
+
+import io
+import json
+import os
+import re
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from src.config import BATCH_SCORING_CONFIG, SHARDED_SCORING_CONFIG, DATASET_COLUMNS
+from src.utils.headless import emit
+
+PREDICTION_LABELS = {0: 'Non Sopravvive', 1: 'Sopravvive'}
+
+# ----------------1. Sorgente e Schema di Output
+def _open_source(source):
+    """
+    Handle binario della sorgente e dimensione totale in byte
+
+    Accetta un percorso o un file gia' aperto (es. UploadedFile di
+    Streamlit); la posizione dell'handle misura l'avanzamento.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb'), os.path.getsize(source), True
+
+    size = getattr(source, 'size', None)
+    if size is None and hasattr(source, 'seek'):
+        position = source.tell()
+        size = source.seek(0, os.SEEK_END)
+        source.seek(position)
+    source.seek(0)
+    return source, size, False
+
+def _output_dtypes(chunk):
+    """
+    Tipi di output stabili tra i chunk
+
+    Gli interi dello schema del dataset diventano Int64 (nullable) e le
+    altre colonne numeriche float64: un chunk con valori mancanti non cambia
+    il tipo della colonna. Le colonne testuali dello schema restano stringhe
+    anche se un chunk (o uno shard) le contiene solo vuote; le colonne fuori
+    schema seguono il tipo letto.
+    """
+    from src.utils.data_loader import build_dtype_schema
+
+    schema = build_dtype_schema()
+    dtypes = {}
+    for column in chunk.columns:
+        kind = str(schema.get(column, ''))
+        if kind.startswith('int'):
+            dtypes[column] = 'Int64'
+        elif kind.startswith('float') or (not kind and pd.api.types.is_numeric_dtype(chunk[column])):
+            dtypes[column] = 'float64'
+        else:
+            dtypes[column] = 'object'
+    return dtypes
+
+def _arrow_schema(dtypes):
+    import pyarrow as pa
+
+    arrow_types = {'Int64': pa.int64(), 'float64': pa.float64(), 'object': pa.string()}
+    fields = [pa.field(column, arrow_types[dtype]) for column, dtype in dtypes.items()]
+    fields += [
+        pa.field('Predicted_Survival', pa.int8()),
+        pa.field('Predicted_Survival_Text', pa.string()),
+        pa.field('Survival_Probability', pa.float32())
+    ]
+    return pa.schema(fields)
+
+def _with_predictions(chunk, predictions, dtypes):
+    """Chunk di input (tipi stabili) con le colonne di predizione"""
+    output = chunk.astype({column: dtype for column, dtype in dtypes.items() if column in chunk.columns})
+    for column, dtype in dtypes.items():
+        if column not in output.columns:
+            output[column] = pd.Series(pd.NA if dtype == 'Int64' else np.nan, index=chunk.index, dtype=dtype)
+    output = output[list(dtypes)]
+
+    # Colonne testuali: valori letti come numeri in questo chunk diventano stringhe
+    for column in [column for column, dtype in dtypes.items() if dtype == 'object']:
+        values = output[column]
+        output[column] = values.where(values.isna(), values.astype(str))
+
+    output['Predicted_Survival'] = predictions['prediction'].to_numpy(dtype='int8')
+    output['Predicted_Survival_Text'] = predictions['prediction'].map(PREDICTION_LABELS).to_numpy()
+    output['Survival_Probability'] = predictions['probability'].to_numpy(dtype='float32')
+    return output
+
+# ----------------2. Scoring a Chunk
+def cleanup_batch_outputs(output_dir=None, max_age_hours=None):
+    """
+    Elimina i file temporanei di output piu' vecchi di max_age_hours
+
+    Copre le sessioni abbandonate e i riavvii: la pagina elimina solo
+    l'output precedente della propria sessione.
+
+    Returns:
+        Numero di file eliminati
+    """
+    import glob
+
+    config = BATCH_SCORING_CONFIG
+    max_age_hours = config['output_max_age_hours'] if max_age_hours is None else max_age_hours
+    if max_age_hours is None:
+        return 0
+    output_dir = output_dir or config['output_dir'] or tempfile.gettempdir()
+    cutoff = time.time() - max_age_hours * 3600
+
+    removed = 0
+    for path in glob.glob(os.path.join(output_dir, 'titanic_predictions_*')):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            # File eliminato nel frattempo o in uso
+            continue
+    return removed
+
+def _resolve_output(output_path, output_format):
+    """Formato (estensione o BATCH_SCORING_CONFIG) e percorso di output"""
+    config = BATCH_SCORING_CONFIG
+    if output_format is None:
+        extension = os.path.splitext(output_path)[1].lower().lstrip('.') if output_path else ''
+        output_format = extension if extension in ('csv', 'parquet') else config['output_format']
+    if output_format not in ('csv', 'parquet'):
+        raise ValueError(f"Formato di output non supportato: {output_format}")
+    if output_path is None:
+        cleanup_batch_outputs()
+        fd, output_path = tempfile.mkstemp(prefix='titanic_predictions_', suffix=f'.{output_format}',
+                                           dir=config['output_dir'])
+        os.close(fd)
+    return output_path, output_format
+
+def score_chunks(chunks, service, output_path=None, output_format=None, progress=None,
+                 progress_callback=None, preview_rows=None):
+    """
+    Valuta e scrive un iteratore di chunk (DataFrame) su un unico file
+
+    Ogni chunk viene trasformato e valutato (ScoringService.score_frame) e
+    scritto subito sul file di output, quindi in memoria c'e' un solo chunk
+    alla volta. Il file finale compare solo a scrittura completata (rename
+    atomico).
+
+    Args:
+        chunks: Iteratore di DataFrame con le colonne del dataset
+        service: ScoringService con i modelli da usare
+        output_path: File di output (default: file temporaneo in output_dir)
+        output_format: 'parquet' o 'csv' (default: estensione o BATCH_SCORING_CONFIG)
+        progress: Funzione senza argomenti con l'avanzamento 0-1 (opzionale)
+        progress_callback: Callback (progresso 0-1, righe, righe/s)
+        preview_rows: Righe di anteprima da restituire
+
+    Returns:
+        Report con output_path, output_format, rows, chunks, seconds,
+        rows_per_second, survival_rate, output_bytes e preview
+    """
+    preview_rows = BATCH_SCORING_CONFIG['preview_rows'] if preview_rows is None else preview_rows
+    output_path, output_format = _resolve_output(output_path, output_format)
+
+    tmp_path = f"{output_path}.tmp"
+    writer, dtypes, arrow_schema = None, None, None
+    rows, n_chunks, survivors, preview_count = 0, 0, 0, 0
+    preview = []
+    start = time.perf_counter()
+
+    try:
+        for chunk in chunks:
+            predictions = service.score_frame(chunk)
+            if dtypes is None:
+                dtypes = _output_dtypes(chunk)
+            output = _with_predictions(chunk, predictions, dtypes)
+
+            if output_format == 'parquet':
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                if writer is None:
+                    arrow_schema = _arrow_schema(dtypes)
+                    writer = pq.ParquetWriter(tmp_path, arrow_schema)
+                writer.write_table(pa.Table.from_pandas(output, schema=arrow_schema, preserve_index=False))
+            else:
+                output.to_csv(tmp_path, mode='a' if n_chunks else 'w', header=n_chunks == 0, index=False)
+
+            if preview_count < preview_rows:
+                preview.append(output.head(preview_rows - preview_count))
+                preview_count += len(preview[-1])
+            rows += len(output)
+            n_chunks += 1
+            survivors += int(predictions['prediction'].sum())
+
+            if progress_callback:
+                elapsed = time.perf_counter() - start
+                fraction = progress() if progress else 0.0
+                progress_callback(min(fraction, 1.0), rows, rows / elapsed if elapsed > 0 else 0.0)
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            writer = None
+        for path in (tmp_path, output_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+
+    if n_chunks:
+        os.replace(tmp_path, output_path)
+    elif os.path.exists(output_path):
+        os.remove(output_path)
+
+    seconds = time.perf_counter() - start
+    return {
+        'output_path': output_path if n_chunks else None,
+        'output_format': output_format,
+        'rows': rows,
+        'chunks': n_chunks,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else 0.0,
+        'survival_rate': survivors / rows if rows else None,
+        'output_bytes': os.path.getsize(output_path) if n_chunks else 0,
+        'preview': pd.concat(preview) if preview else pd.DataFrame()
+    }
+
+def score_csv_in_chunks(source, service, output_path=None, output_format=None, chunksize=None,
+                        progress_callback=None, preview_rows=None):
+    """
+    Predizioni su un CSV di qualsiasi dimensione con memoria limitata
+
+    Il file viene letto a chunk di chunksize righe e passato a score_chunks;
+    l'avanzamento e' la posizione nel file.
+
+    Args:
+        source: Percorso del CSV o file aperto (es. UploadedFile)
+        service: ScoringService con i modelli da usare
+        output_path: File di output (default: file temporaneo in output_dir)
+        output_format: 'parquet' o 'csv' (default: estensione o BATCH_SCORING_CONFIG)
+        chunksize: Righe per chunk
+        progress_callback: Callback (progresso 0-1, righe, righe/s)
+        preview_rows: Righe di anteprima da restituire
+
+    Returns:
+        Report con output_path, output_format, rows, chunks, seconds,
+        rows_per_second, survival_rate, output_bytes e preview
+    """
+    chunksize = chunksize or BATCH_SCORING_CONFIG['chunksize']
+    handle, total_bytes, owns_handle = _open_source(source)
+    try:
+        report = score_chunks(
+            pd.read_csv(handle, chunksize=chunksize), service,
+            output_path=output_path, output_format=output_format,
+            progress=lambda: handle.tell() / total_bytes if total_bytes else 0.0,
+            progress_callback=progress_callback, preview_rows=preview_rows
+        )
+    finally:
+        if owns_handle:
+            handle.close()
+
+    emit('info', f"Predizioni batch: {report['rows']:,} righe in {report['seconds']:.1f}s "
+         f"({report['rows_per_second']:,.0f} righe/s) -> {report['output_path']}",
+         source='score_csv_in_chunks', rows=report['rows'], chunks=report['chunks'],
+         output_format=report['output_format'])
+    return report
+
+# ----------------3. Shard del File per Intervalli di Righe
+class _ByteRangeReader(io.RawIOBase):
+    """
+    Lettura di un intervallo di byte [start, end) di un file, preceduto
+    dalla riga di header: per pd.read_csv e' un CSV completo
+    """
+
+    def __init__(self, path, start, end, header=b''):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._header = memoryview(header)
+        self._remaining = end - start
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        buffer = memoryview(buffer)
+        if self._header:
+            n = min(len(buffer), len(self._header))
+            buffer[:n] = self._header[:n]
+            self._header = self._header[n:]
+            return n
+        n = min(len(buffer), self._remaining)
+        if n <= 0:
+            return 0
+        n = self._file.readinto(buffer[:n])
+        self._remaining -= n
+        return n
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+def plan_csv_shards(path, n_shards):
+    """
+    Divide un CSV in intervalli di righe contigui di dimensione simile
+
+    I confini sono offset in byte allineati all'inizio di una riga, quindi
+    ogni shard contiene righe intere e nessun worker deve scorrere le righe
+    degli shard precedenti. Si assume un record per riga (nessun a capo
+    dentro i campi tra virgolette).
+
+    Returns:
+        Tupla (header in byte, lista di intervalli (start, end))
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        data_start = f.tell()
+        bounds = [data_start]
+        for i in range(1, n_shards):
+            target = data_start + (size - data_start) * i // n_shards
+            if target <= bounds[-1]:
+                continue
+            # Dal byte precedente: se target e' gia' un inizio riga resta tale
+            f.seek(target - 1)
+            f.readline()
+            position = f.tell()
+            if bounds[-1] < position < size:
+                bounds.append(position)
+    bounds.append(size)
+    return header, [(start, end) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+# ----------------4. Caricamento Modelli Salvati
+def artifact_name(filepath):
+    """Nome usato in ModelPersistence.save_model (file senza timestamp)"""
+    stem = os.path.splitext(os.path.basename(filepath))[0]
+    return re.sub(r'_\d{8}_\d{6}$', '', stem)
+
+def resolve_artifact(spec, save_dir=None):
+    """
+    Percorso di un modello o pipeline salvati
+
+    Args:
+        spec: Percorso di un file oppure nome usato in save_model (viene
+            preso il salvataggio piu' recente in save_dir)
+        save_dir: Directory dei modelli (default MODELS_DIR)
+    """
+    from src.models.model_trainer import ModelPersistence
+
+    if os.path.isfile(spec):
+        return spec
+    for model_file in ModelPersistence.list_saved_models(save_dir):
+        if artifact_name(model_file['filename']) == spec:
+            return model_file['filepath']
+    raise FileNotFoundError(f"Nessun salvataggio trovato per '{spec}'")
+
+def load_reference_frame(reference=None):
+    """
+    Dati di fit della pipeline per congelarne le statistiche
+
+    Args:
+        reference: CSV con i dati di training (senza o con il target); di
+            default lo split di training della pagina 5 sul dataset pulito
+
+    Returns:
+        DataFrame delle features
+    """
+    from src.utils.data_loader import apply_dtype_schema, get_read_csv_dtypes
+
+    target = DATASET_COLUMNS['TARGET']
+    if reference is not None:
+        X = apply_dtype_schema(pd.read_csv(reference, dtype=get_read_csv_dtypes()))
+        return X.drop(columns=[target], errors='ignore')
+
+    from sklearn.model_selection import train_test_split
+    from src.utils.dataset_registry import get_dataset
+
+    df = get_dataset('cleaned')
+    if df is None:
+        raise ValueError("Dataset pulito non disponibile: indicare un file di riferimento")
+    X_train, _, _, _ = train_test_split(df.drop(target, axis=1), df[target], test_size=0.2,
+                                        random_state=42, stratify=df[target])
+    return X_train
+
+def build_scoring_service(model_paths, pipeline_path, X_reference, preprocessor_paths=None):
+    """
+    ScoringService dai file salvati (ModelPersistence / save_preprocessing_pipeline)
+
+    Args:
+        model_paths: Dizionario nome -> file del modello
+        pipeline_path: File della pipeline di preprocessing
+        X_reference: Dati di fit della pipeline (load_reference_frame)
+        preprocessor_paths: Dizionario nome -> file del DataPreprocessor (opzionale)
+    """
+    from src.models.model_trainer import ModelPersistence
+    from src.models.scoring_service import ScoringService
+    from src.utils.ml_preprocessing import load_preprocessing_pipeline
+
+    models = {name: ModelPersistence.load_model(path) for name, path in model_paths.items()}
+    preprocessors = {name: ModelPersistence.load_model(path) for name, path in (preprocessor_paths or {}).items()}
+    pipeline = load_preprocessing_pipeline(pipeline_path)
+    # Un solo core per worker: il parallelismo e' tra gli shard
+    return ScoringService(pipeline, models, X_reference, preprocessors=preprocessors, n_jobs=1)
+
+def build_bundle_scoring_service(bundle_path, model_names=None):
+    """
+    ScoringService da un bundle (save_model_bundle)
+
+    Il bundle e' caricato con memory mapping: gli array dei modelli sono
+    condivisi tra i processi worker invece di essere copiati in ognuno.
+    """
+    from src.models.model_bundle import load_model_bundle, create_scoring_service
+
+    return create_scoring_service(load_model_bundle(bundle_path), model_names, n_jobs=1)
+
+# ----------------5. Scoring Parallelo a Shard
+def _score_shard(shard_id, path, header, start, end, artifacts, output_path, output_format, chunksize):
+    """Worker: carica i modelli e scrive le predizioni di un intervallo di righe"""
+    setup_start = time.perf_counter()
+    if 'bundle_path' in artifacts:
+        service = build_bundle_scoring_service(**artifacts)
+    else:
+        service = build_scoring_service(**artifacts)
+    setup_seconds = time.perf_counter() - setup_start
+
+    reader = io.BufferedReader(_ByteRangeReader(path, start, end, header), buffer_size=1 << 20)
+    try:
+        report = score_chunks(pd.read_csv(reader, chunksize=chunksize), service,
+                              output_path=output_path, output_format=output_format, preview_rows=0)
+    finally:
+        reader.close()
+
+    report.pop('preview')
+    report.update({'shard': shard_id, 'pid': os.getpid(), 'setup_seconds': setup_seconds,
+                   'start_byte': start, 'end_byte': end})
+    return report
+
+def _worker_throughput(shards):
+    """Righe/s per processo worker (righe totali / tempo di scoring)"""
+    workers = {}
+    for shard in shards:
+        worker = workers.setdefault(shard['pid'], {'pid': shard['pid'], 'shards': 0, 'rows': 0, 'seconds': 0.0})
+        worker['shards'] += 1
+        worker['rows'] += shard['rows']
+        worker['seconds'] += shard['seconds']
+    for worker in workers.values():
+        worker['rows_per_second'] = worker['rows'] / worker['seconds'] if worker['seconds'] > 0 else 0.0
+    return sorted(workers.values(), key=lambda w: w['pid'])
+
+def score_csv_sharded(source, output_dir, artifacts, workers=None, shards=None, output_format=None,
+                      chunksize=None, overwrite=False, progress_callback=None):
+    """
+    Predizioni su un CSV con un pool di processi, uno shard di righe per task
+
+    Il file viene diviso in intervalli di righe (plan_csv_shards); ogni
+    worker carica modelli e pipeline, valuta il proprio intervallo a chunk
+    (score_chunks) e scrive una partizione part-NNNNN in output_dir. In
+    output_dir viene scritto anche il riepilogo JSON del throughput.
+
+    Args:
+        source: Percorso del CSV di input
+        output_dir: Directory delle partizioni di output
+        artifacts: Argomenti di build_bundle_scoring_service (bundle_path,
+            model_names) o di build_scoring_service (model_paths,
+            pipeline_path, X_reference, preprocessor_paths)
+        workers: Processi (default SHARDED_SCORING_CONFIG / tutti i core)
+        shards: Numero di shard (default workers * shards_per_worker)
+        output_format: 'parquet' o 'csv'
+        chunksize: Righe per chunk in ogni worker
+        overwrite: Sostituisce partizioni esistenti in output_dir
+        progress_callback: Callback (progresso 0-1, righe)
+
+    Returns:
+        Riepilogo con rows, seconds, rows_per_second, workers (righe/s per
+        processo), shards (report per partizione) e summary_path
+    """
+    from joblib import Parallel, delayed
+
+    config = SHARDED_SCORING_CONFIG
+    output_format = output_format or BATCH_SCORING_CONFIG['output_format']
+    if output_format not in ('csv', 'parquet'):
+        raise ValueError(f"Formato di output non supportato: {output_format}")
+    chunksize = chunksize or BATCH_SCORING_CONFIG['chunksize']
+    workers = workers or config['workers'] or os.cpu_count() or 1
+    shards = shards or workers * config['shards_per_worker']
+
+    os.makedirs(output_dir, exist_ok=True)
+    existing = [name for name in os.listdir(output_dir) if name.startswith('part-')]
+    if existing and not overwrite:
+        raise FileExistsError(f"{output_dir} contiene gia' {len(existing)} partizioni (usare overwrite)")
+    for name in existing:
+        os.remove(os.path.join(output_dir, name))
+
+    header, ranges = plan_csv_shards(source, shards)
+    workers = max(1, min(workers, len(ranges)))
+    tasks = [
+        delayed(_score_shard)(shard_id, source, header, start, end, artifacts,
+                              os.path.join(output_dir, f"part-{shard_id:05d}.{output_format}"),
+                              output_format, chunksize)
+        for shard_id, (start, end) in enumerate(ranges)
+    ]
+
+    start_time = time.perf_counter()
+    if workers == 1:
+        results = (function(*args, **kwargs) for function, args, kwargs in tasks)
+    else:
+        results = Parallel(n_jobs=workers, backend=config['backend'], return_as='generator_unordered')(tasks)
+
+    reports, rows = [], 0
+    for report in results:
+        reports.append(report)
+        rows += report['rows']
+        if progress_callback:
+            progress_callback(len(reports) / len(tasks), rows)
+    seconds = time.perf_counter() - start_time
+
+    reports.sort(key=lambda report: report['shard'])
+    summary = {
+        'input_path': os.path.abspath(source),
+        'output_dir': os.path.abspath(output_dir),
+        'output_format': output_format,
+        'rows': rows,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds > 0 else 0.0,
+        'survival_rate': sum((report['survival_rate'] or 0.0) * report['rows'] for report in reports) / rows if rows else None,
+        'n_workers': workers,
+        'workers': _worker_throughput(reports),
+        'shards': reports
+    }
+    summary['summary_path'] = os.path.join(output_dir, config['summary_file'])
+    with open(summary['summary_path'], 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, default=str)
+
+    emit('info', f"Predizioni a shard: {rows:,} righe in {seconds:.1f}s "
+         f"({summary['rows_per_second']:,.0f} righe/s, {workers} processi, {len(reports)} shard)",
+         source='score_csv_sharded', rows=rows, n_workers=workers, n_shards=len(reports))
+    return summary
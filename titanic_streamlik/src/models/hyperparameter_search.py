@@ -0,0 +1,301 @@
+"""
+src/models/hyperparameter_search.py
+Strategie di ricerca degli iperparametri (grid, random, halving, bayesiana)
+con budget di tempo ed early stopping
+"""
+
+import time
+import numpy as np
+from src.config import HYPERPARAMETER_SEARCH_CONFIG
+
+SEARCH_STRATEGIES = ('grid', 'random', 'halving_grid', 'halving_random', 'bayesian')
+HALVING_STRATEGIES = ('halving_grid', 'halving_random')
+
+# ----------------1. Candidati
+def count_candidates(param_grid):
+    """Numero di combinazioni della griglia (dizionario o lista di dizionari)"""
+    grids = param_grid if isinstance(param_grid, list) else [param_grid]
+    return sum(int(np.prod([len(values) for values in grid.values()])) for grid in grids)
+
+def resolve_search_strategy(strategy, param_grid):
+    """
+    Risolve la strategia effettiva
+
+    'auto' usa la griglia completa fino a grid_max_candidates combinazioni
+    e la successive halving randomizzata sopra.
+    """
+    strategy = strategy or HYPERPARAMETER_SEARCH_CONFIG['strategy']
+    if strategy == 'auto':
+        if count_candidates(param_grid) <= HYPERPARAMETER_SEARCH_CONFIG['grid_max_candidates']:
+            return 'grid'
+        return 'halving_random'
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(f"Strategia di ricerca non supportata: {strategy}")
+    return strategy
+
+def _candidate_pool(param_grid, rng):
+    """Tutte le combinazioni (campionate se oltre max_pool)"""
+    from sklearn.model_selection import ParameterGrid
+
+    grid = ParameterGrid(param_grid)
+    max_pool = HYPERPARAMETER_SEARCH_CONFIG['max_pool']
+    if len(grid) <= max_pool:
+        return list(grid)
+    return [grid[int(i)] for i in rng.choice(len(grid), size=max_pool, replace=False)]
+
+def _encode_candidates(candidates, param_grid):
+    """Codifica ordinale dei parametri (posizione del valore nella griglia)"""
+    grids = param_grid if isinstance(param_grid, list) else [param_grid]
+    names = sorted({name for grid in grids for name in grid})
+    positions = {}
+    for grid in grids:
+        for name, values in grid.items():
+            for position, value in enumerate(values):
+                positions.setdefault((name, repr(value)), position)
+
+    return np.array([
+        [positions.get((name, repr(params[name])), -1) if name in params else -1 for name in names]
+        for params in candidates
+    ], dtype='float64')
+
+# ----------------2. Valutazione di un Candidato
+def evaluate_candidate(estimator, params, folds, scorer):
+    """
+    Cross validation di una combinazione su fold gia' preprocessati
+
+    Combinazioni non valide (es. penalty 'l1' con solver 'lbfgs') ottengono
+    score NaN come in GridSearchCV con error_score=np.nan, con il messaggio
+    in 'error'.
+
+    Returns:
+        Dizionario con params, mean_score, std_score, fit_time (ed error
+        se la valutazione e' fallita)
+    """
+    from sklearn.base import clone
+
+    start = time.perf_counter()
+    try:
+        scores = [
+            scorer(clone(estimator).set_params(**params).fit(X_train, y_train), X_val, y_val)
+            for X_train, y_train, X_val, y_val in folds
+        ]
+        mean_score, std_score = float(np.mean(scores)), float(np.std(scores))
+    except Exception as e:
+        mean_score, std_score = np.nan, np.nan
+        error = f"{type(e).__name__}: {e}"
+    else:
+        error = None
+
+    result = {
+        'params': params,
+        'mean_score': mean_score,
+        'std_score': std_score,
+        'fit_time': time.perf_counter() - start
+    }
+    if error is not None:
+        result['error'] = error
+    return result
+
+# ----------------3. Ricerca con Budget (grid, random, bayesiana)
+class BudgetedSearch:
+    """
+    Ricerca iperparametri con budget di tempo ed early stopping
+
+    I candidati vengono valutati a lotti (un lotto = n_jobs candidati in
+    parallelo); tra un lotto e l'altro si controllano il budget di tempo e
+    l'early stopping, quindi il tempo massimo puo' essere superato al piu'
+    della durata di un lotto.
+
+    - grid: tutte le combinazioni nell'ordine della griglia
+    - random: n_iter combinazioni campionate senza ripetizioni
+    - bayesian: dopo alcuni punti casuali, un surrogato (ExtraTrees sulle
+      combinazioni gia' valutate) propone i candidati con media + kappa *
+      deviazione standard piu' alta
+
+    Con un trial_store (e trial_key = (contesto, impronta dati)) ogni lotto
+    valutato viene salvato subito; rieseguendo la stessa ricerca i candidati
+    gia' presenti non vengono ricalcolati, quindi una ricerca interrotta
+    riprende dal punto in cui si era fermata. I candidati falliti (errore,
+    memoria esaurita, bug corretto in seguito) non vengono salvati e sono
+    rivalutati alla ripresa.
+    """
+
+    def __init__(self, estimator, param_grid, strategy='random', scoring='accuracy',
+                 n_iter=None, time_budget=None, early_stopping_rounds=None,
+                 min_improvement=None, n_jobs=None, random_state=None,
+                 trial_store=None, trial_key=None):
+        if strategy not in ('grid', 'random', 'bayesian'):
+            raise ValueError(f"Strategia non gestita da BudgetedSearch: {strategy}")
+
+        config = HYPERPARAMETER_SEARCH_CONFIG
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.strategy = strategy
+        self.scoring = scoring
+        self.n_iter = n_iter if n_iter is not None else config['n_iter']
+        self.time_budget = time_budget if time_budget is not None else config['time_budget']
+        # La griglia resta esaustiva salvo early stopping esplicito
+        if early_stopping_rounds is None and strategy != 'grid':
+            early_stopping_rounds = config['early_stopping_rounds']
+        self.early_stopping_rounds = early_stopping_rounds
+        self.min_improvement = min_improvement if min_improvement is not None else config['min_improvement']
+        self.n_jobs = n_jobs
+        self.random_state = random_state if random_state is not None else config['random_state']
+        self.trial_store = trial_store if trial_key is not None else None
+        self.trial_key = trial_key
+
+    def fit(self, folds):
+        """
+        Esegue la ricerca
+
+        Args:
+            folds: Lista di tuple (X_train, y_train, X_val, y_val) preprocessate
+
+        Returns:
+            self (best_params_, best_score_, cv_results_, stopped_reason_,
+            elapsed_, n_reused_)
+        """
+        from joblib import Parallel, delayed, effective_n_jobs
+        from sklearn.metrics import get_scorer
+        from src.models.trial_store import param_hash
+
+        rng = np.random.default_rng(self.random_state)
+        scorer = get_scorer(self.scoring)
+        pool = _candidate_pool(self.param_grid, rng)
+        if self.strategy != 'grid':
+            pool = [pool[int(i)] for i in rng.permutation(len(pool))]
+        max_candidates = len(pool) if self.strategy == 'grid' else min(self.n_iter, len(pool))
+
+        n_jobs = effective_n_jobs(self.n_jobs)
+        parallel = Parallel(n_jobs=n_jobs) if n_jobs > 1 else None
+
+        stored = self.trial_store.load_trials(*self.trial_key) if self.trial_store else {}
+        self.n_reused_ = 0
+
+        start = time.perf_counter()
+        self.results_ = []
+        remaining = list(range(len(pool)))
+        best_score, rounds_without_improvement = -np.inf, 0
+        self.stopped_reason_ = 'completed'
+
+        while remaining and len(self.results_) < max_candidates:
+            if self.time_budget is not None and time.perf_counter() - start >= self.time_budget:
+                self.stopped_reason_ = 'time_budget'
+                break
+
+            batch_size = min(n_jobs, max_candidates - len(self.results_), len(remaining))
+            batch = self._next_batch(pool, remaining, batch_size, rng)
+            batch_set = set(batch)
+            remaining = [i for i in remaining if i not in batch_set]
+
+            # Candidati gia' valutati in esecuzioni precedenti
+            hashes = {i: param_hash(pool[i]) for i in batch}
+            to_evaluate = [i for i in batch if hashes[i] not in stored]
+
+            if parallel is None:
+                evaluated = [evaluate_candidate(self.estimator, pool[i], folds, scorer) for i in to_evaluate]
+            else:
+                evaluated = parallel(delayed(evaluate_candidate)(self.estimator, pool[i], folds, scorer)
+                                     for i in to_evaluate)
+            succeeded = [result for result in evaluated if 'error' not in result]
+            if self.trial_store and succeeded:
+                self.trial_store.save_trials(*self.trial_key, succeeded)
+
+            evaluated = dict(zip(to_evaluate, evaluated))
+            batch_results = []
+            for i in batch:
+                if i in evaluated:
+                    batch_results.append(evaluated[i])
+                else:
+                    batch_results.append(dict(stored[hashes[i]], params=pool[i], reused=True))
+                    self.n_reused_ += 1
+
+            for index, result in zip(batch, batch_results):
+                result['candidate'] = index
+                self.results_.append(result)
+                score = result['mean_score']
+                if not np.isnan(score) and score > best_score + self.min_improvement:
+                    best_score, rounds_without_improvement = score, 0
+                else:
+                    rounds_without_improvement += 1
+
+            if self.early_stopping_rounds and rounds_without_improvement >= self.early_stopping_rounds:
+                self.stopped_reason_ = 'early_stopping'
+                break
+
+        self.elapsed_ = time.perf_counter() - start
+        self._pool = pool
+        self._set_best()
+        return self
+
+    def _next_batch(self, pool, remaining, batch_size, rng):
+        """Indici dei prossimi candidati da valutare"""
+        n_initial = max(HYPERPARAMETER_SEARCH_CONFIG['bayesian_initial_points'], batch_size)
+        valid = [result for result in getattr(self, 'results_', []) if not np.isnan(result['mean_score'])]
+        if self.strategy != 'bayesian' or len(valid) < n_initial:
+            return remaining[:batch_size]
+
+        from sklearn.ensemble import ExtraTreesRegressor
+
+        X_seen = _encode_candidates([result['params'] for result in valid], self.param_grid)
+        y_seen = np.array([result['mean_score'] for result in valid])
+        surrogate = ExtraTreesRegressor(n_estimators=50, min_samples_leaf=2,
+                                        random_state=int(rng.integers(2 ** 31 - 1)))
+        surrogate.fit(X_seen, y_seen)
+
+        X_remaining = _encode_candidates([pool[i] for i in remaining], self.param_grid)
+        per_tree = np.stack([tree.predict(X_remaining) for tree in surrogate.estimators_])
+        acquisition = per_tree.mean(axis=0) + HYPERPARAMETER_SEARCH_CONFIG['bayesian_kappa'] * per_tree.std(axis=0)
+
+        best = np.argsort(-acquisition, kind='stable')[:batch_size]
+        return [remaining[i] for i in best]
+
+    def _set_best(self):
+        scores = np.array([result['mean_score'] for result in self.results_], dtype='float64')
+        if len(scores) == 0 or np.all(np.isnan(scores)):
+            raise ValueError("Nessuna combinazione di iperparametri valutata con successo")
+
+        best = int(np.nanargmax(scores))
+        self.best_params_ = self.results_[best]['params']
+        self.best_score_ = self.results_[best]['mean_score']
+
+        ranks = np.full(len(scores), len(scores), dtype=int)
+        order = np.argsort(-np.nan_to_num(scores, nan=-np.inf), kind='stable')
+        ranks[order] = np.arange(1, len(scores) + 1)
+
+        # Stesso formato (ridotto) di GridSearchCV.cv_results_
+        self.cv_results_ = {
+            'params': [result['params'] for result in self.results_],
+            'mean_test_score': scores,
+            'std_test_score': np.array([result['std_score'] for result in self.results_]),
+            'mean_fit_time': np.array([result['fit_time'] for result in self.results_]),
+            'rank_test_score': ranks
+        }
+
+# ----------------4. Successive Halving (sklearn)
+def create_halving_search(estimator, param_grid, strategy, cv, scoring='accuracy',
+                          n_jobs=None, random_state=None, n_iter=None):
+    """
+    HalvingGridSearchCV / HalvingRandomSearchCV configurati da HYPERPARAMETER_SEARCH_CONFIG
+
+    Il budget e' in numero di campioni: ogni iterazione tiene 1/factor dei
+    candidati e moltiplica per factor i campioni usati. Il budget di tempo
+    non interrompe questa strategia.
+    """
+    from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+    from sklearn.model_selection import HalvingGridSearchCV, HalvingRandomSearchCV
+
+    common = {
+        'factor': HYPERPARAMETER_SEARCH_CONFIG['halving_factor'],
+        'cv': cv,
+        'scoring': scoring,
+        'n_jobs': n_jobs,
+        'random_state': random_state,
+        'error_score': np.nan
+    }
+    if strategy == 'halving_grid':
+        return HalvingGridSearchCV(estimator, param_grid, **common)
+    if strategy == 'halving_random':
+        n_candidates = min(count_candidates(param_grid), n_iter) if n_iter else 'exhaust'
+        return HalvingRandomSearchCV(estimator, param_grid, n_candidates=n_candidates, **common)
+    raise ValueError(f"Strategia halving non supportata: {strategy}")
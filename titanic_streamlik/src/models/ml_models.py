@@ -3,16 +3,13 @@ src/models/ml_models.py
 Definizioni e configurazioni dei modelli Machine Learning
 """
 
+import math
+import time
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.svm import SVC
-from sklearn.tree import DecisionTreeClassifier
-from sklearn.naive_bayes import GaussianNB
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.ensemble import ExtraTreesClassifier, AdaBoostClassifier
-from sklearn.neural_network import MLPClassifier
-from src.config import ML_MODELS
+from src.config import ML_MODELS, WARM_START_CONFIG, ENSEMBLE_CONFIG
+
+# Gli stimatori sklearn sono importati nel costruttore di ogni modello:
+# caricare questo modulo non importa ensemble, SVM e reti neurali.
 
 # ----------------1. Base Model Class
 
@@ -20,6 +17,9 @@ class TitanicModel:
     """
     Classe base per tutti i modelli Titanic
     """
+    # Modelli a ensemble che possono aggiungere stimatori con warm_start
+    supports_warm_start = False
+    
     def __init__(self, model_type, **kwargs):
         self.model_type = model_type
         self.model = None
@@ -37,6 +37,52 @@ class TitanicModel:
             'is_trained': self.is_trained,
             'hyperparameters': self.hyperparameters
         }
+    
+    def continue_training(self, X, y, n_additional_estimators=None):
+        """
+        Aggiunge stimatori a un modello gia' addestrato (warm_start)
+        
+        Random Forest / Extra Trees addestrano solo i nuovi alberi su X, y
+        (gli alberi esistenti restano invariati); Gradient Boosting continua
+        il boosting partendo dalle predizioni dell'ensemble attuale su X.
+        
+        Args:
+            X: Features preprocessate (stesse colonne del training originale)
+            y: Target
+            n_additional_estimators: Stimatori da aggiungere (default da
+                WARM_START_CONFIG: growth_ratio degli stimatori attuali)
+        
+        Returns:
+            Dizionario con stimatori prima/dopo, aggiunti e tempo di fit
+        """
+        if not self.supports_warm_start:
+            raise ValueError(f"Il modello {self.model_type} non supporta il warm start")
+        if not self.is_trained:
+            raise ValueError("Il warm start richiede un modello gia' addestrato")
+        if self.feature_names is not None and list(X.columns) != list(self.feature_names):
+            raise ValueError("Le features non coincidono con quelle del training originale")
+        
+        n_before = self.model.n_estimators
+        if n_additional_estimators is None:
+            n_additional_estimators = max(WARM_START_CONFIG['min_additional_estimators'],
+                                          math.ceil(n_before * WARM_START_CONFIG['growth_ratio']))
+        
+        start = time.perf_counter()
+        self.model.set_params(warm_start=True, n_estimators=n_before + n_additional_estimators)
+        try:
+            self.model.fit(X, y)
+        finally:
+            # Un fit successivo torna ad addestrare da zero
+            self.model.set_params(warm_start=False)
+        fit_time = time.perf_counter() - start
+        
+        self.hyperparameters['n_estimators'] = self.model.n_estimators
+        return {
+            'n_estimators_before': n_before,
+            'n_estimators_after': self.model.n_estimators,
+            'n_estimators_added': n_additional_estimators,
+            'fit_time': fit_time
+        }
 
 # ----------------2. Model Factory
 
@@ -117,6 +163,7 @@ class LogisticRegressionModel(TitanicModel):
     def __init__(self, **kwargs):
         super().__init__('LogisticRegression', **kwargs)
         self.requires_scaling = True
+        from sklearn.linear_model import LogisticRegression
         self.model = LogisticRegression(**kwargs)
     
     def get_feature_importance(self):
@@ -130,10 +177,12 @@ class LogisticRegressionModel(TitanicModel):
 
 class RandomForestModel(TitanicModel):
     """Modello Random Forest"""
+    supports_warm_start = True
     
     def __init__(self, **kwargs):
         super().__init__('RandomForestClassifier', **kwargs)
         self.requires_scaling = False
+        from sklearn.ensemble import RandomForestClassifier
         self.model = RandomForestClassifier(**kwargs)
     
     def get_feature_importance(self):
@@ -159,10 +208,12 @@ class RandomForestModel(TitanicModel):
 
 class GradientBoostingModel(TitanicModel):
     """Modello Gradient Boosting"""
+    supports_warm_start = True
     
     def __init__(self, **kwargs):
         super().__init__('GradientBoostingClassifier', **kwargs)
         self.requires_scaling = False
+        from sklearn.ensemble import GradientBoostingClassifier
         self.model = GradientBoostingClassifier(**kwargs)
     
     def get_feature_importance(self):
@@ -188,6 +239,7 @@ class SVMModel(TitanicModel):
         self.requires_scaling = True
         # Assicurati che probability=True per ROC
         kwargs['probability'] = kwargs.get('probability', True)
+        from sklearn.svm import SVC
         self.model = SVC(**kwargs)
     
     def get_support_vectors_info(self):
@@ -207,6 +259,7 @@ class DecisionTreeModel(TitanicModel):
     def __init__(self, **kwargs):
         super().__init__('DecisionTreeClassifier', **kwargs)
         self.requires_scaling = False
+        from sklearn.tree import DecisionTreeClassifier
         self.model = DecisionTreeClassifier(**kwargs)
     
     def get_feature_importance(self):
@@ -235,6 +288,7 @@ class NaiveBayesModel(TitanicModel):
     def __init__(self, **kwargs):
         super().__init__('GaussianNB', **kwargs)
         self.requires_scaling = False
+        from sklearn.naive_bayes import GaussianNB
         self.model = GaussianNB(**kwargs)
 
 class KNNModel(TitanicModel):
@@ -246,16 +300,19 @@ class KNNModel(TitanicModel):
         # Default parameters
         kwargs.setdefault('n_neighbors', 5)
         kwargs.setdefault('weights', 'uniform')
+        from sklearn.neighbors import KNeighborsClassifier
         self.model = KNeighborsClassifier(**kwargs)
 
 class ExtraTreesModel(TitanicModel):
     """Modello Extra Trees"""
+    supports_warm_start = True
     
     def __init__(self, **kwargs):
         super().__init__('ExtraTreesClassifier', **kwargs)
         self.requires_scaling = False
         kwargs.setdefault('n_estimators', 100)
         kwargs.setdefault('random_state', 42)
+        from sklearn.ensemble import ExtraTreesClassifier
         self.model = ExtraTreesClassifier(**kwargs)
     
     def get_feature_importance(self):
@@ -274,6 +331,7 @@ class AdaBoostModel(TitanicModel):
         self.requires_scaling = False
         kwargs.setdefault('n_estimators', 50)
         kwargs.setdefault('random_state', 42)
+        from sklearn.ensemble import AdaBoostClassifier
         self.model = AdaBoostClassifier(**kwargs)
     
     def get_feature_importance(self):
@@ -293,6 +351,7 @@ class MLPModel(TitanicModel):
         kwargs.setdefault('hidden_layer_sizes', (100,))
         kwargs.setdefault('max_iter', 1000)
         kwargs.setdefault('random_state', 42)
+        from sklearn.neural_network import MLPClassifier
         self.model = MLPClassifier(**kwargs)
 
 # ----------------4. Model Configurations
@@ -369,10 +428,18 @@ class HyperparameterGrids:
         'criterion': ['gini', 'entropy']
     }
     
+    GRID_NAMES = {
+        'LogisticRegression': 'LOGISTIC_REGRESSION',
+        'RandomForestClassifier': 'RANDOM_FOREST',
+        'GradientBoostingClassifier': 'GRADIENT_BOOSTING',
+        'SVC': 'SVM',
+        'DecisionTreeClassifier': 'DECISION_TREE'
+    }
+    
     @classmethod
     def get_grid(cls, model_type):
         """Restituisce griglia per tipo di modello"""
-        grid_name = model_type.upper().replace('CLASSIFIER', '')
+        grid_name = cls.GRID_NAMES.get(model_type, model_type.upper())
         return getattr(cls, grid_name, {})
 
 # ----------------6. Model Utilities
@@ -423,47 +490,135 @@ def get_model_training_time_estimate(model_type, n_samples, n_features):
 class ModelEnsemble:
     """
     Classe per gestire ensemble di modelli
+    
+    Ogni membro viene valutato una sola volta in una matrice preallocata
+    (n_samples x n_models, float32): la colonna contiene la probabilita'
+    della classe positiva, oppure l'etichetta predetta per i modelli senza
+    predict_proba. Accanto, una matrice int8 con l'etichetta di predict di
+    ogni membro. Voto a maggioranza, soft e pesato sono derivati da queste
+    due matrici.
     """
     
-    def __init__(self, models):
+    VOTING_METHODS = ('hard', 'soft', 'weighted')
+    
+    def __init__(self, models, n_jobs=None):
+        """
+        Args:
+            models: Dizionario nome -> TitanicModel
+            n_jobs: Thread per valutare i membri in parallelo (None = da
+                ENSEMBLE_CONFIG); i predict sklearn rilasciano in gran parte il GIL
+        """
         self.models = models
         self.weights = None
+        self.n_jobs = n_jobs if n_jobs is not None else ENSEMBLE_CONFIG['n_jobs']
         
     def set_weights(self, weights):
-        """Imposta pesi per voting pesato"""
+        """Imposta pesi per voting pesato (uno per membro con predict_proba)"""
         self.weights = weights
     
-    def predict_ensemble(self, X):
-        """Predizione ensemble"""
-        predictions = []
+    def score_members(self, X):
+        """
+        Valuta tutti i membri addestrati una sola volta
         
-        for model_name, model in self.models.items():
-            if model.is_trained:
-                pred = model.model.predict(X)
-                predictions.append(pred)
+        Args:
+            X: Features preprocessate
         
-        if not predictions:
-            return None
+        Le etichette coincidono con model.predict: per i modelli
+        probabilistici sono la classe piu' probabile (soglia 0.5 sulla
+        probabilita' in float64), tranne per SVC/NuSVC con probability=True,
+        dove predict usa la decision function e la probabilita' (Platt
+        scaling) puo' stare dall'altra parte della soglia: per questi viene
+        chiamato anche predict.
         
-        # Voting majority
-        ensemble_pred = np.round(np.mean(predictions, axis=0))
-        return ensemble_pred
+        Returns:
+            Tupla (matrice n_samples x n_models float32, nomi dei membri,
+            maschera dei membri con probabilita', matrice delle etichette int8)
+        """
+        members = [(name, model) for name, model in self.models.items() if model.is_trained]
+        scores = np.empty((len(X), len(members)), dtype=np.float32)
+        labels = np.empty((len(X), len(members)), dtype=np.int8)
+        has_proba = np.array([hasattr(model.model, 'predict_proba') for _, model in members], dtype=bool)
+        
+        def score_column(column):
+            estimator = members[column][1].model
+            if has_proba[column]:
+                probabilities = estimator.predict_proba(X)[:, 1]
+                scores[:, column] = probabilities
+                if getattr(estimator, 'probability', False):
+                    labels[:, column] = estimator.predict(X)
+                else:
+                    labels[:, column] = probabilities > 0.5
+            else:
+                scores[:, column] = estimator.predict(X)
+                labels[:, column] = scores[:, column]
+        
+        if self.n_jobs == 1 or len(members) < 2:
+            for column in range(len(members)):
+                score_column(column)
+        else:
+            from joblib import Parallel, delayed
+            # Ogni thread scrive solo nella propria colonna
+            Parallel(n_jobs=self.n_jobs, prefer='threads')(
+                delayed(score_column)(column) for column in range(len(members))
+            )
+        
+        return scores, [name for name, _ in members], has_proba, labels
     
-    def predict_proba_ensemble(self, X):
-        """Probabilità ensemble"""
-        probabilities = []
+    def vote(self, scores, has_proba, method='hard', labels=None):
+        """
+        Combina le matrici di score_members
         
-        for model_name, model in self.models.items():
-            if model.is_trained and hasattr(model.model, 'predict_proba'):
-                proba = model.model.predict_proba(X)[:, 1]
-                probabilities.append(proba)
+        Args:
+            scores: Matrice n_samples x n_models
+            has_proba: Maschera dei membri con probabilita'
+            method: 'hard' (maggioranza delle etichette, pareggi a 0),
+                'soft' (media delle probabilita') o 'weighted' (media pesata
+                con set_weights; senza pesi equivale a 'soft')
+            labels: Etichette di predict di score_members; senza, per i
+                membri probabilistici si usa la soglia 0.5 sulla probabilita'
+                (puo' differire da predict per SVC con probability=True)
         
-        if not probabilities:
-            return None
+        Returns:
+            Etichette (hard) o probabilita' della classe positiva; None se
+            non ci sono membri utilizzabili
+        """
+        if method not in self.VOTING_METHODS:
+            raise ValueError(f"Metodo di voto non supportato: {method}")
         
-        if self.weights:
-            weighted_proba = np.average(probabilities, axis=0, weights=self.weights)
-        else:
-            weighted_proba = np.mean(probabilities, axis=0)
+        if method == 'hard':
+            if scores.shape[1] == 0:
+                return None
+            if labels is None:
+                # Etichetta dei modelli probabilistici = classe piu' probabile
+                labels = np.where(has_proba, scores > 0.5, scores)
+            return (labels.mean(axis=1) > 0.5).astype(np.float64)
+        
+        probabilities = scores[:, has_proba]
+        if probabilities.shape[1] == 0:
+            return None
+        if method == 'weighted' and self.weights:
+            weights = np.asarray(self.weights, dtype=np.float32)
+            return probabilities @ (weights / weights.sum())
+        return probabilities.mean(axis=1)
+    
+    def predict_all(self, X):
+        """
+        Tutti i voti con una sola valutazione dei membri
         
-        return weighted_proba
\ No newline at end of file
+        Returns:
+            Dizionario con 'hard', 'soft', 'weighted', 'scores', 'labels' e 'members'
+        """
+        scores, names, has_proba, labels = self.score_members(X)
+        results = {method: self.vote(scores, has_proba, method, labels) for method in self.VOTING_METHODS}
+        results.update({'scores': scores, 'labels': labels, 'members': names})
+        return results
+    
+    def predict_ensemble(self, X):
+        """Predizione ensemble (voting majority)"""
+        scores, _, has_proba, labels = self.score_members(X)
+        return self.vote(scores, has_proba, 'hard', labels)
+    
+    def predict_proba_ensemble(self, X):
+        """Probabilità ensemble (pesata se sono impostati i pesi)"""
+        scores, _, has_proba, _ = self.score_members(X)
+        return self.vote(scores, has_proba, 'weighted')
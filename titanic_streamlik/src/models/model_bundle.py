@@ -0,0 +1,252 @@
+"""
+src/models/model_bundle.py
+Bundle versionato dei modelli: un solo file joblib con la pipeline di
+preprocessing (una copia), tutti i modelli, i preprocessor, i nomi delle
+features, i dati di riferimento e i metadati
+"""
+
+import os
+import warnings
+from datetime import datetime
+
+from src.config import MODELS_DIR, MODEL_BUNDLE_CONFIG
+from src.utils.headless import emit
+
+# Incrementata a ogni modifica incompatibile della struttura del bundle
+BUNDLE_FORMAT_VERSION = 1
+
+_DEFAULT = object()
+
+# ----------------1. Salvataggio
+def _library_versions():
+    import joblib
+    import numpy
+    import pandas
+    import sklearn
+
+    return {'sklearn': sklearn.__version__, 'numpy': numpy.__version__,
+            'pandas': pandas.__version__, 'joblib': joblib.__version__}
+
+def save_model_bundle(models, pipeline, preprocessors=None, X_reference=None, metadata=None,
+                      bundle_name=None, save_dir=None, compress=None, metrics=None, cv_scores=None,
+                      data_fingerprint=None):
+    """
+    Salva modelli e pipeline in un unico bundle versionato
+
+    Senza compressione gli array NumPy (coefficienti, pesi, statistiche,
+    dati di riferimento) sono scritti in chiaro nel file e al caricamento
+    vengono mappati in memoria: piu' processi che servono lo stesso bundle
+    condividono le stesse pagine. Con compress > 0 il file e' piu' piccolo
+    ma viene sempre caricato per intero.
+
+    Args:
+        models: Dizionario nome -> TitanicModel (o stimatore sklearn)
+        pipeline: Pipeline di preprocessing fittata (salvata una volta)
+        preprocessors: Dizionario nome -> DataPreprocessor (opzionale)
+        X_reference: Dati di fit della pipeline (per ScoringService)
+        metadata: Metadati liberi (es. metriche di valutazione)
+        bundle_name: Prefisso del file (default MODEL_BUNDLE_CONFIG['name'])
+        save_dir: Directory di salvataggio (default MODELS_DIR)
+        compress: Livello o (metodo, livello) di joblib.dump
+        metrics: Dizionario nome -> metriche di valutazione (registro)
+        cv_scores: Dizionario nome -> risultato di cross validation (registro)
+        data_fingerprint: Impronta dei dati di training (registro)
+
+    Returns:
+        Path del file salvato
+    """
+    import joblib
+
+    config = MODEL_BUNDLE_CONFIG
+    save_dir = save_dir or MODELS_DIR
+    compress = config['compress'] if compress is None else compress
+    os.makedirs(save_dir, exist_ok=True)
+
+    created_at = datetime.now()
+    filepath = os.path.join(save_dir, f"{bundle_name or config['name']}_{created_at:%Y%m%d_%H%M%S}.joblib")
+    bundle = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'created_at': created_at.isoformat(timespec='seconds'),
+        'library_versions': _library_versions(),
+        'pipeline': pipeline,
+        'models': dict(models),
+        'preprocessors': dict(preprocessors or {}),
+        'feature_names': {name: getattr(model, 'feature_names', None) for name, model in models.items()},
+        'X_reference': X_reference,
+        'metadata': dict(metadata or {})
+    }
+
+    # Scrittura su file temporaneo: un bundle incompleto non e' mai visibile
+    tmp_path = f"{filepath}.tmp"
+    try:
+        joblib.dump(bundle, tmp_path, compress=compress)
+        os.replace(tmp_path, filepath)
+    except Exception as e:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise Exception(f"Errore nel salvataggio del bundle: {str(e)}")
+
+    from src.models.model_registry import register_artifact
+    register_artifact(save_dir, lambda registry: registry.register_bundle(
+        filepath, bundle, metrics=metrics, cv_scores=cv_scores, data_fingerprint=data_fingerprint
+    ))
+
+    emit('info', f"Bundle salvato: {len(bundle['models'])} modelli in {filepath} "
+         f"({os.path.getsize(filepath) / 1024 ** 2:.1f} MB)",
+         source='save_model_bundle', n_models=len(bundle['models']), compress=str(compress))
+    return filepath
+
+# ----------------2. Caricamento
+def _writable_libsvm_arrays(estimator):
+    """
+    Copie scrivibili degli array degli stimatori libsvm (SVC, NuSVC, ...)
+
+    libsvm richiede buffer scrivibili anche in predict/predict_proba: con
+    gli array mappati in sola lettura lo scoring fallisce. Solo questi
+    stimatori (anche dentro ensemble come AdaBoost) perdono la condivisione
+    delle pagine; gli altri restano mappati.
+
+    Returns:
+        Numero di stimatori libsvm convertiti
+    """
+    import numpy as np
+    from sklearn.svm._base import BaseLibSVM
+
+    estimator = getattr(estimator, 'model', estimator)
+    converted = 0
+    if isinstance(estimator, BaseLibSVM):
+        for attr, value in vars(estimator).items():
+            if isinstance(value, np.ndarray) and not value.flags.writeable:
+                setattr(estimator, attr, np.array(value))
+        converted += 1
+    members = getattr(estimator, 'estimators_', None)
+    if members is not None:
+        # Gradient Boosting: matrice di alberi
+        for member in np.ravel(np.asarray(members, dtype=object)):
+            converted += _writable_libsvm_arrays(member)
+    return converted
+
+def load_model_bundle(filepath, mmap_mode=_DEFAULT):
+    """
+    Carica un bundle salvato con save_model_bundle
+
+    Args:
+        filepath: Path del bundle
+        mmap_mode: Modalita' di memory mapping degli array (default
+            MODEL_BUNDLE_CONFIG['mmap_mode']; None per caricare copie
+            scrivibili, es. per continuare il training). Gli stimatori
+            libsvm ricevono comunque copie scrivibili
+
+    Returns:
+        Dizionario con pipeline, models, preprocessors, feature_names,
+        X_reference, metadata e versioni
+    """
+    import joblib
+
+    if mmap_mode is _DEFAULT:
+        mmap_mode = MODEL_BUNDLE_CONFIG['mmap_mode']
+
+    with warnings.catch_warnings():
+        # Bundle compressi: joblib ignora mmap_mode e carica tutto in memoria
+        warnings.filterwarnings('ignore', message='.*mmap_mode.*compressed', category=UserWarning)
+        bundle = joblib.load(filepath, mmap_mode=mmap_mode)
+
+    if not isinstance(bundle, dict) or 'format_version' not in bundle:
+        raise ValueError(f"{filepath} non e' un bundle di modelli")
+    if bundle['format_version'] > BUNDLE_FORMAT_VERSION:
+        raise ValueError(f"Bundle in formato {bundle['format_version']}, supportato fino a {BUNDLE_FORMAT_VERSION}")
+
+    current = _library_versions()
+    mismatched = {lib: (saved, current[lib]) for lib, saved in bundle['library_versions'].items()
+                  if lib in current and saved != current[lib]}
+    if mismatched:
+        emit('warning', "Bundle salvato con versioni diverse: " +
+             ", ".join(f"{lib} {saved} -> {now}" for lib, (saved, now) in mismatched.items()),
+             source='load_model_bundle', filepath=filepath)
+
+    if mmap_mode is not None:
+        for model in bundle['models'].values():
+            _writable_libsvm_arrays(model)
+
+    bundle['filepath'] = filepath
+    return bundle
+
+def list_model_bundles(save_dir=None, bundle_name=None):
+    """
+    Lista dei bundle salvati, dal piu' recente
+
+    Con il registro attivo la lista viene letta dal database, riallineato
+    prima alla directory (file aggiunti o cancellati a mano).
+
+    Args:
+        save_dir: Directory da esplorare (default MODELS_DIR)
+        bundle_name: Prefisso del bundle (default tutti)
+    """
+    from src.models.model_registry import get_model_registry
+
+    save_dir = save_dir or MODELS_DIR
+    if not os.path.exists(save_dir):
+        return []
+
+    registry = get_model_registry(save_dir)
+    if registry is not None:
+        registry.sync(save_dir, prune=True)
+        bundles = {}
+        for record in registry.find(kind='bundle'):
+            file = os.path.basename(record['path'])
+            if record['path'] in bundles or (bundle_name and not file.startswith(f"{bundle_name}_")):
+                continue
+            bundles[record['path']] = {
+                'filename': file,
+                'filepath': record['path'],
+                'size': record['size_bytes'],
+                'modified': datetime.fromtimestamp(record['created_at'])
+            }
+        return list(bundles.values())
+
+    bundles = []
+    for file in os.listdir(save_dir):
+        if not file.endswith('.joblib') or (bundle_name and not file.startswith(f"{bundle_name}_")):
+            continue
+        filepath = os.path.join(save_dir, file)
+        stat = os.stat(filepath)
+        bundles.append({
+            'filename': file,
+            'filepath': filepath,
+            'size': stat.st_size,
+            'modified': datetime.fromtimestamp(stat.st_mtime)
+        })
+    return sorted(bundles, key=lambda x: x['modified'], reverse=True)
+
+def load_latest_model_bundle(bundle_name=None, save_dir=None, mmap_mode=_DEFAULT):
+    """Bundle piu' recente con il prefisso indicato (None se non esiste)"""
+    bundles = list_model_bundles(save_dir, bundle_name or MODEL_BUNDLE_CONFIG['name'])
+    return load_model_bundle(bundles[0]['filepath'], mmap_mode) if bundles else None
+
+# ----------------3. Scoring dal Bundle
+def create_scoring_service(bundle, model_names=None, n_jobs=None):
+    """
+    ScoringService dai modelli di un bundle
+
+    Args:
+        bundle: Bundle caricato (load_model_bundle)
+        model_names: Modelli da servire (default tutti)
+        n_jobs: Thread per valutare i modelli (vedi ModelEnsemble)
+    """
+    from src.models.scoring_service import ScoringService
+
+    if bundle.get('X_reference') is None:
+        raise ValueError("Il bundle non contiene i dati di riferimento della pipeline")
+
+    names = list(model_names or bundle['models'])
+    missing = [name for name in names if name not in bundle['models']]
+    if missing:
+        raise ValueError(f"Modelli non presenti nel bundle: {', '.join(missing)}")
+
+    return ScoringService(
+        bundle['pipeline'],
+        {name: bundle['models'][name] for name in names},
+        bundle['X_reference'],
+        preprocessors={name: bundle['preprocessors'][name] for name in names if name in bundle['preprocessors']},
+        n_jobs=n_jobs
+    )
@@ -0,0 +1,452 @@
+"""
+src/models/model_registry.py
+Registro locale (SQLite) dei modelli salvati: metriche, punteggi di cross
+validation, impronta dei dati, schema delle features, dimensione e tempo
+di caricamento, interrogabile senza scansionare o caricare i file
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+from src.config import MODELS_DIR, MODEL_REGISTRY_CONFIG
+
+# Metriche con colonna propria (indicizzabili); le altre restano nel JSON metrics
+METRIC_COLUMNS = ('accuracy', 'precision', 'recall', 'f1', 'roc_auc', 'cv_mean', 'cv_std')
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS artifacts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    member TEXT NOT NULL DEFAULT '',
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    model_type TEXT,
+    schema_hash TEXT,
+    feature_names TEXT,
+    data_fingerprint TEXT,
+    {', '.join(f'{column} REAL' for column in METRIC_COLUMNS)},
+    metrics TEXT,
+    cv_scores TEXT,
+    metadata TEXT,
+    size_bytes INTEGER,
+    load_seconds REAL,
+    created_at REAL NOT NULL,
+    UNIQUE (path, member)
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_name ON artifacts (name, created_at);
+CREATE INDEX IF NOT EXISTS idx_artifacts_schema ON artifacts (schema_hash, f1);
+"""
+
+_JSON_COLUMNS = ('feature_names', 'metrics', 'cv_scores', 'metadata')
+
+# ----------------1. Chiavi e Conversioni
+def schema_hash(feature_names):
+    """Impronta dello schema delle features (nomi nell'ordine dello stimatore)"""
+    if feature_names is None:
+        return None
+    names = [str(name) for name in feature_names]
+    return hashlib.sha1(json.dumps(names).encode()).hexdigest()[:16]
+
+def model_feature_names(model):
+    """Nomi delle features di un TitanicModel o di uno stimatore sklearn"""
+    names = getattr(model, 'feature_names', None)
+    if names is None:
+        names = getattr(model, 'feature_names_in_', None)
+    return None if names is None else [str(name) for name in names]
+
+def _scalar_metrics(metrics):
+    """Solo le metriche numeriche scalari (i risultati di valutazione contengono anche array e dict)"""
+    scalars = {}
+    for key, value in (metrics or {}).items():
+        if isinstance(value, (bool, np.bool_)) or not isinstance(value, (int, float, np.integer, np.floating)):
+            continue
+        if not np.isnan(value):
+            scalars[key] = float(value)
+    return scalars
+
+def _cv_summary(cv_scores):
+    """Media, deviazione e punteggi per fold da un risultato di cross_validate_model"""
+    if cv_scores is None:
+        return None
+    if isinstance(cv_scores, dict):
+        scores = cv_scores.get('scores')
+        summary = {'mean': cv_scores.get('mean'), 'std': cv_scores.get('std')}
+    else:
+        scores, summary = cv_scores, {}
+    if scores is not None:
+        scores = [float(score) for score in np.asarray(scores, dtype=float)]
+        summary.setdefault('mean', float(np.mean(scores)))
+        summary.setdefault('std', float(np.std(scores)))
+        summary['scores'] = scores
+    return {key: float(value) if isinstance(value, (np.floating, np.integer)) else value
+            for key, value in summary.items()}
+
+def _to_json(value):
+    return None if value is None else json.dumps(value, sort_keys=True, default=repr)
+
+# ----------------2. Registro
+class ModelRegistry:
+    """
+    Indice SQLite degli artefatti salvati in una directory di modelli
+
+    Una riga per modello: file singoli di ModelPersistence (kind 'pickle')
+    o membri di un bundle (kind 'bundle', member = nome del modello nel
+    bundle). Le interrogazioni leggono solo il database; il file viene
+    aperto solo da load(). Ogni operazione apre una propria connessione
+    (come TrialStore), quindi il registro e' condivisibile tra processi.
+    """
+
+    def __init__(self, path=None, timeout=None, sync_dir=None):
+        """
+        Args:
+            path: File SQLite (default nella directory dei modelli)
+            timeout: Attesa massima sui lock in secondi
+            sync_dir: Directory indicizzata alla creazione del registro
+                (file gia' presenti prima del registro)
+        """
+        config = MODEL_REGISTRY_CONFIG
+        self.path = path or os.path.join(MODELS_DIR, config['filename'])
+        self.timeout = timeout if timeout is not None else config['timeout']
+        is_new = not os.path.exists(self.path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+        if is_new and sync_dir is not None:
+            self.sync(sync_dir)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @staticmethod
+    def _row_to_dict(row):
+        record = dict(row)
+        for column in _JSON_COLUMNS:
+            if record[column] is not None:
+                record[column] = json.loads(record[column])
+        return record
+
+    # ----------------2.1 Registrazione
+    def register(self, path, name, kind='pickle', member='', model=None, feature_names=None,
+                 data_fingerprint=None, metrics=None, cv_scores=None, metadata=None, model_type=None):
+        """
+        Registra (o aggiorna) un artefatto salvato
+
+        Args:
+            path: File dell'artefatto
+            name: Nome del modello (es. quello usato in save_model)
+            kind: 'pickle' (file di ModelPersistence) o 'bundle'
+            member: Nome del modello dentro il bundle ('' per i file singoli)
+            model: Oggetto salvato, se disponibile (tipo e features)
+            feature_names: Nomi delle features (default dal modello)
+            data_fingerprint: Impronta dei dati di training
+            metrics: Metriche di valutazione (solo gli scalari sono salvati)
+            cv_scores: Risultato di cross_validate_model o lista di punteggi
+            metadata: Metadati liberi serializzabili in JSON
+
+        Returns:
+            Id dell'artefatto
+        """
+        if feature_names is None and model is not None:
+            feature_names = model_feature_names(model)
+        if model_type is None and model is not None:
+            model_type = getattr(model, 'model_type', None) or type(model).__name__
+
+        metrics = _scalar_metrics(metrics)
+        cv = _cv_summary(cv_scores)
+        if cv is not None:
+            metrics.update({'cv_mean': cv.get('mean'), 'cv_std': cv.get('std')})
+
+        path = os.path.abspath(path)
+        values = {
+            'path': path,
+            'member': member or '',
+            'kind': kind,
+            'name': name,
+            'model_type': model_type,
+            'schema_hash': schema_hash(feature_names),
+            'feature_names': _to_json(feature_names),
+            'data_fingerprint': data_fingerprint,
+            **{column: metrics.get(column) for column in METRIC_COLUMNS},
+            'metrics': _to_json(metrics),
+            'cv_scores': _to_json(cv),
+            'metadata': _to_json(metadata),
+            'size_bytes': os.path.getsize(path) if os.path.exists(path) else None,
+            'created_at': os.path.getmtime(path) if os.path.exists(path) else time.time()
+        }
+        columns = ', '.join(values)
+        placeholders = ', '.join('?' for _ in values)
+        updates = ', '.join(f"{column} = excluded.{column}" for column in values if column not in ('path', 'member'))
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                f"INSERT INTO artifacts ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT (path, member) DO UPDATE SET {updates}",
+                tuple(values.values())
+            )
+            return conn.execute('SELECT id FROM artifacts WHERE path = ? AND member = ?',
+                                (path, values['member'])).fetchone()[0]
+
+    def register_bundle(self, path, bundle, metrics=None, cv_scores=None, data_fingerprint=None):
+        """
+        Registra ogni modello di un bundle (save_model_bundle) come riga propria
+
+        Args:
+            path: File del bundle
+            bundle: Dizionario del bundle (gia' in memoria, non viene riletto)
+            metrics: Dizionario nome -> metriche di valutazione
+            cv_scores: Dizionario nome -> risultato di cross validation
+            data_fingerprint: Impronta dei dati di training
+
+        Returns:
+            Dizionario nome -> id
+        """
+        metrics, cv_scores = metrics or {}, cv_scores or {}
+        bundle_name = re.sub(r'_\d{8}_\d{6}$', '', os.path.splitext(os.path.basename(path))[0])
+        metadata = {'bundle': bundle_name, 'format_version': bundle.get('format_version'),
+                    'created_at': bundle.get('created_at'), 'library_versions': bundle.get('library_versions')}
+        # Riga del file senza membri (indicizzato da sync prima della registrazione)
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM artifacts WHERE path = ? AND member = ''", (os.path.abspath(path),))
+        return {
+            name: self.register(
+                path, name, kind='bundle', member=name, model=model,
+                feature_names=bundle.get('feature_names', {}).get(name),
+                data_fingerprint=data_fingerprint, metrics=metrics.get(name),
+                cv_scores=cv_scores.get(name), metadata=metadata
+            )
+            for name, model in bundle['models'].items()
+        }
+
+    def sync(self, save_dir=None, prune=False):
+        """
+        Indicizza i file della directory non ancora registrati
+
+        Usa un solo listdir: i file gia' registrati non vengono letti ne'
+        interrogati con stat, i nuovi solo per dimensione e data (nessun
+        caricamento): metriche e schema restano vuoti per i salvataggi
+        precedenti al registro o copiati a mano nella directory.
+
+        Args:
+            save_dir: Directory da indicizzare (default MODELS_DIR)
+            prune: Rimuove anche le righe dei file della directory non piu'
+                presenti (vedi prune_missing)
+
+        Returns:
+            Numero di artefatti aggiunti
+        """
+        save_dir = save_dir or MODELS_DIR
+        if not os.path.exists(save_dir):
+            return 0
+
+        with closing(self._connect()) as conn:
+            known = {row[0] for row in conn.execute('SELECT DISTINCT path FROM artifacts')}
+
+        files = sorted(os.listdir(save_dir))
+        added = 0
+        for file in files:
+            path = os.path.abspath(os.path.join(save_dir, file))
+            name = re.sub(r'_\d{8}_\d{6}$', '', os.path.splitext(file)[0])
+            if path in known:
+                continue
+            if file.endswith('.pkl'):
+                self.register(path, name, kind='pickle')
+                added += 1
+            elif file.endswith('.joblib'):
+                # Bundle senza metriche: una riga per il file, membri noti solo al caricamento
+                self.register(path, name, kind='bundle', metadata={'bundle': name})
+                added += 1
+        if prune:
+            self.prune_missing(save_dir, files=files)
+        return added
+
+    # ----------------2.2 Interrogazioni
+    def find(self, name=None, kind=None, model_type=None, schema=None, data_fingerprint=None,
+             directory=None, order_by='created_at', descending=True, limit=None):
+        """
+        Artefatti che soddisfano i filtri, senza aprire i file
+
+        Args:
+            name: Nome del modello
+            kind: 'pickle' o 'bundle'
+            model_type: Tipo del modello (es. 'RandomForestClassifier')
+            schema: schema_hash o lista di nomi delle features
+            data_fingerprint: Impronta dei dati di training
+            directory: Solo file in questa directory
+            order_by: Colonna o metrica di ordinamento (anche fuori da METRIC_COLUMNS)
+            descending: Ordine decrescente
+            limit: Numero massimo di risultati
+
+        Returns:
+            Lista di dizionari (una riga per artefatto)
+        """
+        clauses, args = [], []
+        for column, value in (('name', name), ('kind', kind), ('model_type', model_type),
+                              ('data_fingerprint', data_fingerprint)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                args.append(value)
+        if schema is not None:
+            clauses.append('schema_hash = ?')
+            args.append(schema if isinstance(schema, str) else schema_hash(schema))
+        if directory is not None:
+            clauses.append('path LIKE ?')
+            args.append(os.path.join(os.path.abspath(directory), '%'))
+
+        if order_by in METRIC_COLUMNS or order_by in ('created_at', 'size_bytes', 'load_seconds', 'name', 'id'):
+            order = order_by
+        else:
+            order = 'json_extract(metrics, ?)'
+            args += [f"$.{order_by}"] * 2
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        # Valori mancanti sempre in fondo
+        query = (f"SELECT * FROM artifacts{where} ORDER BY {order} IS NULL, {order} "
+                 f"{'DESC' if descending else 'ASC'}, id DESC")
+        if limit is not None:
+            query += ' LIMIT ?'
+            args.append(int(limit))
+
+        with closing(self._connect()) as conn:
+            return [self._row_to_dict(row) for row in conn.execute(query, args)]
+
+    def best(self, metric='f1', higher_is_better=True, **filters):
+        """
+        Artefatto con la metrica migliore (es. miglior F1 per uno schema)
+
+        Args:
+            metric: Metrica di METRIC_COLUMNS o chiave del JSON metrics
+            higher_is_better: False per metriche da minimizzare
+            **filters: Filtri di find (name, kind, schema, data_fingerprint, ...)
+
+        Returns:
+            Dizionario dell'artefatto o None
+        """
+        rows = self.find(order_by=metric, descending=higher_is_better, limit=1, **filters)
+        if not rows:
+            return None
+        value = rows[0][metric] if metric in METRIC_COLUMNS else (rows[0]['metrics'] or {}).get(metric)
+        return rows[0] if value is not None else None
+
+    def get(self, artifact_id):
+        """Riga di un artefatto per id (None se non esiste)"""
+        with closing(self._connect()) as conn:
+            row = conn.execute('SELECT * FROM artifacts WHERE id = ?', (artifact_id,)).fetchone()
+        return self._row_to_dict(row) if row is not None else None
+
+    def count(self, kind=None):
+        """Numero di artefatti registrati (per tipo o totale)"""
+        query, args = 'SELECT COUNT(*) FROM artifacts', ()
+        if kind is not None:
+            query, args = query + ' WHERE kind = ?', (kind,)
+        with closing(self._connect()) as conn:
+            return conn.execute(query, args).fetchone()[0]
+
+    # ----------------2.3 Caricamento e Manutenzione
+    def load(self, artifact_id, mmap_mode=None):
+        """
+        Carica il modello di un artefatto (solo ora il file viene aperto)
+
+        Il tempo di caricamento viene salvato nel registro. Per i membri di
+        un bundle viene restituito solo il modello richiesto.
+
+        Args:
+            artifact_id: Id nel registro
+            mmap_mode: Memory mapping per i bundle (None = copie scrivibili)
+        """
+        record = self.get(artifact_id)
+        if record is None:
+            raise KeyError(f"Artefatto {artifact_id} non presente nel registro")
+        if not os.path.exists(record['path']):
+            raise FileNotFoundError(f"File dell'artefatto {artifact_id} non trovato: {record['path']}")
+
+        start = time.perf_counter()
+        if record['kind'] == 'bundle':
+            from src.models.model_bundle import load_model_bundle
+            bundle = load_model_bundle(record['path'], mmap_mode=mmap_mode)
+            obj = bundle['models'][record['member']] if record['member'] else bundle
+        else:
+            from src.models.model_trainer import ModelPersistence
+            obj = ModelPersistence.load_model(record['path'])
+        load_seconds = time.perf_counter() - start
+
+        with closing(self._connect()) as conn, conn:
+            conn.execute('UPDATE artifacts SET load_seconds = ? WHERE id = ?', (load_seconds, artifact_id))
+        return obj
+
+    def remove(self, artifact_id, delete_file=False):
+        """Elimina un artefatto dal registro (e il file se nessun'altra riga lo usa)"""
+        record = self.get(artifact_id)
+        if record is None:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM artifacts WHERE id = ?', (artifact_id,))
+            still_used = conn.execute('SELECT 1 FROM artifacts WHERE path = ? LIMIT 1',
+                                      (record['path'],)).fetchone()
+        if delete_file and not still_used and os.path.exists(record['path']):
+            os.remove(record['path'])
+
+    def prune_missing(self, save_dir=None, files=None):
+        """
+        Rimuove le righe dei file cancellati dal disco
+
+        Args:
+            save_dir: Controlla solo i file di questa directory, confrontati
+                con un unico listdir invece di un os.path.exists per riga
+            files: Contenuto di save_dir gia' letto (evita un secondo listdir)
+
+        Returns:
+            Numero di file rimossi dal registro
+        """
+        with closing(self._connect()) as conn:
+            paths = [row[0] for row in conn.execute('SELECT DISTINCT path FROM artifacts')]
+        if save_dir is None:
+            missing = [(path,) for path in paths if not os.path.exists(path)]
+        else:
+            directory = os.path.abspath(save_dir)
+            present = set(os.listdir(directory) if files is None else files)
+            missing = [(path,) for path in paths
+                       if os.path.dirname(path) == directory and os.path.basename(path) not in present]
+        if missing:
+            with closing(self._connect()) as conn, conn:
+                conn.executemany('DELETE FROM artifacts WHERE path = ?', missing)
+        return len(missing)
+
+def register_artifact(save_dir, register):
+    """
+    Registra un artefatto appena salvato nel registro della sua directory
+
+    Un errore del registro non annulla il salvataggio: viene solo segnalato.
+
+    Args:
+        save_dir: Directory del salvataggio
+        register: Funzione che riceve il ModelRegistry e registra l'artefatto
+    """
+    from src.utils.headless import emit
+
+    try:
+        registry = get_model_registry(save_dir)
+        if registry is not None:
+            return register(registry)
+    except Exception as e:
+        emit('warning', f"Artefatto salvato ma non registrato: {str(e)}", source='register_artifact')
+    return None
+
+def get_model_registry(save_dir=None):
+    """
+    Registro della directory dei modelli, oppure None se disabilitato
+
+    Il database sta nella directory stessa; alla prima creazione vengono
+    indicizzati i file gia' presenti, poi le liste dei salvataggi lo
+    riallineano alla directory con sync(prune=True).
+    """
+    if not MODEL_REGISTRY_CONFIG['enabled']:
+        return None
+    save_dir = save_dir or MODELS_DIR
+    return ModelRegistry(os.path.join(save_dir, MODEL_REGISTRY_CONFIG['filename']), sync_dir=save_dir)
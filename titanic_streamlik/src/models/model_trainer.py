@@ -5,9 +5,10 @@ Training pipeline e gestione modelli Machine Learning
 
 import pandas as pd
 import numpy as np
-import streamlit as st
+from src.utils.headless import emit
+from src.utils.helpers import compute_data_fingerprint
 from sklearn.model_selection import (
-    train_test_split, cross_val_score, GridSearchCV, 
+    train_test_split,
     StratifiedKFold, learning_curve, validation_curve
 )
 from sklearn.preprocessing import StandardScaler, MinMaxScaler, RobustScaler
@@ -19,7 +20,11 @@ import os
 from datetime import datetime
 
 from src.models.ml_models import ModelFactory, ModelEnsemble, HyperparameterGrids
-from src.config import PREPROCESSING_CONFIG, MODELS_DIR
+from src.models.hyperparameter_search import (
+    BudgetedSearch, HALVING_STRATEGIES, count_candidates, create_halving_search, resolve_search_strategy
+)
+from src.models.trial_store import get_trial_store, estimator_signature
+from src.config import PREPROCESSING_CONFIG, MODELS_DIR, PARALLEL_TRAINING_CONFIG, CV_CACHE_CONFIG
 
 # ----------------1. Data Preparation
 
@@ -83,19 +88,20 @@ class DataPreprocessor:
         """Gestisce valori mancanti"""
         for col in X.columns:
             if X[col].isnull().any():
-                if X[col].dtype in ['float64', 'int64']:
+                if pd.api.types.is_numeric_dtype(X[col]):
                     # Numeriche: usa mediana
-                    X[col].fillna(X[col].median(), inplace=True)
+                    X[col] = X[col].fillna(X[col].median())
                 else:
                     # Categoriche: usa moda
-                    X[col].fillna(X[col].mode()[0] if not X[col].mode().empty else 'Unknown', inplace=True)
+                    mode = X[col].mode()
+                    X[col] = X[col].astype(object).fillna(mode[0] if not mode.empty else 'Unknown')
         return X
     
     def _encode_categorical_features(self, X, fit=True):
         """Codifica features categoriche"""
         from sklearn.preprocessing import LabelEncoder
         
-        categorical_cols = X.select_dtypes(include=['object']).columns
+        categorical_cols = X.select_dtypes(include=['object', 'category']).columns
         
         for col in categorical_cols:
             if fit:
@@ -133,16 +139,109 @@ class DataPreprocessor:
 
 # ----------------2. Training Pipeline
 
+def compute_worker_budget(n_tasks, max_workers=None):
+    """
+    Divide i core disponibili tra processi paralleli e n_jobs interno
+    
+    Con P processi esterni ogni processo riceve core // P core per il
+    proprio parallelismo (GridSearch, learning curves, stimatori con
+    n_jobs), evitando di lanciare P * core thread contemporaneamente.
+    
+    Args:
+        n_tasks: Numero di task indipendenti (es. tipi di modello)
+        max_workers: Core totali da usare (None/-1 = tutti)
+    
+    Returns:
+        Tupla (processi esterni, n_jobs interno per processo)
+    """
+    n_cores = os.cpu_count() or 1
+    if max_workers is None:
+        max_workers = PARALLEL_TRAINING_CONFIG['max_workers']
+    budget = n_cores if max_workers in (None, -1) else max(1, min(int(max_workers), n_cores))
+    
+    outer = max(1, min(n_tasks, budget))
+    inner = max(1, budget // outer)
+    return outer, inner
+
+def _train_model_worker(model_type, X_train, y_train, X_test, random_state, n_jobs,
+                        preprocessing_cache=None):
+    """Addestra un modello in un processo separato (eseguito dal pool joblib)"""
+    trainer = ModelTrainer(random_state=random_state, n_jobs=n_jobs)
+    trainer.X_train, trainer.y_train, trainer.X_test = X_train, y_train, X_test
+    if preprocessing_cache:
+        trainer._preprocessing_cache.update(preprocessing_cache)
+    try:
+        return model_type, trainer.train_single_model(model_type), None
+    except Exception as e:
+        return model_type, None, str(e)
+
+def _preprocess_fold(X_train, y_train, X_val, scaling_method, preprocessor_version=None):
+    """
+    Preprocessing di un fold di CV fittato solo sulla parte di training
+    
+    Funzione di modulo perche' joblib.Memory la identifica per nome e codice.
+    
+    Args:
+        preprocessor_version: Solo chiave di cache (get_preprocessor_version):
+            joblib.Memory non vede le modifiche a DataPreprocessor
+    
+    Returns:
+        Tupla (X_train trasformato, X_val trasformato)
+    """
+    preprocessor = DataPreprocessor(scaling_method=scaling_method)
+    X_train_processed, _ = preprocessor.fit_transform(X_train, y_train)
+    return X_train_processed, preprocessor.transform(X_val)
+
+_cv_memory = None
+_preprocessor_version = None
+
+def get_preprocessor_version():
+    """
+    Impronta del codice di DataPreprocessor e della versione di sklearn
+    
+    Entra nella chiave delle matrici per fold in cache su disco: dopo una
+    modifica del preprocessing la cross validation non riusa le matrici
+    prodotte dal codice precedente.
+    """
+    global _preprocessor_version
+    if _preprocessor_version is None:
+        import hashlib
+        import inspect
+        import sklearn
+        
+        source = inspect.getsource(DataPreprocessor)
+        _preprocessor_version = hashlib.sha256(f"{source}\n{sklearn.__version__}".encode()).hexdigest()[:16]
+    return _preprocessor_version
+
+def get_cv_memory():
+    """joblib.Memory della cache per fold (nessuna cache su disco se cache_dir e' None)"""
+    global _cv_memory
+    if _cv_memory is None:
+        from joblib import Memory
+        _cv_memory = Memory(location=CV_CACHE_CONFIG['cache_dir'], verbose=CV_CACHE_CONFIG['verbose'])
+    return _cv_memory
+
+def clear_cv_cache():
+    """Svuota la cache su disco delle matrici per fold"""
+    get_cv_memory().clear(warn=False)
+
 class ModelTrainer:
     """
     Classe principale per training modelli
     """
     
-    def __init__(self, random_state=42):
+    def __init__(self, random_state=42, n_jobs=None):
         self.random_state = random_state
+        # Core per il parallelismo interno (None = tutti, come n_jobs=-1)
+        self.n_jobs = n_jobs
         self.trained_models = {}
         self.training_results = {}
         self.preprocessors = {}
+        # (impronta dati, scaling) -> preprocessor fittato e matrici trasformate
+        self._preprocessing_cache = {}
+        self.preprocessing_stats = {'fits': 0, 'hits': 0}
+        # (impronta dati, splitter, scaling) -> matrici per fold della CV
+        self._fold_cache = {}
         self.X_train = None
         self.X_test = None
         self.y_train = None
@@ -164,9 +263,11 @@ class ModelTrainer:
             self.y_train = y
             self.X_test = None  # Verrà impostato successivamente
             self.y_test = None  # Verrà impostato successivamente
+            self.clear_preprocessing_cache()
             return X, None, y, None
         
         stratify_param = y if stratify else None
+        self.clear_preprocessing_cache()
         
         self.X_train, self.X_test, self.y_train, self.y_test = train_test_split(
             X, y, 
@@ -177,6 +278,100 @@ class ModelTrainer:
         
         return self.X_train, self.X_test, self.y_train, self.y_test
     
+    @staticmethod
+    def _scaling_method(use_scaling):
+        return 'standard' if use_scaling else 'none'
+    
+    def _fit_preprocessing(self, X, y, scaling_method):
+        """
+        Preprocessor fittato su X e la relativa matrice trasformata
+        
+        La chiave della cache e' (impronta di X e y, scaling): tutti i modelli
+        che richiedono la stessa trasformazione condividono lo stesso
+        preprocessor e la stessa matrice, che quindi non vanno modificati.
+        
+        Returns:
+            Tupla (chiave cache, preprocessor, X trasformato)
+        """
+        key = (compute_data_fingerprint(X, y), scaling_method)
+        entry = self._preprocessing_cache.get(key)
+        
+        if entry is None:
+            preprocessor = DataPreprocessor(scaling_method=scaling_method)
+            X_processed, _ = preprocessor.fit_transform(X, y)
+            entry = {'preprocessor': preprocessor, 'X_processed': X_processed, 'transforms': {}}
+            self._preprocessing_cache[key] = entry
+            self.preprocessing_stats['fits'] += 1
+        else:
+            self.preprocessing_stats['hits'] += 1
+        
+        return key, entry['preprocessor'], entry['X_processed']
+    
+    def _transform_preprocessing(self, key, X):
+        """Transform di X con il preprocessor in cache (memorizzato per impronta di X)"""
+        if X is None:
+            return None
+        
+        entry = self._preprocessing_cache[key]
+        fingerprint = compute_data_fingerprint(X)
+        if fingerprint not in entry['transforms']:
+            entry['transforms'][fingerprint] = entry['preprocessor'].transform(X)
+        return entry['transforms'][fingerprint]
+    
+    def warm_preprocessing_cache(self, model_types):
+        """
+        Fitta in anticipo le trasformazioni richieste dai modelli
+        
+        Al massimo una per metodo di scaling (con e senza scaling),
+        indipendentemente dal numero di modelli.
+        """
+        scaling_methods = set()
+        for model_type in model_types:
+            try:
+                scaling_methods.add(self._scaling_method(ModelFactory.create_model(model_type).requires_scaling))
+            except ValueError:
+                continue  # Tipo non supportato: l'errore emerge nel training
+        
+        for scaling_method in sorted(scaling_methods):
+            key, _, _ = self._fit_preprocessing(self.X_train, self.y_train, scaling_method)
+            self._transform_preprocessing(key, self.X_test)
+    
+    def clear_preprocessing_cache(self):
+        """Svuota la cache del preprocessing (nuovi dati)"""
+        self._preprocessing_cache.clear()
+        self._fold_cache.clear()
+    
+    def _cv_fold_matrices(self, X, y, cv, scaling_method):
+        """
+        Matrici preprocessate di ogni fold, con preprocessing fittato nel fold
+        
+        In memoria valgono per tutti i modelli della stessa esecuzione; su
+        disco (joblib.Memory) anche tra esecuzioni con gli stessi dati.
+        
+        Returns:
+            Lista di tuple (X_train, y_train, X_val, y_val) per fold
+        """
+        key = (compute_data_fingerprint(X, y), repr(cv), scaling_method)
+        if key in self._fold_cache:
+            return self._fold_cache[key]
+        
+        memory = get_cv_memory()
+        preprocess_fold = memory.cache(_preprocess_fold)
+        
+        folds = []
+        for train_idx, val_idx in cv.split(X, y):
+            y_train, y_val = y.iloc[train_idx], y.iloc[val_idx]
+            X_train_processed, X_val_processed = preprocess_fold(
+                X.iloc[train_idx], y_train, X.iloc[val_idx], scaling_method, get_preprocessor_version()
+            )
+            folds.append((X_train_processed, y_train, X_val_processed, y_val))
+        
+        if memory.location is not None:
+            memory.reduce_size(bytes_limit=CV_CACHE_CONFIG['bytes_limit'])
+        
+        self._fold_cache[key] = folds
+        return folds
+    
     def train_single_model(self, model_type, use_scaling=None, custom_params=None):
         """
         Addestra singolo modello
@@ -193,17 +388,18 @@ class ModelTrainer:
         
         # Crea modello
         model = ModelFactory.create_model(model_type, custom_params)
+        if self.n_jobs is not None and 'n_jobs' in model.model.get_params():
+            model.model.set_params(n_jobs=self.n_jobs)
         
         # Determina se usare scaling
         if use_scaling is None:
             use_scaling = model.requires_scaling
         
-        # Preprocessing
-        scaling_method = 'standard' if use_scaling else 'none'
-        preprocessor = DataPreprocessor(scaling_method=scaling_method)
-        
-        X_train_processed, _ = preprocessor.fit_transform(self.X_train, self.y_train)
-        X_test_processed = preprocessor.transform(self.X_test)
+        # Preprocessing (condiviso tra i modelli con lo stesso scaling)
+        key, preprocessor, X_train_processed = self._fit_preprocessing(
+            self.X_train, self.y_train, self._scaling_method(use_scaling)
+        )
+        X_test_processed = self._transform_preprocessing(key, self.X_test)
         
         # Training
         model.model.fit(X_train_processed, self.y_train)
@@ -229,17 +425,31 @@ class ModelTrainer:
         
         return results
     
-    def train_multiple_models(self, model_types, progress_callback=None):
+    def train_multiple_models(self, model_types, progress_callback=None, max_workers=None):
         """
         Addestra multiple modelli
         
+        Con almeno PARALLEL_TRAINING_CONFIG['min_models'] modelli e piu' di
+        un core, i tipi di modello vengono addestrati in processi paralleli
+        (joblib/loky); i core restanti vanno all'n_jobs interno di ciascuno.
+        
         Args:
             model_types: Lista dei tipi di modello
             progress_callback: Callback per aggiornare progress bar
+            max_workers: Core totali da usare (default da PARALLEL_TRAINING_CONFIG)
         
         Returns:
             Dizionario con risultati di tutti i modelli
         """
+        model_types = list(model_types)
+        outer, inner = compute_worker_budget(len(model_types), max_workers)
+        
+        if outer < 2 or len(model_types) < PARALLEL_TRAINING_CONFIG['min_models']:
+            return self._train_models_sequential(model_types, progress_callback)
+        return self._train_models_parallel(model_types, progress_callback, outer, inner)
+    
+    def _train_models_sequential(self, model_types, progress_callback=None):
+        """Training di un modello alla volta nel processo corrente"""
         results = {}
         
         for i, model_type in enumerate(model_types):
@@ -254,15 +464,74 @@ class ModelTrainer:
                     progress_callback((i + 1) / len(model_types), f"Completato {model_type}")
                     
             except Exception as e:
-                st.error(f"Errore nel training di {model_type}: {str(e)}")
+                emit('error', f"Errore nel training di {model_type}: {str(e)}",
+                     source='train_multiple_models', model_type=model_type)
                 continue
         
         return results
     
+    def _train_models_parallel(self, model_types, progress_callback, n_workers, n_jobs):
+        """
+        Training dei modelli in processi paralleli
+        
+        I risultati arrivano nell'ordine di completamento: il progresso
+        avanza a ogni modello terminato e viene aggiornato dal processo
+        principale (il callback non viene mai chiamato dai worker).
+        """
+        from joblib import Parallel, delayed
+        
+        if progress_callback:
+            progress_callback(0.0, f"Training di {len(model_types)} modelli su {n_workers} processi...")
+        
+        # Preprocessing fittato una volta qui e inviato ai worker
+        self.warm_preprocessing_cache(model_types)
+        
+        tasks = (
+            delayed(_train_model_worker)(
+                model_type, self.X_train, self.y_train, self.X_test, self.random_state, n_jobs,
+                self._preprocessing_cache
+            )
+            for model_type in model_types
+        )
+        parallel = Parallel(n_jobs=n_workers, backend=PARALLEL_TRAINING_CONFIG['backend'],
+                            return_as='generator_unordered')
+        
+        train_fingerprint = compute_data_fingerprint(self.X_train, self.y_train)
+        completed = {}
+        for done, (model_type, result, error) in enumerate(parallel(tasks), start=1):
+            if error is not None:
+                emit('error', f"Errore nel training di {model_type}: {error}",
+                     source='train_multiple_models', model_type=model_type)
+            else:
+                # I worker ricevono copie: si riusano gli oggetti condivisi della cache
+                key = (train_fingerprint, result['preprocessor'].scaling_method)
+                if key in self._preprocessing_cache:
+                    result['preprocessor'] = self._preprocessing_cache[key]['preprocessor']
+                    result['X_train_processed'] = self._preprocessing_cache[key]['X_processed']
+                    result['X_test_processed'] = self._transform_preprocessing(key, self.X_test)
+                completed[model_type] = result
+                self.trained_models[model_type] = result['model']
+                self.preprocessors[model_type] = result['preprocessor']
+                self.training_results[model_type] = result
+            
+            if progress_callback:
+                status = "Completato" if error is None else "Fallito"
+                progress_callback(done / len(model_types), f"{status} {model_type}")
+        
+        emit('info', f"Training parallelo: {len(completed)}/{len(model_types)} modelli, "
+             f"{n_workers} processi x {n_jobs} core",
+             source='train_multiple_models', n_workers=n_workers, n_jobs=n_jobs)
+        
+        # Stesso ordine della richiesta
+        return {model_type: completed[model_type] for model_type in model_types if model_type in completed}
+    
     def cross_validate_model(self, model_type, cv_folds=5, scoring='accuracy'):
         """
         Cross validation per singolo modello
         
+        Il preprocessing viene fittato su ogni fold di training e le matrici
+        per fold sono condivise da tutti i modelli con lo stesso scaling.
+        
         Args:
             model_type: Tipo di modello
             cv_folds: Numero di fold
@@ -274,6 +543,9 @@ class ModelTrainer:
         if model_type not in self.trained_models:
             raise ValueError(f"Modello {model_type} non è stato addestrato")
         
+        from sklearn.base import clone
+        from sklearn.metrics import get_scorer
+        
         model = self.trained_models[model_type]
         preprocessor = self.preprocessors[model_type]
         
@@ -281,11 +553,16 @@ class ModelTrainer:
         X_full = pd.concat([self.X_train, self.X_test])
         y_full = pd.concat([self.y_train, self.y_test])
         
-        X_processed, _ = preprocessor.fit_transform(X_full, y_full)
-        
-        # Cross validation
+        # Cross validation: preprocessing fittato dentro ogni fold (nessun leakage
+        # dal fold di validazione); il preprocessor del modello resta invariato
         cv = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=self.random_state)
-        cv_scores = cross_val_score(model.model, X_processed, y_full, cv=cv, scoring=scoring)
+        folds = self._cv_fold_matrices(X_full, y_full, cv, preprocessor.scaling_method)
+        
+        scorer = get_scorer(scoring)
+        cv_scores = np.array([
+            scorer(clone(model.model).fit(X_train_fold, y_train_fold), X_val_fold, y_val_fold)
+            for X_train_fold, y_train_fold, X_val_fold, y_val_fold in folds
+        ])
         
         return {
             'scores': cv_scores,
@@ -295,15 +572,31 @@ class ModelTrainer:
             'max': cv_scores.max()
         }
     
-    def hyperparameter_tuning(self, model_type, param_grid=None, cv_folds=3, scoring='accuracy'):
+    def hyperparameter_tuning(self, model_type, param_grid=None, cv_folds=3, scoring='accuracy',
+                              strategy=None, n_iter=None, time_budget=None, early_stopping_rounds=None,
+                              trial_store=None):
         """
-        Hyperparameter tuning con GridSearch
+        Hyperparameter tuning con strategia di ricerca configurabile
+        
+        grid, random e bayesian valutano i candidati sui fold preprocessati
+        in cache (preprocessing fittato nel fold) rispettando time_budget ed
+        early stopping; halving_grid e halving_random usano le classi
+        Halving*SearchCV di sklearn sui dati di training preprocessati.
+        
+        Per grid, random e bayesian ogni candidato valutato viene salvato nel
+        TrialStore (SQLite) con chiave impronta dei dati + hash dei parametri:
+        una ricerca interrotta o ripetuta salta i candidati gia' valutati.
         
         Args:
             model_type: Tipo di modello
             param_grid: Griglia parametri (usa default se None)
             cv_folds: Numero di fold per CV
             scoring: Metrica di scoring
+            strategy: 'auto', 'grid', 'random', 'halving_grid', 'halving_random', 'bayesian'
+            n_iter: Numero massimo di candidati (random/bayesian)
+            time_budget: Secondi massimi di ricerca (None = HYPERPARAMETER_SEARCH_CONFIG)
+            early_stopping_rounds: Candidati senza miglioramento prima di fermarsi
+            trial_store: TrialStore da usare (default: get_trial_store())
         
         Returns:
             Risultati del tuning
@@ -314,33 +607,68 @@ class ModelTrainer:
         if not param_grid:
             raise ValueError(f"Nessuna griglia parametri disponibile per {model_type}")
         
+        strategy = resolve_search_strategy(strategy, param_grid)
+        n_jobs = self.n_jobs if self.n_jobs is not None else -1
+        
         # Crea modello base
         base_model = ModelFactory.create_model(model_type)
+        scaling_method = self._scaling_method(base_model.requires_scaling)
         
         # Preprocessing
-        scaling_method = 'standard' if base_model.requires_scaling else 'none'
-        preprocessor = DataPreprocessor(scaling_method=scaling_method)
-        X_train_processed, _ = preprocessor.fit_transform(self.X_train, self.y_train)
+        _, _, X_train_processed = self._fit_preprocessing(self.X_train, self.y_train, scaling_method)
         
-        # GridSearch
         cv = StratifiedKFold(n_splits=cv_folds, shuffle=True, random_state=self.random_state)
+        start_time = time.time()
         
-        grid_search = GridSearchCV(
-            base_model.model,
-            param_grid,
-            cv=cv,
-            scoring=scoring,
-            n_jobs=-1,
-            verbose=1
-        )
+        if strategy in HALVING_STRATEGIES:
+            search = create_halving_search(base_model.model, param_grid, strategy, cv, scoring=scoring,
+                                           n_jobs=n_jobs, random_state=self.random_state, n_iter=n_iter)
+            search.fit(X_train_processed, self.y_train)
+            best_params, best_score = search.best_params_, search.best_score_
+            best_estimator, cv_results = search.best_estimator_, search.cv_results_
+            # Candidati distinti (cv_results_ ha una riga per candidato e iterazione)
+            n_evaluated, stopped_reason = int(search.n_candidates_[0]), 'completed'
+            n_reused = 0
+        else:
+            folds = self._cv_fold_matrices(self.X_train, self.y_train, cv, scaling_method)
+            
+            if trial_store is None:
+                trial_store = get_trial_store()
+            trial_context = '|'.join(['hyperparameter_tuning', model_type, scaling_method, str(scoring),
+                                      repr(cv), estimator_signature(base_model.model)])
+            trial_key = (trial_context, compute_data_fingerprint(self.X_train, self.y_train))
+            
+            search = BudgetedSearch(
+                base_model.model, param_grid, strategy=strategy, scoring=scoring, n_iter=n_iter,
+                time_budget=time_budget, early_stopping_rounds=early_stopping_rounds,
+                n_jobs=n_jobs, random_state=self.random_state,
+                trial_store=trial_store, trial_key=trial_key
+            ).fit(folds)
+            best_params, best_score, cv_results = search.best_params_, search.best_score_, search.cv_results_
+            n_evaluated, stopped_reason = len(search.results_), search.stopped_reason_
+            n_reused = search.n_reused_
+            
+            # Refit della combinazione migliore su tutto il training
+            from sklearn.base import clone
+            best_estimator = clone(base_model.model).set_params(**best_params)
+            best_estimator.fit(X_train_processed, self.y_train)
         
-        grid_search.fit(X_train_processed, self.y_train)
+        search_time = time.time() - start_time
+        emit('info', f"Tuning {model_type} ({strategy}): {n_evaluated}/{count_candidates(param_grid)} "
+             f"combinazioni ({n_reused} riprese dall'archivio) in {search_time:.1f}s, score {best_score:.4f}",
+             source='hyperparameter_tuning', model_type=model_type, strategy=strategy,
+             n_evaluated=n_evaluated, n_reused=n_reused, stopped_reason=stopped_reason)
         
         return {
-            'best_params': grid_search.best_params_,
-            'best_score': grid_search.best_score_,
-            'best_estimator': grid_search.best_estimator_,
-            'cv_results': grid_search.cv_results_
+            'best_params': best_params,
+            'best_score': best_score,
+            'best_estimator': best_estimator,
+            'cv_results': cv_results,
+            'strategy': strategy,
+            'n_candidates_evaluated': n_evaluated,
+            'n_candidates_reused': n_reused,
+            'stopped_reason': stopped_reason,
+            'search_time': search_time
         }
     
     def create_learning_curves(self, model_type, train_sizes=None):
@@ -364,7 +692,7 @@ class ModelTrainer:
         preprocessor = self.preprocessors[model_type]
         
         # Prepara dati
-        X_processed, _ = preprocessor.fit_transform(self.X_train, self.y_train)
+        _, _, X_processed = self._fit_preprocessing(self.X_train, self.y_train, preprocessor.scaling_method)
         
         # Learning curves
         train_sizes_abs, train_scores, val_scores = learning_curve(
@@ -374,7 +702,7 @@ class ModelTrainer:
             train_sizes=train_sizes,
             cv=3,
             scoring='accuracy',
-            n_jobs=-1,
+            n_jobs=self.n_jobs if self.n_jobs is not None else -1,
             random_state=self.random_state
         )
         
@@ -388,6 +716,133 @@ class ModelTrainer:
             'val_std': np.std(val_scores, axis=1)
         }
 
+    def warm_start_model(self, model_type, model=None, model_path=None, preprocessor=None,
+                         n_additional_estimators=None, compare_full_retrain=False):
+        """
+        Continua il training di un modello a ensemble sui dati correnti
+        
+        Il modello viene preso (in ordine) da model, da model_path (file di
+        ModelPersistence) o dai modelli gia' addestrati dal trainer. Le nuove
+        features sono trasformate con il preprocessor originale (solo
+        transform), cosi' la codifica resta quella vista dagli stimatori
+        esistenti; senza preprocessor se ne fitta uno sui dati correnti.
+        
+        Il tempo di un retrain completo viene stimato dal costo per stimatore
+        del warm start oppure misurato con compare_full_retrain=True.
+        
+        Args:
+            model_type: Tipo di modello (RandomForest, ExtraTrees, GradientBoosting)
+            model: TitanicModel o stimatore sklearn gia' addestrato
+            model_path: File salvato con ModelPersistence.save_model
+            preprocessor: DataPreprocessor usato nel training originale
+            n_additional_estimators: Stimatori da aggiungere
+            compare_full_retrain: Se addestrare anche da zero per confronto
+        
+        Returns:
+            Risultati del training (stesso formato di train_single_model) con
+            il riepilogo in 'warm_start'
+        """
+        if model is None and model_path is not None:
+            model = ModelPersistence.load_model(model_path)
+        if model is None:
+            if model_type not in self.trained_models:
+                raise ValueError(f"Nessun modello {model_type} da cui continuare il training")
+            model = self.trained_models[model_type]
+            preprocessor = preprocessor or self.preprocessors.get(model_type)
+        
+        # Stimatore sklearn salvato direttamente: lo avvolge nel TitanicModel
+        if not hasattr(model, 'continue_training'):
+            estimator = model
+            model = ModelFactory.create_model(model_type, estimator.get_params())
+            model.model = estimator
+            model.is_trained = True
+            if hasattr(estimator, 'feature_names_in_'):
+                model.feature_names = list(estimator.feature_names_in_)
+        
+        if preprocessor is not None:
+            X_train_processed = preprocessor.transform(self.X_train)
+        else:
+            _, preprocessor, X_train_processed = self._fit_preprocessing(
+                self.X_train, self.y_train, self._scaling_method(model.requires_scaling)
+            )
+        X_test_processed = preprocessor.transform(self.X_test) if self.X_test is not None else None
+        
+        warm = model.continue_training(X_train_processed, self.y_train, n_additional_estimators)
+        
+        # Retrain completo: stimato dal costo per stimatore o misurato
+        if compare_full_retrain:
+            from sklearn.base import clone
+            full_model = clone(model.model)
+            start = time.perf_counter()
+            full_model.fit(X_train_processed, self.y_train)
+            full_retrain_time, full_retrain_measured = time.perf_counter() - start, True
+        else:
+            per_estimator = warm['fit_time'] / max(warm['n_estimators_added'], 1)
+            full_retrain_time, full_retrain_measured = per_estimator * warm['n_estimators_after'], False
+        
+        warm.update({
+            'full_retrain_time': full_retrain_time,
+            'full_retrain_measured': full_retrain_measured,
+            'time_saved': full_retrain_time - warm['fit_time'],
+            'speedup': full_retrain_time / warm['fit_time'] if warm['fit_time'] > 0 else np.nan
+        })
+        emit('info', f"Warm start {model_type}: +{warm['n_estimators_added']} stimatori "
+             f"({warm['n_estimators_before']} -> {warm['n_estimators_after']}) in {warm['fit_time']:.2f}s, "
+             f"risparmiati {warm['time_saved']:.2f}s rispetto al retrain completo"
+             f"{'' if full_retrain_measured else ' (stimato)'}",
+             source='warm_start_model', model_type=model_type, **warm)
+        
+        self.trained_models[model_type] = model
+        self.preprocessors[model_type] = preprocessor
+        results = {
+            'model': model,
+            'preprocessor': preprocessor,
+            'training_time': warm['fit_time'],
+            'X_train_processed': X_train_processed,
+            'X_test_processed': X_test_processed,
+            'warm_start': warm
+        }
+        self.training_results[model_type] = results
+        return results
+
+    def train_streaming_model(self, model_type, source=None, chunksize=None, progress_callback=None, **kwargs):
+        """
+        Addestra un modello out-of-core (partial_fit) leggendo la sorgente a chunk
+        
+        Non usa X_train/y_train: il dataset viene letto dal livello di
+        ingestione a ogni epoca, quindi puo' non stare in memoria. Il
+        preprocessor salvato e' lo StreamingFeatureEncoder (stessa interfaccia
+        transform di DataPreprocessor).
+        
+        Args:
+            model_type: 'LogisticRegression', 'GaussianNB' o 'MLPClassifier'
+            source: CSV/manifest di input (default: sorgente configurata)
+            chunksize: Righe per chunk
+            progress_callback: Callback (progresso, messaggio)
+            **kwargs: Parametri di StreamingTrainer (epochs, batch_size, ...)
+        
+        Returns:
+            Risultati del training con la storia delle epoche in 'history'
+        """
+        from src.models.streaming_trainer import StreamingTrainer
+        
+        start_time = time.time()
+        kwargs.setdefault('random_state', self.random_state)
+        trainer = StreamingTrainer.from_source(model_type, source, chunksize, **kwargs)
+        model = trainer.fit(progress_callback)
+        
+        self.trained_models[model_type] = model
+        self.preprocessors[model_type] = trainer.encoder
+        results = {
+            'model': model,
+            'preprocessor': trainer.encoder,
+            'training_time': time.time() - start_time,
+            'history': trainer.history_,
+            'streaming': True
+        }
+        self.training_results[model_type] = results
+        return results
+
 # ----------------3. Ensemble Training
 
 class EnsembleTrainer:
@@ -498,14 +953,17 @@ class ModelPersistence:
     """
     
     @staticmethod
-    def save_model(model, model_name, save_dir=None):
+    def save_model(model, model_name, save_dir=None, metrics=None, cv_scores=None, data_fingerprint=None):
         """
-        Salva modello su disco
+        Salva modello su disco e lo registra nel registro dei modelli
         
         Args:
             model: Modello da salvare
             model_name: Nome del modello
             save_dir: Directory di salvataggio
+            metrics: Metriche di valutazione da registrare (opzionale)
+            cv_scores: Risultato di cross_validate_model (opzionale)
+            data_fingerprint: Impronta dei dati di training (opzionale)
         
         Returns:
             Path del file salvato
@@ -523,9 +981,15 @@ class ModelPersistence:
         try:
             with open(filepath, 'wb') as f:
                 pickle.dump(model, f)
-            return filepath
         except Exception as e:
             raise Exception(f"Errore nel salvataggio del modello: {str(e)}")
+        
+        from src.models.model_registry import register_artifact
+        register_artifact(save_dir, lambda registry: registry.register(
+            filepath, model_name, model=model, metrics=metrics, cv_scores=cv_scores,
+            data_fingerprint=data_fingerprint
+        ))
+        return filepath
     
     @staticmethod
     def load_model(filepath):
@@ -550,18 +1014,39 @@ class ModelPersistence:
         """
         Lista modelli salvati
         
+        Con il registro attivo la lista viene letta dal database dopo averlo
+        riallineato alla directory (sync con prune: un listdir, nessun
+        caricamento); ogni voce ha anche id e metriche.
+        
         Args:
             save_dir: Directory da esplorare
         
         Returns:
-            Lista dei file modello
+            Lista dei file modello, dal piu' recente
         """
+        from src.models.model_registry import get_model_registry
+        
         if save_dir is None:
             save_dir = MODELS_DIR
         
         if not os.path.exists(save_dir):
             return []
         
+        registry = get_model_registry(save_dir)
+        if registry is not None:
+            registry.sync(save_dir, prune=True)
+            return [
+                {
+                    'filename': os.path.basename(record['path']),
+                    'filepath': record['path'],
+                    'size': record['size_bytes'],
+                    'modified': datetime.fromtimestamp(record['created_at']),
+                    'id': record['id'],
+                    'metrics': record['metrics'] or {}
+                }
+                for record in registry.find(kind='pickle')
+            ]
+        
         model_files = []
         for file in os.listdir(save_dir):
             if file.endswith('.pkl'):
@@ -575,6 +1060,33 @@ class ModelPersistence:
                 })
         
         return sorted(model_files, key=lambda x: x['modified'], reverse=True)
+    
+    @staticmethod
+    def load_latest_model(model_name, save_dir=None):
+        """
+        Carica il salvataggio piu' recente di un modello (es. per il warm start)
+        
+        Args:
+            model_name: Nome usato in save_model
+            save_dir: Directory da esplorare
+        
+        Returns:
+            Tupla (modello, filepath) oppure (None, None) se non esiste
+        """
+        from src.models.model_registry import get_model_registry
+        
+        registry = get_model_registry(save_dir) if os.path.exists(save_dir or MODELS_DIR) else None
+        if registry is not None:
+            registry.sync(save_dir, prune=True)
+            latest = registry.find(name=model_name, kind='pickle', limit=1)
+            if not latest:
+                return None, None
+            return registry.load(latest[0]['id']), latest[0]['path']
+        
+        for model_file in ModelPersistence.list_saved_models(save_dir):
+            if model_file['filename'].startswith(f"{model_name}_"):
+                return ModelPersistence.load_model(model_file['filepath']), model_file['filepath']
+        return None, None
 
 # ----------------5. Training Configuration
 
@@ -594,6 +1106,8 @@ class TrainingConfig:
         'test_size': 0.2,
         'cv_folds': 5,
         'use_hyperparameter_tuning': True,
+        'search_strategy': 'halving_random',
+        'tuning_time_budget': None,
         'models': ['LogisticRegression', 'RandomForestClassifier', 'GradientBoostingClassifier', 'SVC']
     }
     
@@ -601,6 +1115,8 @@ class TrainingConfig:
         'test_size': 0.2,
         'cv_folds': 10,
         'use_hyperparameter_tuning': True,
+        'search_strategy': 'bayesian',
+        'tuning_time_budget': 60,  # secondi per modello
         'use_ensemble': True,
         'models': ['LogisticRegression', 'RandomForestClassifier', 'GradientBoostingClassifier', 'SVC', 'DecisionTreeClassifier']
     }
@@ -669,7 +1185,11 @@ class TrainingPipelineManager:
             for model_type in self.config['models']:
                 if model_type in training_results:
                     try:
-                        tuning_results[model_type] = self.trainer.hyperparameter_tuning(model_type)
+                        tuning_results[model_type] = self.trainer.hyperparameter_tuning(
+                            model_type,
+                            strategy=self.config.get('search_strategy'),
+                            time_budget=self.config.get('tuning_time_budget')
+                        )
                     except:
                         continue  # Skip se non ha griglia parametri
         
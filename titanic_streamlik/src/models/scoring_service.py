@@ -0,0 +1,827 @@
+"""
+src/models/scoring_service.py
+Servizio di scoring a bassa latenza per singoli passeggeri: pipeline di
+preprocessing compilata in funzioni NumPy, micro-batching delle richieste
+concorrenti ed endpoint HTTP locale con latenze p50/p99
+"""
+
+import json
+import queue
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+from src.config import SCORING_SERVICE_CONFIG
+from src.utils.headless import emit, logger
+
+# ----------------1. Colonne Grezze
+def _column_kind(dtype):
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'int'
+    if pd.api.types.is_numeric_dtype(dtype):
+        return 'float'
+    return 'object'
+
+def _is_missing(values):
+    """Maschera dei mancanti per array numerici e object (None o NaN)"""
+    if values.dtype != object:
+        return np.isnan(values)
+    return pd.isna(values)
+
+def _map_values(values, func, dtype=object):
+    """
+    Applica func a ogni valore
+
+    Per i batch grandi func viene valutata solo sui valori distinti (i
+    chunk hanno poche categorie); per poche righe un ciclo diretto evita
+    il costo fisso di factorize.
+    """
+    if len(values) <= SCORING_SERVICE_CONFIG['vectorize_min_rows']:
+        return np.array([func(value) for value in values], dtype=dtype)
+    codes, uniques = pd.factorize(values, use_na_sentinel=False)
+    return np.array([func(value) for value in uniques], dtype=dtype)[codes]
+
+def _as_column(values, kind):
+    """
+    Array con lo stesso tipo che avrebbe la colonna pandas
+
+    Interi senza mancanti restano int64 (str(3) == '3' come in astype(str)),
+    con mancanti diventano float64; i mancanti object diventano NaN.
+    """
+    if kind == 'object':
+        column = np.array(values, dtype=object)
+        column[_is_missing(column)] = np.nan
+        return column
+
+    column = np.array([np.nan if value is None else value for value in values], dtype='float64')
+    if kind == 'int' and not np.isnan(column).any():
+        return column.astype('int64')
+    return column
+
+def _frame_column(series, kind):
+    """Come _as_column, ma direttamente da una colonna pandas (batch grandi)"""
+    if kind == 'object':
+        column = series.to_numpy(dtype=object, copy=True)
+        column[_is_missing(column)] = np.nan
+        return column
+
+    column = pd.to_numeric(series, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    if kind == 'int' and not np.isnan(column).any():
+        return column.astype('int64')
+    return column
+
+def _to_float(values):
+    return values if values.dtype == 'float64' else values.astype('float64')
+
+def _to_str(values):
+    return _map_values(values, str)
+
+def _lookup(values, table, default):
+    return _map_values(values, lambda value: table.get(value, default), dtype='float64')
+
+# ----------------2. Feature Engineering Compilato
+def _frozen_bins(edges, labels, include_lowest):
+    """Binning con i limiti calcolati sul riferimento (intervalli chiusi a destra)"""
+    labels = np.append(np.asarray(labels, dtype=object), np.nan)
+
+    def assign(values):
+        index = np.searchsorted(edges, values, side='left') - 1
+        if include_lowest:
+            index[values == edges[0]] = 0
+        index[(index < 0) | (index >= len(labels) - 1) | np.isnan(values)] = len(labels) - 1
+        return labels[index]
+    return assign
+
+def _compile_feature(name, reference):
+    """
+    Funzione NumPy di una feature di TitanicFeatureEngineer
+
+    Le feature calcolate su statistiche dell'intera colonna (mediana,
+    quantili, limiti dei bin) usano i valori del riferimento, cioe' i dati
+    su cui e' stata fittata la pipeline: una singola riga non puo'
+    ricalcolarle.
+
+    Returns:
+        Funzione colonne -> array
+    """
+    from src.utils import feature_registry as registry
+
+    if name == 'Title':
+        pattern = re.compile(registry.TITLE_PATTERN)
+
+        def title_of(value):
+            match = pattern.search(str(value))
+            return registry.TITLE_MAPPING.get(match.group(1), 'Other') if match else 'Unknown'
+        return lambda cols: _map_values(cols['Name'], title_of)
+
+    if name == 'Deck':
+        def deck_of(value):
+            first_char = str(value)[:1]
+            return first_char if value == value and first_char.isalpha() else 'Unknown'
+        return lambda cols: _map_values(cols['Cabin'], deck_of)
+
+    if name == 'Family_Size':
+        return lambda cols: cols['SibSp'] + cols['Parch'] + 1
+    if name == 'Is_Alone':
+        return lambda cols: (cols['Family_Size'] == 1).astype('int64')
+    if name == 'Family_Category':
+        def family_category(cols):
+            size = _to_float(cols['Family_Size'])
+            return registry.FAMILY_CATEGORY_LABELS[np.select([size == 1, size <= 4], [0, 1], default=2)]
+        return family_category
+    if name == 'Fare_Per_Person':
+        return lambda cols: _to_float(cols['Fare']) / cols['Family_Size']
+
+    if name in ('Fare_Log', 'Fare_Binned'):
+        median = float(reference['Fare'].median())
+        if name == 'Fare_Log':
+            return lambda cols: np.log1p(np.where(np.isnan(_to_float(cols['Fare'])), median, cols['Fare']))
+
+        labels = ['Low', 'Medium', 'High', 'Very_High']
+        _, edges = pd.qcut(reference['Fare'].fillna(median), q=4, labels=labels, retbins=True)
+        assign = _frozen_bins(edges, labels, include_lowest=True)
+        return lambda cols: assign(np.where(np.isnan(_to_float(cols['Fare'])), median, cols['Fare']))
+
+    if name == 'Age_Group':
+        def age_group(cols):
+            age = _to_float(cols['Age'])
+            group_index = np.searchsorted(registry.AGE_GROUP_LIMITS, age, side='right') + 1
+            group_index[np.isnan(age)] = 0
+            return registry.AGE_GROUP_LABELS[group_index]
+        return age_group
+
+    if name == 'Age_Binned':
+        median = float(reference['Age'].median())
+        labels = ['Very_Young', 'Young', 'Middle', 'Mature', 'Old']
+        _, edges = pd.cut(reference['Age'].fillna(median), bins=5, labels=labels, retbins=True)
+        assign = _frozen_bins(edges, labels, include_lowest=False)
+        return lambda cols: assign(np.where(np.isnan(_to_float(cols['Age'])), median, cols['Age']))
+
+    interactions = {'Sex_Pclass': ('Sex', 'Pclass'), 'Age_Sex': ('Age_Group', 'Sex'), 'Title_Pclass': ('Title', 'Pclass')}
+    if name in interactions:
+        left, right = interactions[name]
+        return lambda cols: _to_str(cols[left]) + '_' + _to_str(cols[right])
+
+    raise ValueError(f"Feature non compilabile: {name}")
+
+# ----------------3. Compilazione della Pipeline
+def _compile_scaler(scaler):
+    """Trasformazione affine equivalente a uno scaler sklearn fittato"""
+    from sklearn.preprocessing import MinMaxScaler, RobustScaler, StandardScaler
+
+    if isinstance(scaler, StandardScaler):
+        mean = scaler.mean_ if scaler.with_mean else 0.0
+        scale = scaler.scale_ if scaler.with_std else 1.0
+        return lambda X: (X - mean) / scale
+    if isinstance(scaler, RobustScaler):
+        center = scaler.center_ if scaler.with_centering else 0.0
+        scale = scaler.scale_ if scaler.with_scaling else 1.0
+        return lambda X: (X - center) / scale
+    if isinstance(scaler, MinMaxScaler):
+        low, high = scaler.feature_range
+        if scaler.clip:
+            return lambda X: np.clip(X * scaler.scale_ + scaler.min_, low, high)
+        return lambda X: X * scaler.scale_ + scaler.min_
+    raise ValueError(f"Scaler non compilabile: {type(scaler).__name__}")
+
+def _compile_step(step, X_in, X_out):
+    """
+    Operazione compilata di uno step della pipeline
+
+    Args:
+        step: Transformer fittato
+        X_in, X_out: Input e output dello step sul riferimento (per
+            statistiche congelate e ordine delle colonne)
+
+    Returns:
+        Funzione dizionario colonne -> dizionario colonne (gli scaler
+        restituiscono direttamente la matrice)
+    """
+    from sklearn.impute import SimpleImputer
+    from src.utils.ml_preprocessing import (
+        AdvancedEncoder, IntelligentFeatureSelector, OutlierHandler, SmartImputer, TitanicFeatureEngineer
+    )
+
+    if isinstance(step, TitanicFeatureEngineer):
+        # Feature nell'ordine di calcolo (dipendenze prima)
+        from src.utils.feature_registry import _resolve_order
+        added = [column for column in X_out.columns if column not in X_in.columns]
+        features = [(name, _compile_feature(name, X_in)) for name in _resolve_order(added)]
+
+        def engineer(cols):
+            for name, func in features:
+                cols[name] = func(cols)
+            return cols
+        return engineer
+
+    if isinstance(step, SmartImputer):
+        fills = []
+        for column, imputer in step.imputers_.items():
+            if type(imputer) is not SimpleImputer:
+                raise ValueError(f"Imputazione non compilabile: {type(imputer).__name__}")
+            fills.append((column, imputer.statistics_[0]))
+
+        def impute(cols):
+            for column, value in fills:
+                if column in cols:
+                    values = cols[column]
+                    missing = _is_missing(values)
+                    if missing.any():
+                        values = values.astype('float64') if values.dtype != object else values.copy()
+                        values[missing] = value
+                        cols[column] = values
+            return cols
+        return impute
+
+    if isinstance(step, OutlierHandler):
+        bounds = [(column, bound) for column, bound in step.outlier_bounds_.items() if column in X_in.columns]
+        if step.action == 'transform' and bounds:
+            raise ValueError("OutlierHandler con action='transform' dipende dal batch: non compilabile")
+        if step.action != 'clip':
+            return lambda cols: cols
+
+        def clip(cols):
+            for column, (lower, upper) in bounds:
+                cols[column] = np.clip(_to_float(cols[column]), lower, upper)
+            return cols
+        return clip
+
+    if isinstance(step, AdvancedEncoder):
+        operations = []
+        for column, encoder in step.encoders_.items():
+            method = step.encoding_methods_[column]
+            if method == 'onehot':
+                categories = list(encoder.categories_[0])
+                operations.append((column, 'onehot', {value: i for i, value in enumerate(categories)},
+                                   [f"{column}_{value}" for value in categories]))
+            elif method == 'target' and isinstance(encoder, dict):
+                operations.append((column, 'target', encoder, encoder.get('__unknown__', 0)))
+            else:
+                # Valori non visti -> prima classe (come AdvancedEncoder.transform)
+                operations.append((column, 'label', {value: i for i, value in enumerate(encoder.classes_)}, 0))
+
+        def encode(cols):
+            for column, method, table, extra in operations:
+                if column not in cols:
+                    continue
+                if method == 'label':
+                    cols[column] = _lookup(_to_str(cols[column]), table, extra)
+                elif method == 'target':
+                    cols[column] = _lookup(cols[column], table, extra)
+                else:
+                    values = cols.pop(column)
+                    positions = _map_values(values, lambda value: table.get(value, -1), dtype='int64')
+                    for i, name in enumerate(extra):
+                        cols[name] = (positions == i).astype('float64')
+            return cols
+        return encode
+
+    if isinstance(step, IntelligentFeatureSelector):
+        # Solo selezione di colonne: l'ordine di uscita e' applicato dopo ogni step
+        return lambda cols: cols
+
+    if hasattr(step, 'scale_'):
+        affine = _compile_scaler(step)
+        names_in = list(X_in.columns) if isinstance(X_in, pd.DataFrame) else list(range(X_in.shape[1]))
+
+        def scale(cols):
+            X = cols if isinstance(cols, np.ndarray) else np.column_stack([_to_float(cols[name]) for name in names_in])
+            return affine(X)
+        scale.accepts_matrix = True
+        return scale
+
+    raise ValueError(f"Step non compilabile: {type(step).__name__}")
+
+def _fallback_step(step, X_in):
+    """
+    Step non compilabile eseguito con step.transform sulle sole righe richieste
+
+    Le colonne ricevute dagli step compilati precedenti tornano in un
+    DataFrame con i tipi del riferimento; gli altri step restano compilati
+    (es. bin di Fare ed Age congelati nel TitanicFeatureEngineer).
+    """
+    names_in = _output_names(X_in)
+    dtypes = X_in.dtypes if isinstance(X_in, pd.DataFrame) else None
+
+    def transform(cols):
+        if isinstance(cols, np.ndarray):
+            frame = pd.DataFrame(cols, columns=names_in)
+        else:
+            frame = pd.DataFrame({name: cols[name] for name in names_in})
+        if dtypes is not None:
+            for name in names_in:
+                try:
+                    frame[name] = frame[name].astype(dtypes[name])
+                except (TypeError, ValueError):
+                    # Es. interi con mancanti: resta il tipo compilato
+                    pass
+        X_out = step.transform(frame)
+        if isinstance(X_out, pd.DataFrame):
+            return {name: X_out[name].to_numpy() for name in X_out.columns}
+        return np.asarray(X_out, dtype='float64')
+    transform.accepts_matrix = True
+    return transform
+
+def _output_names(X):
+    return list(X.columns) if isinstance(X, pd.DataFrame) else list(range(X.shape[1]))
+
+class CompiledFeaturePipeline:
+    """
+    Pipeline di preprocessing fittata compilata in funzioni NumPy
+
+    Ogni step diventa un'operazione su un dizionario colonna -> array
+    (tabelle di lookup per gli encoder, valori di riempimento per
+    l'imputazione, trasformazioni affini per gli scaler): niente DataFrame
+    ne' dispatch sklearn per singola richiesta. Le statistiche che la
+    pipeline ricalcola su ogni batch (bin di Fare ed Age, mediane) sono
+    congelate sui dati di riferimento, quindi una singola riga viene
+    trasformata come se facesse parte del training. Gli step non
+    compilabili (es. IterativeImputer) vengono eseguiti con il loro
+    transform solo sulle righe richieste (fallback_steps).
+    """
+
+    def __init__(self, pipeline, X_reference, verify=True):
+        """
+        Args:
+            pipeline: Pipeline sklearn fittata (create_titanic_preprocessing_pipeline)
+            X_reference: Dati su cui e' stata fittata la pipeline (X_train)
+            verify: Confronta l'output compilato con pipeline.transform sul riferimento
+
+        Raises:
+            ValueError: Se la verifica fallisce
+        """
+        self.input_columns = list(X_reference.columns)
+        self.input_kinds = {column: _column_kind(X_reference[column].dtype) for column in self.input_columns}
+
+        self.steps = []
+        self.fallback_steps = []
+        X = X_reference
+        for step_name, step in pipeline.steps:
+            X_out = step.transform(X)
+            try:
+                operation = _compile_step(step, X, X_out)
+            except ValueError:
+                operation = _fallback_step(step, X)
+                self.fallback_steps.append(step_name)
+            self.steps.append((operation, _output_names(X_out)))
+            X = X_out
+
+        self.output_names = _output_names(X)
+        self.output_is_frame = isinstance(X, pd.DataFrame)
+
+        if verify:
+            expected = np.asarray(X, dtype='float64')
+            compiled = self.transform(X_reference)
+            tolerance = SCORING_SERVICE_CONFIG['verify_tolerance']
+            if expected.shape != compiled.shape or not np.allclose(compiled, expected, rtol=tolerance,
+                                                                   atol=tolerance, equal_nan=True):
+                raise ValueError("Output della pipeline compilata diverso da pipeline.transform")
+
+    def _run(self, cols):
+        for operation, names in self.steps:
+            if isinstance(cols, np.ndarray) and not getattr(operation, 'accepts_matrix', False):
+                cols = {i: cols[:, i] for i in range(cols.shape[1])}
+            cols = operation(cols)
+            if not isinstance(cols, np.ndarray):
+                cols = {name: cols[name] for name in names}
+        if isinstance(cols, np.ndarray):
+            # Output di uno scaler: matrice gia' nell'ordine finale
+            return cols
+        return np.column_stack([_to_float(cols[name]) for name in self.output_names])
+
+    def transform_records(self, records):
+        """
+        Matrice delle features per una lista di passeggeri
+
+        Args:
+            records: Lista di dizionari colonna -> valore (colonne mancanti = NaN)
+
+        Returns:
+            Array float64 n_records x n_features
+        """
+        cols = {
+            column: _as_column([record.get(column) for record in records], kind)
+            for column, kind in self.input_kinds.items()
+        }
+        return self._run(cols)
+
+    def transform(self, X):
+        """Matrice delle features per un DataFrame con le colonne di input"""
+        cols = {
+            column: _frame_column(X[column], kind) if column in X.columns
+            else _as_column([None] * len(X), kind)
+            for column, kind in self.input_kinds.items()
+        }
+        return self._run(cols)
+
+def compile_model_input(preprocessor, feature_names):
+    """
+    DataPreprocessor di ModelTrainer compilato in selezione di colonne + scaling
+
+    Args:
+        preprocessor: DataPreprocessor fittato sull'output della pipeline (o None)
+        feature_names: Nomi delle colonne in uscita dalla pipeline
+
+    Returns:
+        Funzione matrice -> matrice per il modello
+    """
+    if preprocessor is None:
+        return lambda X: X
+    if getattr(preprocessor, 'label_encoders', None):
+        raise ValueError("Preprocessor con encoding categorico: non compilabile")
+
+    positions = {name: i for i, name in enumerate(feature_names)}
+    columns = np.array([positions.get(name, -1) for name in preprocessor.feature_names])
+    missing = columns < 0
+    affine = _compile_scaler(preprocessor.scaler) if preprocessor.scaler is not None else None
+
+    def model_input(X):
+        X = X[:, np.where(missing, 0, columns)]
+        if missing.any():
+            # Colonne assenti = 0 (come DataPreprocessor.transform)
+            X[:, missing] = 0.0
+        return affine(X) if affine is not None else X
+    return model_input
+
+# ----------------4. Latenze
+class LatencyTracker:
+    """Ultime latenze registrate (finestra scorrevole) con percentili"""
+
+    def __init__(self, window=None):
+        self._latencies = deque(maxlen=window or SCORING_SERVICE_CONFIG['latency_window'])
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+            self.count += 1
+
+    def summary(self):
+        """
+        Returns:
+            Dizionario con count, p50_ms, p90_ms, p99_ms, max_ms (finestra corrente)
+        """
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            count = self.count
+        if len(latencies) == 0:
+            return {'count': count, 'p50_ms': None, 'p90_ms': None, 'p99_ms': None, 'max_ms': None}
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        return {'count': count, 'p50_ms': float(p50), 'p90_ms': float(p90), 'p99_ms': float(p99),
+                'max_ms': float(latencies.max())}
+
+# ----------------5. Servizio di Scoring
+class _TrainedEstimator:
+    """Adattatore per stimatori sklearn passati senza TitanicModel"""
+
+    def __init__(self, model):
+        self.model = model
+        self.is_trained = True
+
+class ScoringService:
+    """
+    Scoring di passeggeri con tutti i modelli addestrati
+
+    Le features vengono calcolate una volta per richiesta (pipeline
+    compilata), poi ogni gruppo di modelli con lo stesso preprocessor viene
+    valutato una sola volta con ModelEnsemble.score_members. Se la pipeline
+    non e' compilabile si usa pipeline.transform (percorso lento).
+    """
+
+    def __init__(self, pipeline, models, X_reference, preprocessors=None, n_jobs=None):
+        """
+        Args:
+            pipeline: Pipeline di preprocessing fittata
+            models: Dizionario nome -> TitanicModel (o stimatore sklearn)
+            X_reference: Dati di fit della pipeline
+            preprocessors: Dizionario nome -> DataPreprocessor applicato dopo
+                la pipeline durante il training (ModelTrainer.preprocessors)
+            n_jobs: Thread per valutare i modelli (vedi ModelEnsemble)
+        """
+        from src.models.ml_models import ModelEnsemble
+
+        self.pipeline = pipeline
+        self.input_columns = list(X_reference.columns)
+        preprocessors = preprocessors or {}
+        models = {name: model if hasattr(model, 'is_trained') else _TrainedEstimator(model)
+                  for name, model in models.items()}
+        models = {name: model for name, model in models.items() if model.is_trained}
+        if not models:
+            raise ValueError("Nessun modello addestrato da servire")
+
+        try:
+            self.features = CompiledFeaturePipeline(pipeline, X_reference)
+            feature_names = self.features.output_names
+            if self.features.fallback_steps:
+                emit('info', "Step non compilati, eseguiti con transform sulle sole righe richieste: "
+                     + ", ".join(self.features.fallback_steps),
+                     source='ScoringService', fallback_steps=self.features.fallback_steps)
+        except ValueError as e:
+            emit('warning', f"Pipeline non compilata, scoring tramite pipeline.transform: {e}",
+                 source='ScoringService')
+            self.features = None
+            feature_names = _output_names(pipeline.transform(X_reference))
+
+        # Un gruppo per preprocessor: stessa matrice di input per tutti i suoi modelli
+        groups = {}
+        for name, model in models.items():
+            preprocessor = preprocessors.get(name)
+            groups.setdefault(id(preprocessor), (preprocessor, {}))[1][name] = model
+
+        self.groups = []
+        for preprocessor, group_models in groups.values():
+            model_input = None
+            if self.features is not None:
+                try:
+                    model_input = compile_model_input(preprocessor, feature_names)
+                except ValueError:
+                    model_input = None
+            self.groups.append((preprocessor, model_input, ModelEnsemble(group_models, n_jobs=n_jobs)))
+
+        self.model_names = [name for _, _, ensemble in self.groups for name in ensemble.models]
+        self._voter = ModelEnsemble(models)
+        self.latency = LatencyTracker()
+
+    @property
+    def is_compiled(self):
+        return self.features is not None
+
+    def _feature_matrix(self, records):
+        if self.features is not None:
+            return self.features.transform_records(records)
+        return self.pipeline.transform(pd.DataFrame.from_records(records, columns=self.input_columns))
+
+    def _group_input(self, preprocessor, model_input, X):
+        if model_input is not None:
+            return model_input(X)
+        if preprocessor is None:
+            return X
+        frame = X if isinstance(X, pd.DataFrame) else pd.DataFrame(X)
+        return preprocessor.transform(frame)
+
+    def _score_features(self, X):
+        """Matrici di score e di etichette (n_samples x n_modelli) e maschera dei modelli con probabilita'"""
+        blocks = [ensemble.score_members(self._group_input(preprocessor, model_input, X))
+                  for preprocessor, model_input, ensemble in self.groups]
+        scores = np.hstack([block[0] for block in blocks])
+        has_proba = np.concatenate([block[2] for block in blocks])
+        labels = np.hstack([block[3] for block in blocks])
+        return scores, has_proba, labels
+
+    def score(self, records):
+        """
+        Predizioni per una lista di passeggeri
+
+        Args:
+            records: Lista di dizionari (Pclass, Sex, Age, SibSp, Parch, Fare, Embarked, ...)
+
+        Returns:
+            Lista di dizionari con prediction (voto a maggioranza), probability
+            (media delle probabilita'), votes e il dettaglio per modello
+        """
+        start = time.perf_counter()
+        scores, has_proba, labels = self._score_features(self._feature_matrix(records))
+
+        hard = self._voter.vote(scores, has_proba, 'hard', labels)
+        soft = self._voter.vote(scores, has_proba, 'soft')
+
+        results = []
+        for row in range(len(records)):
+            results.append({
+                'prediction': int(hard[row]),
+                'probability': float(soft[row]) if soft is not None else None,
+                'votes': int(labels[row].sum()),
+                'n_models': len(self.model_names),
+                'models': {
+                    name: {
+                        'prediction': int(labels[row, column]),
+                        'probability': float(scores[row, column]) if has_proba[column] else None
+                    }
+                    for column, name in enumerate(self.model_names)
+                }
+            })
+
+        self.latency.record(time.perf_counter() - start)
+        return results
+
+    def score_one(self, record):
+        """Predizione per un singolo passeggero"""
+        return self.score([record])[0]
+
+    def score_frame(self, X):
+        """
+        Predizioni vettoriali per un DataFrame (batch e chunk di file)
+
+        Con la pipeline compilata le statistiche sono quelle del training,
+        quindi chunk diversi dello stesso file sono trasformati allo stesso
+        modo.
+
+        Returns:
+            DataFrame (stesso indice di X) con prediction, probability (NaN
+            se nessun modello ha predict_proba) e votes
+        """
+        if self.features is not None:
+            features = self.features.transform(X)
+        else:
+            features = self.pipeline.transform(X)
+        scores, has_proba, labels = self._score_features(features)
+
+        soft = self._voter.vote(scores, has_proba, 'soft')
+        return pd.DataFrame({
+            'prediction': self._voter.vote(scores, has_proba, 'hard', labels).astype('int8'),
+            'probability': soft if soft is not None else np.full(len(X), np.nan, dtype='float32'),
+            'votes': labels.sum(axis=1).astype('int16')
+        }, index=X.index)
+
+# ----------------6. Micro-Batching
+_STOP = object()
+
+class MicroBatcher:
+    """
+    Raggruppa le richieste concorrenti in un'unica chiamata di scoring
+
+    Un thread dedicato prende la prima richiesta in coda, aggiunge quelle
+    gia' arrivate o in arrivo entro max_wait_ms (fino a max_batch_size) e
+    valuta il lotto con una sola chiamata; ogni richiesta riceve il proprio
+    risultato tramite Future. Se il lotto fallisce i record vengono
+    rivalutati uno alla volta, cosi' l'errore arriva solo alla richiesta
+    che lo ha causato.
+    """
+
+    def __init__(self, score_batch, max_batch_size=None, max_wait_ms=None):
+        """
+        Args:
+            score_batch: Funzione lista di record -> lista di risultati
+        """
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size or SCORING_SERVICE_CONFIG['max_batch_size']
+        wait_ms = SCORING_SERVICE_CONFIG['max_wait_ms'] if max_wait_ms is None else max_wait_ms
+        self.max_wait = wait_ms / 1000
+        self.n_batches = 0
+        self.n_requests = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='titanic-micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, record):
+        """Accoda un record; restituisce un Future con il risultato"""
+        future = Future()
+        self._queue.put((record, future))
+        return future
+
+    def score(self, record, timeout=None):
+        """Scoring sincrono di un record tramite la coda"""
+        return self.submit(record).result(timeout)
+
+    def close(self):
+        """Ferma il thread dopo aver servito le richieste in coda"""
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if item is _STOP:
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = self._collect(first)
+            self.n_batches += 1
+            self.n_requests += len(batch)
+            try:
+                results = self.score_batch([record for record, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    batch[0][1].set_exception(e)
+                    continue
+                # Un record non valido non deve far fallire gli altri: uno alla volta
+                for record, future in batch:
+                    try:
+                        future.set_result(self.score_batch([record])[0])
+                    except Exception as record_error:
+                        future.set_exception(record_error)
+                continue
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+# ----------------7. Endpoint HTTP Locale
+def create_http_server(service, host=None, port=None, max_batch_size=None, max_wait_ms=None):
+    """
+    Server HTTP (thread per richiesta) davanti a ScoringService
+
+    - POST /predict: un passeggero (oggetto JSON, via micro-batching) oppure
+      una lista di passeggeri (scoring diretto)
+    - GET /stats: latenze p50/p99 di scoring e HTTP, dimensione media dei lotti
+    - GET /health: stato e modelli serviti
+
+    Returns:
+        ThreadingHTTPServer (avvio con serve_forever o start_http_server)
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    batcher = MicroBatcher(service.score, max_batch_size, max_wait_ms)
+    http_latency = LatencyTracker()
+
+    class ScoringHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send(200, {'status': 'ok', 'compiled': service.is_compiled, 'models': service.model_names})
+            elif self.path == '/stats':
+                self._send(200, {
+                    'scoring': service.latency.summary(),
+                    'http': http_latency.summary(),
+                    'micro_batches': batcher.n_batches,
+                    'mean_batch_size': batcher.n_requests / batcher.n_batches if batcher.n_batches else None
+                })
+            else:
+                self._send(404, {'error': f"Percorso non trovato: {self.path}"})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send(404, {'error': f"Percorso non trovato: {self.path}"})
+                return
+
+            start = time.perf_counter()
+            try:
+                payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'null')
+                if isinstance(payload, dict):
+                    result = batcher.score(payload)
+                elif isinstance(payload, list):
+                    invalid = [i for i, record in enumerate(payload) if not isinstance(record, dict)]
+                    if invalid:
+                        raise ValueError(f"Elementi della lista non validi (attesi oggetti JSON): {invalid[:10]}")
+                    result = service.score(payload)
+                else:
+                    raise ValueError("Atteso un oggetto JSON (passeggero) o una lista di passeggeri")
+            except (ValueError, TypeError, KeyError) as e:
+                self._send(400, {'error': str(e)})
+                return
+            except Exception as e:
+                logger.exception("Errore nello scoring della richiesta")
+                self._send(500, {'error': f"Errore interno: {type(e).__name__}: {e}"})
+                return
+            self._send(200, result)
+            http_latency.record(time.perf_counter() - start)
+
+        def log_message(self, format, *args):
+            logger.debug(format, *args)
+
+    server = ThreadingHTTPServer((host or SCORING_SERVICE_CONFIG['host'],
+                                  SCORING_SERVICE_CONFIG['port'] if port is None else port), ScoringHandler)
+    server.daemon_threads = True
+    server.batcher = batcher
+    server.http_latency = http_latency
+    return server
+
+def start_http_server(service, host=None, port=None, **kwargs):
+    """
+    Avvia l'endpoint in un thread in background
+
+    Returns:
+        Server avviato (stop_http_server per fermarlo)
+    """
+    server = create_http_server(service, host, port, **kwargs)
+    threading.Thread(target=server.serve_forever, name='titanic-scoring-http', daemon=True).start()
+    host, port = server.server_address[:2]
+    emit('info', f"Endpoint di scoring su http://{host}:{port}/predict", source='start_http_server',
+         host=host, port=port)
+    return server
+
+def stop_http_server(server):
+    """Ferma il server e il micro-batcher"""
+    server.shutdown()
+    server.server_close()
+    server.batcher.close()
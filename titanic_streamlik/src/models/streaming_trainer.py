@@ -0,0 +1,304 @@
+"""
+src/models/streaming_trainer.py
+Training out-of-core con partial_fit su chunk del livello di ingestione
+(regressione logistica via SGD, Naive Bayes gaussiano, MLP)
+"""
+
+import copy
+import time
+import numpy as np
+import pandas as pd
+from src.config import STREAMING_TRAINING_CONFIG
+from src.utils.headless import emit
+
+# ----------------1. Stimatori con partial_fit
+def _sgd_logistic_regression(**params):
+    from sklearn.linear_model import SGDClassifier
+    params.setdefault('loss', 'log_loss')
+    params.setdefault('alpha', 1e-4)
+    return SGDClassifier(**params)
+
+def _gaussian_nb(**params):
+    from sklearn.naive_bayes import GaussianNB
+    params.pop('random_state', None)
+    return GaussianNB(**params)
+
+def _mlp(**params):
+    from sklearn.neural_network import MLPClassifier
+    params.setdefault('hidden_layer_sizes', (100,))
+    return MLPClassifier(**params)
+
+# model_type -> (costruttore, un solo passaggio sui dati)
+STREAMING_ESTIMATORS = {
+    'LogisticRegression': (_sgd_logistic_regression, False),
+    'GaussianNB': (_gaussian_nb, True),
+    'MLPClassifier': (_mlp, False)
+}
+
+def create_streaming_model(model_type, **params):
+    """
+    TitanicModel del tipo richiesto con uno stimatore che supporta partial_fit
+
+    LogisticRegression usa SGDClassifier con loss logistica (stessa
+    interfaccia: coef_, predict_proba).
+    """
+    from src.models.ml_models import ModelFactory
+
+    if model_type not in STREAMING_ESTIMATORS:
+        raise ValueError(f"Training in streaming non supportato per {model_type}")
+
+    factory, _ = STREAMING_ESTIMATORS[model_type]
+    model = ModelFactory.create_model(model_type)
+    model.model = factory(**params)
+    model.hyperparameters = params
+    return model
+
+# ----------------2. Encoder Incrementale delle Features
+class StreamingFeatureEncoder:
+    """
+    Preprocessing fittabile a chunk (alternativa streaming a DataPreprocessor)
+
+    Numeriche: imputazione con la media e standardizzazione (StandardScaler
+    con partial_fit, i NaN sono ignorati). Categoriche: one-hot con le
+    categorie viste durante il fit; valori nuovi vanno in colonne a zero.
+    """
+
+    def __init__(self, numeric_features=None, categorical_features=None):
+        self.numeric_features = list(numeric_features or STREAMING_TRAINING_CONFIG['numeric_features'])
+        self.categorical_features = list(categorical_features or STREAMING_TRAINING_CONFIG['categorical_features'])
+        self.categories_ = {}
+        self.scaler_ = None
+        self.feature_names = None
+        self.is_fitted = False
+
+    def partial_fit(self, chunk):
+        """Aggiorna medie/varianze e categorie con un chunk"""
+        from sklearn.preprocessing import StandardScaler
+
+        if self.scaler_ is None:
+            # Solo le colonne presenti nella sorgente
+            self.numeric_features = [col for col in self.numeric_features if col in chunk.columns]
+            self.categorical_features = [col for col in self.categorical_features if col in chunk.columns]
+            self.scaler_ = StandardScaler()
+
+        if self.numeric_features and len(chunk):
+            self.scaler_.partial_fit(chunk[self.numeric_features].to_numpy(dtype='float64'))
+        for col in self.categorical_features:
+            values = chunk[col].dropna().astype(str).unique()
+            self.categories_.setdefault(col, set()).update(values.tolist())
+        return self
+
+    def finalize(self):
+        """Fissa l'ordine delle categorie e i nomi delle features"""
+        self.categories_ = {col: sorted(values) for col, values in self.categories_.items()}
+        self.feature_names = self.numeric_features + [
+            f"{col}_{value}" for col in self.categorical_features for value in self.categories_.get(col, [])
+        ]
+        self.is_fitted = True
+        return self
+
+    def transform(self, chunk):
+        """
+        Trasforma un chunk nella matrice di features (float32)
+
+        Returns:
+            DataFrame con colonne feature_names e lo stesso indice del chunk
+        """
+        if not self.is_fitted:
+            raise ValueError("Encoder deve essere fittato prima del transform")
+
+        blocks = []
+        if self.numeric_features:
+            numeric = chunk[self.numeric_features].to_numpy(dtype='float64')
+            # Media di training per i valori mancanti (0 dopo la standardizzazione)
+            numeric = np.where(np.isnan(numeric), self.scaler_.mean_, numeric)
+            blocks.append(self.scaler_.transform(numeric))
+
+        for col in self.categorical_features:
+            categories = self.categories_.get(col, [])
+            codes = pd.Categorical(chunk[col].astype(str), categories=categories).codes
+            one_hot = np.zeros((len(chunk), len(categories)))
+            rows = np.flatnonzero(codes >= 0)
+            one_hot[rows, codes[rows]] = 1.0
+            blocks.append(one_hot)
+
+        values = np.hstack(blocks) if blocks else np.empty((len(chunk), 0))
+        return pd.DataFrame(values.astype('float32'), columns=self.feature_names, index=chunk.index)
+
+# ----------------3. Training in Streaming
+def split_validation_rows(chunk, validation_fraction):
+    """
+    Maschera delle righe di validazione (deterministica)
+
+    Dipende solo dal contenuto della riga (hash), quindi la stessa riga
+    resta nello stesso insieme a ogni epoca e con qualsiasi chunksize.
+    """
+    from src.utils.data_processor import RowDeduplicator
+
+    if not validation_fraction:
+        return np.zeros(len(chunk), dtype=bool)
+    buckets = RowDeduplicator.hash_rows(chunk) % np.uint64(10_000)
+    return buckets < np.uint64(int(round(validation_fraction * 10_000)))
+
+class StreamingTrainer:
+    """
+    Addestra un modello con partial_fit leggendo i dati a chunk
+
+    - passaggio iniziale: fit dell'encoder sulle sole righe di training
+    - ogni epoca: un passaggio di training (righe mescolate nel chunk,
+      mini-batch da batch_size) e uno di validazione sulle righe escluse
+    - early stopping sulla log loss di validazione; a fine training viene
+      ripristinato il modello dell'epoca migliore
+
+    La memoria e' limitata dal chunk piu' grande: il dataset completo non
+    viene mai materializzato.
+    """
+
+    def __init__(self, model_type, chunk_factory, target='Survived', epochs=None, batch_size=None,
+                 validation_fraction=None, early_stopping_rounds=None, tol=None,
+                 numeric_features=None, categorical_features=None, random_state=None, model_params=None):
+        """
+        Args:
+            model_type: 'LogisticRegression', 'GaussianNB' o 'MLPClassifier'
+            chunk_factory: Funzione senza argomenti che restituisce un nuovo
+                iteratore di DataFrame (chiamata a ogni passaggio)
+        """
+        config = STREAMING_TRAINING_CONFIG
+        self.model_type = model_type
+        self.chunk_factory = chunk_factory
+        self.target = target
+        self.epochs = epochs or config['epochs']
+        self.batch_size = batch_size or config['batch_size']
+        self.validation_fraction = config['validation_fraction'] if validation_fraction is None else validation_fraction
+        self.early_stopping_rounds = config['early_stopping_rounds'] if early_stopping_rounds is None else early_stopping_rounds
+        self.tol = config['tol'] if tol is None else tol
+        self.random_state = config['random_state'] if random_state is None else random_state
+
+        params = dict(model_params or {})
+        params.setdefault('random_state', self.random_state)
+        self.model = create_streaming_model(model_type, **params)
+        self.single_pass = STREAMING_ESTIMATORS[model_type][1]
+        self.encoder = StreamingFeatureEncoder(numeric_features, categorical_features)
+        self.history_ = []
+
+    @classmethod
+    def from_source(cls, model_type, source=None, chunksize=None, **kwargs):
+        """
+        Trainer che legge il CSV pulito a chunk (iter_cleaned_chunks)
+
+        Le statistiche di pulizia sono calcolate una sola volta e riusate
+        a ogni epoca.
+        """
+        from src.utils.data_loader import iter_titanic_chunks
+        from src.utils.data_processor import compute_cleaning_statistics, iter_cleaned_chunks
+
+        stats = compute_cleaning_statistics(iter_titanic_chunks(source, chunksize))
+        return cls(model_type, lambda: iter_cleaned_chunks(source, chunksize, stats=stats), **kwargs)
+
+    def _iter_split(self):
+        """Chunk con target noto divisi in (train, validation)"""
+        for chunk in self.chunk_factory():
+            chunk = chunk[chunk[self.target].notna()]
+            if chunk.empty:
+                continue
+            validation = split_validation_rows(chunk, self.validation_fraction)
+            yield chunk[~validation], chunk[validation]
+
+    def _fit_encoder(self):
+        classes = set()
+        for train_chunk, _ in self._iter_split():
+            self.encoder.partial_fit(train_chunk)
+            classes.update(train_chunk[self.target].astype(int).unique().tolist())
+        self.encoder.finalize()
+        self.classes_ = np.array(sorted(classes))
+        if len(self.classes_) < 2:
+            raise ValueError("Il training richiede almeno due classi nel target")
+
+    def _train_epoch(self, rng):
+        estimator = self.model.model
+        n_rows = 0
+        for train_chunk, _ in self._iter_split():
+            if train_chunk.empty:
+                continue
+            X = self.encoder.transform(train_chunk).to_numpy()
+            y = train_chunk[self.target].to_numpy(dtype=int)
+            order = rng.permutation(len(y))
+            for start in range(0, len(y), self.batch_size):
+                batch = order[start:start + self.batch_size]
+                estimator.partial_fit(X[batch], y[batch], classes=self.classes_)
+            n_rows += len(y)
+        return n_rows
+
+    def _validate(self):
+        """Accuratezza e log loss sulle righe di validazione (accumulate per chunk)"""
+        estimator = self.model.model
+        n_rows, n_correct, total_log_loss = 0, 0, 0.0
+        for _, validation_chunk in self._iter_split():
+            if validation_chunk.empty:
+                continue
+            X = self.encoder.transform(validation_chunk).to_numpy()
+            y = validation_chunk[self.target].to_numpy(dtype=int)
+            proba = estimator.predict_proba(X)
+            predicted = self.classes_[proba.argmax(axis=1)]
+            positions = np.searchsorted(self.classes_, y)
+            true_proba = np.clip(proba[np.arange(len(y)), positions], 1e-15, 1.0)
+
+            n_rows += len(y)
+            n_correct += int((predicted == y).sum())
+            total_log_loss -= float(np.log(true_proba).sum())
+
+        if n_rows == 0:
+            return {'val_rows': 0, 'val_accuracy': np.nan, 'val_log_loss': np.nan}
+        return {'val_rows': n_rows, 'val_accuracy': n_correct / n_rows, 'val_log_loss': total_log_loss / n_rows}
+
+    def fit(self, progress_callback=None):
+        """
+        Esegue il training
+
+        Args:
+            progress_callback: Callback (progresso, messaggio) come in ModelTrainer
+
+        Returns:
+            TitanicModel addestrato (feature_names dall'encoder)
+        """
+        rng = np.random.default_rng(self.random_state)
+        epochs = 1 if self.single_pass else self.epochs
+
+        if progress_callback:
+            progress_callback(0.0, "Fit dell'encoder sulle righe di training...")
+        self._fit_encoder()
+
+        best_loss, best_estimator, rounds_without_improvement = np.inf, None, 0
+        self.history_ = []
+        for epoch in range(1, epochs + 1):
+            start = time.perf_counter()
+            train_rows = self._train_epoch(rng)
+            metrics = self._validate()
+            metrics.update({'epoch': epoch, 'train_rows': train_rows, 'seconds': time.perf_counter() - start})
+            self.history_.append(metrics)
+
+            if progress_callback:
+                progress_callback(epoch / epochs, f"Epoca {epoch}/{epochs}: "
+                                                  f"val_accuracy {metrics['val_accuracy']:.4f}")
+
+            val_loss = metrics['val_log_loss']
+            if np.isnan(val_loss):
+                continue
+            if val_loss < best_loss - self.tol:
+                best_loss, best_estimator, rounds_without_improvement = val_loss, copy.deepcopy(self.model.model), 0
+            else:
+                rounds_without_improvement += 1
+                if self.early_stopping_rounds and rounds_without_improvement >= self.early_stopping_rounds:
+                    break
+
+        if best_estimator is not None:
+            self.model.model = best_estimator
+        self.model.is_trained = True
+        self.model.feature_names = self.encoder.feature_names
+
+        best = min(self.history_, key=lambda m: m['val_log_loss'] if not np.isnan(m['val_log_loss']) else np.inf)
+        emit('info', f"Training streaming {self.model_type}: {len(self.history_)} epoche, "
+             f"{best['train_rows']:,} righe per epoca, val_accuracy {best['val_accuracy']:.4f}",
+             source='StreamingTrainer', model_type=self.model_type, epochs=len(self.history_),
+             best_epoch=best['epoch'])
+        return self.model
@@ -0,0 +1,144 @@
+"""
+src/models/trial_store.py
+Archivio persistente (SQLite) dei candidati valutati dalle ricerche di
+iperparametri, per riprendere ricerche interrotte o ripetute
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import numpy as np
+from src.config import TRIAL_STORE_CONFIG
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trials (
+    context TEXT NOT NULL,
+    data_fingerprint TEXT NOT NULL,
+    param_hash TEXT NOT NULL,
+    params TEXT NOT NULL,
+    mean_score REAL,
+    std_score REAL,
+    fit_time REAL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (context, data_fingerprint, param_hash)
+)
+"""
+
+# ----------------1. Chiavi
+def _to_json(value):
+    return json.dumps(value, sort_keys=True, default=repr)
+
+def param_hash(params):
+    """Hash stabile di una combinazione di iperparametri"""
+    return hashlib.sha1(_to_json(params).encode()).hexdigest()
+
+def estimator_signature(estimator):
+    """
+    Impronta della configurazione di uno stimatore (o pipeline)
+
+    Considera tutti i parametri (deep=True); gli oggetti annidati
+    contribuiscono con il nome della classe.
+    """
+    params = estimator.get_params(deep=True)
+    return hashlib.sha1(
+        json.dumps(params, sort_keys=True, default=lambda obj: type(obj).__name__).encode()
+    ).hexdigest()[:16]
+
+def _score_or_nan(value):
+    return np.nan if value is None else value
+
+def _score_or_null(value):
+    return None if value is None or np.isnan(value) else float(value)
+
+# ----------------2. Archivio
+class TrialStore:
+    """
+    Archivio SQLite dei candidati valutati
+
+    Ogni risultato e' identificato da (contesto, impronta dei dati, hash dei
+    parametri): il contesto descrive cosa viene valutato (funzione, modello,
+    scoring, splitter, configurazione dello stimatore). Ogni operazione apre
+    una propria connessione, quindi l'archivio puo' essere usato da piu'
+    processi e sopravvive ai riavvii.
+    """
+
+    def __init__(self, path=None, timeout=None):
+        self.path = path or TRIAL_STORE_CONFIG['path']
+        self.timeout = timeout if timeout is not None else TRIAL_STORE_CONFIG['timeout']
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(_SCHEMA)
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=self.timeout)
+
+    def load_trials(self, context, data_fingerprint):
+        """
+        Risultati gia' salvati per contesto e dati
+
+        Le righe senza score (candidati falliti salvati da versioni
+        precedenti) sono ignorate: il candidato viene rivalutato.
+
+        Returns:
+            Dizionario param_hash -> {params, mean_score, std_score, fit_time}
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT param_hash, params, mean_score, std_score, fit_time FROM trials '
+                'WHERE context = ? AND data_fingerprint = ? AND mean_score IS NOT NULL',
+                (context, data_fingerprint)
+            ).fetchall()
+
+        return {
+            row[0]: {
+                'params': json.loads(row[1]),
+                'mean_score': _score_or_nan(row[2]),
+                'std_score': _score_or_nan(row[3]),
+                'fit_time': row[4]
+            }
+            for row in rows
+        }
+
+    def save_trials(self, context, data_fingerprint, results):
+        """
+        Salva (o aggiorna) i risultati di un lotto di candidati
+
+        Args:
+            results: Lista di dizionari con params, mean_score, std_score, fit_time
+        """
+        now = time.time()
+        rows = [
+            (context, data_fingerprint, param_hash(result['params']), _to_json(result['params']),
+             _score_or_null(result['mean_score']), _score_or_null(result['std_score']),
+             result.get('fit_time'), now)
+            for result in results
+        ]
+        with closing(self._connect()) as conn, conn:
+            conn.executemany('INSERT OR REPLACE INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+
+    def count(self, context=None):
+        """Numero di risultati salvati (per contesto o totale)"""
+        query, args = 'SELECT COUNT(*) FROM trials', ()
+        if context is not None:
+            query, args = query + ' WHERE context = ?', (context,)
+        with closing(self._connect()) as conn:
+            return conn.execute(query, args).fetchone()[0]
+
+    def clear(self, context=None):
+        """Elimina i risultati (di un contesto o tutti)"""
+        query, args = 'DELETE FROM trials', ()
+        if context is not None:
+            query, args = query + ' WHERE context = ?', (context,)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(query, args)
+
+def get_trial_store(path=None):
+    """TrialStore configurato, oppure None se disabilitato in TRIAL_STORE_CONFIG"""
+    if not TRIAL_STORE_CONFIG['enabled']:
+        return None
+    return TrialStore(path)
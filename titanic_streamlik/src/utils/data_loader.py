@@ -4,33 +4,383 @@ Funzioni per il caricamento e gestione dei dati Titanic
 """
 
 import pandas as pd
-import streamlit as st
+import numpy as np
+from src.utils.headless import cache_data, emit
 import os
-from src.config import DATA_FILE, DATA_URL
+import json
+import hashlib
+from src.config import (
+    DATA_FILE, DATA_URL, SNAPSHOT_CONFIG, STREAMING_CONFIG,
+    DATASET_COLUMNS, DTYPE_DEFAULTS, DTYPE_OVERRIDES
+)
 
 # ----------------1. Caricamento Dataset (da notebook sezione 2.1 - Structure of dataset)
-@st.cache_data(ttl=3600)
+@cache_data(ttl=3600)
 def load_titanic_data():
     """
     Carica il dataset Titanic da file locale o URL remoto
     Implementa la logica di caricamento dal notebook sezione 2.1
+    Se disponibile usa lo snapshot colonnare del CSV locale
     """
     try:
         # Prova prima a caricare da file locale
         if os.path.exists(DATA_FILE):
-            df = pd.read_csv(DATA_FILE)
-            st.success(f"Dati caricati da file locale: {DATA_FILE}")
+            df, from_snapshot = load_csv_with_snapshot(
+                DATA_FILE,
+                postprocess=apply_dtype_schema,
+                schema=build_dtype_schema(),
+                dtype=get_read_csv_dtypes()
+            )
+            if from_snapshot:
+                emit('success', f"Dati caricati da snapshot colonnare di: {DATA_FILE}", source='load_titanic_data')
+            else:
+                emit('success', f"Dati caricati da file locale: {DATA_FILE}", source='load_titanic_data')
         else:
             # Carica da URL GitHub come nel notebook
-            df = pd.read_csv(DATA_URL)
-            st.info("Dati caricati da repository GitHub")
+            df = apply_dtype_schema(pd.read_csv(DATA_URL, dtype=get_read_csv_dtypes()))
+            emit('info', "Dati caricati da repository GitHub", source='load_titanic_data')
         
         return df
     
     except Exception as e:
-        st.error(f"Errore nel caricamento dati: {str(e)}")
+        emit('error', f"Errore nel caricamento dati: {str(e)}", source='load_titanic_data')
         return None
 
+# ----------------1.1 Snapshot Colonnare (Arrow/Parquet) del CSV
+def get_snapshot_paths(csv_path, snapshot_format=None):
+    """
+    Restituisce i percorsi dello snapshot e del relativo file di metadati
+    Lo snapshot viene salvato accanto al CSV
+    """
+    snapshot_format = snapshot_format or SNAPSHOT_CONFIG['format']
+    base_path = os.path.splitext(csv_path)[0]
+    extension = 'parquet' if snapshot_format == 'parquet' else 'feather'
+    return f"{base_path}.snapshot.{extension}", f"{base_path}.snapshot.json"
+
+def compute_file_hash(file_path, algorithm=None, block_size=None):
+    """
+    Calcola l'hash del contenuto di un file leggendolo a blocchi
+    """
+    hasher = hashlib.new(algorithm or SNAPSHOT_CONFIG['hash_algorithm'])
+    block_size = block_size or SNAPSHOT_CONFIG['hash_block_size']
+    
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            hasher.update(block)
+    
+    return hasher.hexdigest()
+
+def _read_snapshot_metadata(metadata_path):
+    """Legge i metadati dello snapshot (None se assenti o illeggibili)"""
+    if not os.path.exists(metadata_path):
+        return None
+    try:
+        with open(metadata_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _write_snapshot_metadata(metadata_path, metadata):
+    """Scrive i metadati dello snapshot in modo atomico"""
+    tmp_path = f"{metadata_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, metadata_path)
+
+def is_snapshot_valid(csv_path, snapshot_format=None, schema=None):
+    """
+    Verifica se lo snapshot corrisponde al CSV corrente (e allo schema dei tipi)
+    
+    Il controllo veloce usa mtime e dimensione del CSV; se differiscono
+    viene ricalcolato l'hash del contenuto, cosi' un semplice 'touch'
+    del file non invalida lo snapshot.
+    
+    Returns:
+        True se lo snapshot puo' essere usato
+    """
+    snapshot_path, metadata_path = get_snapshot_paths(csv_path, snapshot_format)
+    metadata = _read_snapshot_metadata(metadata_path)
+    
+    if metadata is None or not os.path.exists(snapshot_path):
+        return False
+    
+    if metadata.get('schema') != schema:
+        return False
+    
+    stat = os.stat(csv_path)
+    if metadata.get('csv_mtime') == stat.st_mtime and metadata.get('csv_size') == stat.st_size:
+        return True
+    
+    # mtime/size cambiati: confronta il contenuto
+    if metadata.get('csv_hash') != compute_file_hash(csv_path, metadata.get('hash_algorithm')):
+        return False
+    
+    # Contenuto invariato: aggiorna solo mtime/size
+    metadata['csv_mtime'] = stat.st_mtime
+    metadata['csv_size'] = stat.st_size
+    _write_snapshot_metadata(metadata_path, metadata)
+    return True
+
+def write_snapshot(df, csv_path, snapshot_format=None, schema=None):
+    """
+    Scrive lo snapshot colonnare tipizzato del DataFrame letto dal CSV
+    
+    Returns:
+        Percorso dello snapshot scritto
+    """
+    snapshot_format = snapshot_format or SNAPSHOT_CONFIG['format']
+    snapshot_path, metadata_path = get_snapshot_paths(csv_path, snapshot_format)
+    
+    # Scrittura su file temporaneo e rename atomico: un lettore concorrente
+    # non vede mai uno snapshot scritto a meta'
+    tmp_path = f"{snapshot_path}.tmp"
+    if snapshot_format == 'parquet':
+        df.to_parquet(tmp_path, index=False)
+    else:
+        # Feather non compresso: le colonne possono essere memory-mappate
+        df.reset_index(drop=True).to_feather(tmp_path, compression='uncompressed')
+    os.replace(tmp_path, snapshot_path)
+    
+    stat = os.stat(csv_path)
+    _write_snapshot_metadata(metadata_path, {
+        'csv_path': os.path.abspath(csv_path),
+        'csv_mtime': stat.st_mtime,
+        'csv_size': stat.st_size,
+        'csv_hash': compute_file_hash(csv_path),
+        'hash_algorithm': SNAPSHOT_CONFIG['hash_algorithm'],
+        'format': snapshot_format,
+        'rows': len(df),
+        'columns': df.columns.tolist(),
+        'schema': schema
+    })
+    
+    return snapshot_path
+
+def _restore_missing_markers(df):
+    """
+    Mancanti delle colonne object come NaN, come in pd.read_csv
+    
+    pyarrow restituisce None: imputazione (most_frequent) e factorize li
+    tratterebbero diversamente dai NaN del CSV.
+    """
+    for column in df.columns[df.dtypes == object]:
+        missing = df[column].isna()
+        if missing.any():
+            values = df[column].to_numpy(copy=True)
+            values[missing.to_numpy()] = np.nan
+            df[column] = values
+    return df
+
+def read_snapshot(csv_path, snapshot_format=None):
+    """
+    Legge lo snapshot colonnare (memory-mapped se configurato)
+    """
+    snapshot_format = snapshot_format or SNAPSHOT_CONFIG['format']
+    snapshot_path, _ = get_snapshot_paths(csv_path, snapshot_format)
+    memory_map = SNAPSHOT_CONFIG['memory_map']
+    
+    if snapshot_format == 'parquet':
+        return _restore_missing_markers(pd.read_parquet(snapshot_path, memory_map=memory_map))
+    
+    from pyarrow import feather
+    table = feather.read_table(snapshot_path, memory_map=memory_map)
+    return _restore_missing_markers(table.to_pandas())
+
+def load_csv_with_snapshot(csv_path, snapshot_format=None, postprocess=None, schema=None, **read_csv_kwargs):
+    """
+    Carica un CSV passando dallo snapshot colonnare quando possibile
+    
+    Al primo caricamento il CSV viene letto con pandas e lo snapshot viene
+    scritto accanto al file; i caricamenti successivi leggono lo snapshot
+    finche' il CSV non cambia. Se pyarrow non e' disponibile o lo snapshot
+    e' illeggibile si ricade sulla lettura diretta del CSV.
+    
+    Args:
+        csv_path: Percorso del CSV
+        snapshot_format: 'feather' o 'parquet' (default da SNAPSHOT_CONFIG)
+        postprocess: Funzione applicata al CSV letto prima di scrivere lo snapshot
+        schema: Schema dei tipi registrato nello snapshot (se cambia lo snapshot e' rigenerato)
+        **read_csv_kwargs: Argomenti passati a pd.read_csv
+    
+    Returns:
+        Tupla (DataFrame, caricato_da_snapshot)
+    """
+    if not SNAPSHOT_CONFIG['enabled']:
+        df = pd.read_csv(csv_path, **read_csv_kwargs)
+        return (postprocess(df) if postprocess is not None else df), False
+    
+    try:
+        if is_snapshot_valid(csv_path, snapshot_format, schema):
+            return read_snapshot(csv_path, snapshot_format), True
+    except Exception as e:
+        # Snapshot corrotto o formato non supportato: rigenera dal CSV
+        emit('warning', f"Snapshot non leggibile, lettura dal CSV: {str(e)}",
+             source='load_csv_with_snapshot', csv_path=csv_path)
+    
+    df = pd.read_csv(csv_path, **read_csv_kwargs)
+    if postprocess is not None:
+        df = postprocess(df)
+    
+    try:
+        write_snapshot(df, csv_path, snapshot_format, schema)
+    except Exception as e:
+        # Directory in sola lettura o pyarrow assente: lo snapshot e' opzionale
+        emit('warning', f"Snapshot non scritto: {str(e)}",
+             source='load_csv_with_snapshot', csv_path=csv_path)
+    
+    return df, False
+
+# ----------------1.2 Schema dei Tipi (dtype) in ingestione
+def build_dtype_schema():
+    """
+    Costruisce lo schema dei tipi a partire da DATASET_COLUMNS
+    
+    Ogni gruppo di colonne riceve il tipo di default del gruppo
+    (DTYPE_DEFAULTS), eventualmente sovrascritto da DTYPE_OVERRIDES.
+    
+    Returns:
+        Dizionario colonna -> dtype
+    """
+    schema = {}
+    for group, columns in DATASET_COLUMNS.items():
+        if group not in DTYPE_DEFAULTS:
+            continue
+        for column in columns:
+            schema[column] = DTYPE_OVERRIDES.get(column, DTYPE_DEFAULTS[group])
+    return schema
+
+def get_read_csv_dtypes():
+    """
+    Sottoinsieme dello schema applicabile direttamente in pd.read_csv
+    
+    I tipi interi vengono esclusi perche' read_csv fallisce se la colonna
+    contiene valori mancanti: sono applicati dopo da apply_dtype_schema.
+    """
+    return {
+        column: dtype for column, dtype in build_dtype_schema().items()
+        if not dtype.startswith('int')
+    }
+
+def apply_dtype_schema(df, schema=None):
+    """
+    Applica lo schema dei tipi ad un DataFrame
+    
+    Le colonne intere con valori mancanti o fuori range per il tipo
+    richiesto vengono convertite a float32 invece di fallire.
+    """
+    if df is None:
+        return None
+    
+    schema = schema or build_dtype_schema()
+    
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        
+        series = df[column]
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Categorie fissate a priori: dtype stabile tra chunk diversi
+            if series.dtype != dtype:
+                df[column] = series.astype(object).astype(dtype)
+            continue
+        
+        if str(series.dtype) == dtype:
+            continue
+        
+        if dtype.startswith('int'):
+            info = np.iinfo(dtype)
+            if (pd.api.types.is_numeric_dtype(series) and series.notna().all()
+                    and series.min() >= info.min and series.max() <= info.max):
+                df[column] = series.astype(dtype)
+            elif pd.api.types.is_numeric_dtype(series):
+                df[column] = series.astype('float32')
+        elif dtype == 'category' or dtype.startswith('float'):
+            df[column] = series.astype(dtype)
+    
+    return df
+
+def get_dtype_memory_report(df):
+    """
+    Confronta l'occupazione di memoria con i tipi inferiti di default da pandas
+    
+    La versione "prima" viene ricostruita riportando le colonne ai tipi
+    standard (object, int64, float64) senza rileggere il file.
+    
+    Returns:
+        DataFrame con memoria per colonna prima/dopo e risparmio percentuale
+    """
+    if df is None:
+        return None
+    
+    rows = []
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            baseline = series.astype('object')
+        elif pd.api.types.is_integer_dtype(series):
+            baseline = series.astype('int64')
+        elif pd.api.types.is_float_dtype(series):
+            baseline = series.astype('float64')
+        else:
+            baseline = series
+        
+        before = baseline.memory_usage(deep=True, index=False)
+        after = series.memory_usage(deep=True, index=False)
+        rows.append({
+            'Colonna': column,
+            'Tipo_Default': str(baseline.dtype),
+            'Tipo_Schema': str(series.dtype),
+            'Memoria_Prima_KB': before / 1024,
+            'Memoria_Dopo_KB': after / 1024,
+            'Risparmio_Percentuale': (1 - after / before) * 100 if before else 0.0
+        })
+    
+    report = pd.DataFrame(rows)
+    total_before = report['Memoria_Prima_KB'].sum()
+    total_after = report['Memoria_Dopo_KB'].sum()
+    report.loc[len(report)] = {
+        'Colonna': 'TOTALE',
+        'Tipo_Default': '',
+        'Tipo_Schema': '',
+        'Memoria_Prima_KB': total_before,
+        'Memoria_Dopo_KB': total_after,
+        'Risparmio_Percentuale': (1 - total_after / total_before) * 100 if total_before else 0.0
+    }
+    
+    return report
+
+# ----------------1.3 Lettura a Chunk (streaming per dataset piu' grandi della RAM)
+def get_default_source():
+    """Restituisce il file locale se esiste, altrimenti l'URL remoto"""
+    return DATA_FILE if os.path.exists(DATA_FILE) else DATA_URL
+
+def iter_titanic_chunks(source=None, chunksize=None, schema=None, **read_csv_kwargs):
+    """
+    Legge il dataset a blocchi applicando lo schema dei tipi ad ogni chunk
+    
+    Args:
+        source: Percorso o URL del CSV (default: file locale o URL remoto)
+        chunksize: Righe per chunk (default da STREAMING_CONFIG)
+        schema: Schema dei tipi da applicare (default: build_dtype_schema())
+        **read_csv_kwargs: Argomenti aggiuntivi per pd.read_csv
+    
+    Yields:
+        DataFrame con al massimo chunksize righe
+    """
+    source = source or get_default_source()
+    chunksize = chunksize or STREAMING_CONFIG['chunksize']
+    schema = schema or build_dtype_schema()
+    
+    read_dtypes = {
+        column: dtype for column, dtype in schema.items()
+        if isinstance(dtype, pd.CategoricalDtype) or not str(dtype).startswith('int')
+    }
+    read_csv_kwargs.setdefault('dtype', read_dtypes)
+    
+    with pd.read_csv(source, chunksize=chunksize, **read_csv_kwargs) as reader:
+        for chunk in reader:
+            yield apply_dtype_schema(chunk, schema)
+
 # ----------------2. Informazioni Dataset (da notebook sezione 2.1 - Dataset information)
 def get_data_summary(df):
     """
@@ -115,7 +465,7 @@ def get_descriptive_statistics(df):
         return None
     
     # Seleziona solo colonne numeriche
-    numeric_columns = df.select_dtypes(include=['int64', 'float64']).columns
+    numeric_columns = df.select_dtypes(include=[np.number]).columns
     stats = df[numeric_columns].describe()
     
     return stats
\ No newline at end of file
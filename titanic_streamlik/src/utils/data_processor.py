@@ -3,20 +3,35 @@ src/utils/data_processor.py
 Funzioni per l'elaborazione e pulizia dei dati
 """
 
+import os
 import pandas as pd
 import numpy as np
-import streamlit as st
-from src.config import MISSING_VALUE_THRESHOLDS, OUTLIER_CONFIG
+from src.utils.headless import cache_data, emit
+from src.config import MISSING_VALUE_THRESHOLDS, OUTLIER_CONFIG, STREAMING_CONFIG, INCREMENTAL_CLEAN_CONFIG
+from src.utils.quantile_sketch import (
+    column_quantiles, series_quantiles, build_column_sketches,
+    merge_column_sketches, sketches_to_quantiles
+)
 
 # ----------------1. Pulizia Base Dataset (da notebook sezione 3 - Data Cleaning)
-@st.cache_data
-def clean_dataset_basic(df):
+@cache_data
+def clean_dataset_basic(df, incremental=False):
     """
     Applica pulizia base del dataset seguendo notebook sezione 3
+    
+    Args:
+        df: DataFrame originale
+        incremental: Se True riusa lo stato salvato e processa solo le righe
+            aggiunte dall'ultima esecuzione (vedi clean_dataset_incremental)
     """
     if df is None:
         return None
     
+    if incremental:
+        df_clean, report = clean_dataset_incremental(df)
+        _show_incremental_report(report)
+        return df_clean
+    
     # Copia del dataframe originale
     df_clean = df.copy()
     
@@ -26,7 +41,8 @@ def clean_dataset_basic(df):
     duplicates_removed = initial_rows - len(df_clean)
     
     if duplicates_removed > 0:
-        st.info(f"Rimosse {duplicates_removed} righe duplicate")
+        emit('info', f"Rimosse {duplicates_removed} righe duplicate",
+             source='clean_dataset_basic', duplicates_removed=duplicates_removed)
     
     # ----------------3. Rimozione colonne con troppi missing (da notebook sezione 3.2)
     missing_threshold = MISSING_VALUE_THRESHOLDS['drop_column_threshold']
@@ -35,7 +51,8 @@ def clean_dataset_basic(df):
         missing_pct = df_clean[column].isnull().sum() / len(df_clean)
         if missing_pct > missing_threshold:
             df_clean = df_clean.drop(column, axis=1)
-            st.info(f"Rimossa colonna '{column}' ({missing_pct:.1%} valori mancanti)")
+            emit('info', f"Rimossa colonna '{column}' ({missing_pct:.1%} valori mancanti)",
+                 source='clean_dataset_basic', column=column, missing_pct=missing_pct)
     
     # ----------------4. Gestione Age missing values (da notebook sezione 3.3)
     if 'Age' in df_clean.columns:
@@ -44,7 +61,8 @@ def clean_dataset_basic(df):
             # Riempi con la mediana per essere più robusto agli outliers
             age_median = df_clean['Age'].median()
             df_clean.loc[df_clean['Age'].isnull(), 'Age'] = age_median
-            st.info(f"Sostituiti {age_missing} valori mancanti in 'Age' con mediana ({age_median:.1f})")
+            emit('info', f"Sostituiti {age_missing} valori mancanti in 'Age' con mediana ({age_median:.1f})",
+                 source='clean_dataset_basic', column='Age', imputed=int(age_missing), value=age_median)
     
     # ----------------5. Gestione Embarked missing values
     if 'Embarked' in df_clean.columns:
@@ -53,17 +71,20 @@ def clean_dataset_basic(df):
             # Riempi con la moda (valore più frequente)
             embarked_mode = df_clean['Embarked'].mode()[0]
             df_clean.loc[df_clean['Embarked'].isnull(), 'Embarked'] = embarked_mode
-            st.info(f"Sostituiti {embarked_missing} valori mancanti in 'Embarked' con moda ('{embarked_mode}')")
+            emit('info', f"Sostituiti {embarked_missing} valori mancanti in 'Embarked' con moda ('{embarked_mode}')",
+                 source='clean_dataset_basic', column='Embarked', imputed=int(embarked_missing), value=embarked_mode)
     
     return df_clean
 
 # ----------------6. Rilevamento Outliers (da notebook sezione 4.1.1 - Outlier detection)
-def detect_outliers_iqr(series, lower_q=0.25, upper_q=0.75, multiplier=1.5):
+def detect_outliers_iqr(series, lower_q=0.25, upper_q=0.75, multiplier=1.5, backend=None):
     """
     Rileva outliers usando il metodo IQR dal notebook
+    
+    Args:
+        backend: Backend dei quantili ('exact', 'kll', 'auto'; default QUANTILE_CONFIG)
     """
-    Q1 = series.quantile(lower_q)
-    Q3 = series.quantile(upper_q)
+    Q1, Q3 = series_quantiles(series, [lower_q, upper_q], backend=backend)
     IQR = Q3 - Q1
     
     lower_bound = Q1 - multiplier * IQR
@@ -72,8 +93,95 @@ def detect_outliers_iqr(series, lower_q=0.25, upper_q=0.75, multiplier=1.5):
     outliers = series[(series < lower_bound) | (series > upper_bound)]
     return outliers, lower_bound, upper_bound
 
+# ----------------6.1 Motore Outliers Vettoriale (tutte le colonne in un passaggio)
+def _default_outlier_columns(df):
+    """Colonne numeriche analizzabili (escluso PassengerId)"""
+    columns = df.select_dtypes(include=[np.number]).columns
+    return [col for col in columns if col != 'PassengerId']
+
+def compute_outlier_bounds(df, columns=None, lower_q=None, upper_q=None, multiplier=None, backend=None):
+    """
+    Calcola i bounds IQR di tutte le colonne con un'unica DataFrame.quantile
+    
+    Args:
+        df: DataFrame
+        columns: Colonne da analizzare (default: numeriche escluso PassengerId)
+        lower_q, upper_q, multiplier: Parametri IQR (default: OUTLIER_CONFIG)
+        backend: Backend dei quantili (default: QUANTILE_CONFIG)
+    
+    Returns:
+        DataFrame indicizzato per colonna con Q1, Q3, Lower_Bound, Upper_Bound
+    """
+    if columns is None:
+        columns = _default_outlier_columns(df)
+    columns = [col for col in columns if col in df.columns]
+    
+    lower_q, upper_q = _outlier_quantile_levels(lower_q, upper_q)
+    quantiles = column_quantiles(df, [lower_q, upper_q], columns=columns, backend=backend)
+    return _bounds_from_quantiles(quantiles, multiplier)
+
+def compute_outlier_bounds_streaming(chunks, columns=None, lower_q=None, upper_q=None,
+                                     multiplier=None, sketches=None, **sketch_kwargs):
+    """
+    Bounds IQR con un solo passaggio in streaming (sketch KLL per colonna)
+    
+    Args:
+        chunks: Iterabile di DataFrame (es. iter_titanic_chunks); puo' essere
+            vuoto se si passano sketch gia' costruiti
+        sketches: Sketch esistenti (es. caricati da disco o uniti da worker)
+            aggiornati con i chunk
+    
+    Returns:
+        Tupla (bounds come compute_outlier_bounds, sketch per colonna)
+    """
+    new_sketches = build_column_sketches(
+        (chunk[[c for c in (columns or _default_outlier_columns(chunk)) if c in chunk.columns]]
+         for chunk in chunks),
+        **sketch_kwargs
+    )
+    sketches = merge_column_sketches(sketches or {}, new_sketches)
+    
+    lower_q, upper_q = _outlier_quantile_levels(lower_q, upper_q)
+    quantiles = sketches_to_quantiles(sketches, [lower_q, upper_q])
+    return _bounds_from_quantiles(quantiles, multiplier), sketches
+
+def _outlier_quantile_levels(lower_q, upper_q):
+    lower_q = OUTLIER_CONFIG['lower_quantile'] if lower_q is None else lower_q
+    upper_q = OUTLIER_CONFIG['upper_quantile'] if upper_q is None else upper_q
+    return lower_q, upper_q
+
+def _bounds_from_quantiles(quantiles, multiplier=None):
+    multiplier = OUTLIER_CONFIG['iqr_multiplier'] if multiplier is None else multiplier
+    q1 = quantiles.iloc[0]
+    q3 = quantiles.iloc[1]
+    iqr = q3 - q1
+    
+    return pd.DataFrame({
+        'Q1': q1,
+        'Q3': q3,
+        'Lower_Bound': q1 - multiplier * iqr,
+        'Upper_Bound': q3 + multiplier * iqr
+    })
+
+def build_outlier_mask(df, bounds):
+    """
+    Maschera 2-D (righe x colonne dei bounds) degli outliers
+    
+    I valori mancanti non sono mai considerati outliers.
+    
+    Returns:
+        Tupla (valori float64, maschera booleana)
+    """
+    values = df[bounds.index].to_numpy(dtype='float64', na_value=np.nan)
+    lower = bounds['Lower_Bound'].to_numpy()
+    upper = bounds['Upper_Bound'].to_numpy()
+    
+    # NaN < x e NaN > x sono sempre False
+    mask = (values < lower) | (values > upper)
+    return values, mask
+
 # ----------------7. Summary Outliers per Dataset (da notebook sezione 4.1.1)
-@st.cache_data
+@cache_data
 def detect_outliers_summary(df):
     """
     Crea summary degli outliers per tutte le variabili numeriche
@@ -82,68 +190,79 @@ def detect_outliers_summary(df):
     if df is None:
         return None
     
-    # Seleziona solo colonne numeriche (escludi PassengerId)
-    numeric_cols = df.select_dtypes(include=[np.number]).columns
-    numeric_cols = [col for col in numeric_cols if col != 'PassengerId']
-    
-    outliers_summary = []
-    
-    for col in numeric_cols:
-        if df[col].notna().sum() > 0:  # Solo se ci sono valori non-null
-            outliers, lower_bound, upper_bound = detect_outliers_iqr(
-                df[col].dropna(),
-                lower_q=OUTLIER_CONFIG['lower_quantile'],
-                upper_q=OUTLIER_CONFIG['upper_quantile'],
-                multiplier=OUTLIER_CONFIG['iqr_multiplier']
-            )
-            
-            outliers_summary.append({
-                'Variable': col,
-                'Total_Values': df[col].notna().sum(),
-                'Outliers_Count': len(outliers),
-                'Outliers_Percentage': (len(outliers) / df[col].notna().sum()) * 100,
-                'Lower_Bound': lower_bound,
-                'Upper_Bound': upper_bound,
-                'Min_Outlier': outliers.min() if len(outliers) > 0 else np.nan,
-                'Max_Outlier': outliers.max() if len(outliers) > 0 else np.nan
-            })
-    
-    return pd.DataFrame(outliers_summary)
+    # Solo colonne numeriche (escluso PassengerId) con almeno un valore non-null
+    numeric_cols = _default_outlier_columns(df)
+    total_values = df[numeric_cols].notna().sum()
+    numeric_cols = total_values[total_values > 0].index.tolist()
+    
+    bounds = compute_outlier_bounds(df, numeric_cols)
+    values, mask = build_outlier_mask(df, bounds)
+    
+    outliers_count = mask.sum(axis=0)
+    outlier_values = pd.DataFrame(np.where(mask, values, np.nan), columns=numeric_cols)
+    
+    return pd.DataFrame({
+        'Variable': numeric_cols,
+        'Total_Values': total_values[numeric_cols].to_numpy(),
+        'Outliers_Count': outliers_count,
+        'Outliers_Percentage': outliers_count / total_values[numeric_cols].to_numpy() * 100,
+        'Lower_Bound': bounds['Lower_Bound'].to_numpy(),
+        'Upper_Bound': bounds['Upper_Bound'].to_numpy(),
+        'Min_Outlier': outlier_values.min().to_numpy(),
+        'Max_Outlier': outlier_values.max().to_numpy()
+    })
 
 # ----------------8. Gestione Outliers (da notebook - metodi di gestione outliers)
-@st.cache_data
+@cache_data
 def handle_outliers(df, method='clip', columns=None):
     """
     Gestisce outliers usando vari metodi dal notebook
+    
+    I bounds di tutte le colonne sono calcolati sul DataFrame in ingresso e
+    applicati insieme; i valori mancanti non sono considerati outliers
+    (con 'remove' le righe con NaN vengono mantenute).
+    
+    Args:
+        df: DataFrame
+        method: 'clip', 'remove' o 'replace_median'
+        columns: Colonne da trattare (default: numeriche escluso PassengerId)
     """
     if df is None:
         return None
     
+    if columns is None:
+        columns = _default_outlier_columns(df)
+    
+    bounds = compute_outlier_bounds(df, columns)
+    _, mask = build_outlier_mask(df, bounds)
+    
+    # Solo le colonne che hanno effettivamente outliers vengono toccate
+    has_outliers = mask.any(axis=0)
+    bounds = bounds[has_outliers]
+    mask = mask[:, has_outliers]
+    outlier_columns = bounds.index.tolist()
+    
     df_processed = df.copy()
+    if not outlier_columns:
+        return df_processed
     
-    if columns is None:
-        columns = df_processed.select_dtypes(include=[np.number]).columns
-        columns = [col for col in columns if col != 'PassengerId']
-    
-    for col in columns:
-        if col in df_processed.columns:
-            outliers, lower_bound, upper_bound = detect_outliers_iqr(df_processed[col].dropna())
-            
-            if len(outliers) > 0:
-                if method == 'clip':
-                    # Clip outliers ai bounds
-                    df_processed[col] = df_processed[col].clip(lower_bound, upper_bound)
-                
-                elif method == 'remove':
-                    # Rimuovi righe con outliers
-                    mask = (df_processed[col] >= lower_bound) & (df_processed[col] <= upper_bound)
-                    df_processed = df_processed[mask]
-                
-                elif method == 'replace_median':
-                    # Sostituisci con mediana
-                    median_val = df_processed[col].median()
-                    outlier_mask = (df_processed[col] < lower_bound) | (df_processed[col] > upper_bound)
-                    df_processed.loc[outlier_mask, col] = median_val
+    if method == 'clip':
+        # Clip outliers ai bounds
+        df_processed[outlier_columns] = df_processed[outlier_columns].clip(
+            lower=bounds['Lower_Bound'], upper=bounds['Upper_Bound'], axis=1
+        )
+    
+    elif method == 'remove':
+        # Rimuovi righe con outliers in almeno una colonna
+        df_processed = df_processed[~mask.any(axis=1)]
+    
+    elif method == 'replace_median':
+        # Sostituisci con mediana (calcolata sulla colonna originale)
+        medians = df_processed[outlier_columns].median()
+        df_processed[outlier_columns] = df_processed[outlier_columns].mask(
+            pd.DataFrame(mask, index=df_processed.index, columns=outlier_columns),
+            medians, axis=1
+        )
     
     return df_processed
 
@@ -200,8 +319,539 @@ def validate_data_quality(df):
         'missing_percentage': (df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100,
         'duplicate_rows': df.duplicated().sum(),
         'numeric_columns': len(df.select_dtypes(include=[np.number]).columns),
-        'categorical_columns': len(df.select_dtypes(include=['object']).columns),
+        'categorical_columns': len(df.select_dtypes(include=['object', 'category']).columns),
         'completeness_score': ((df.count().sum() / (len(df) * len(df.columns))) * 100)
     }
     
-    return quality_report
\ No newline at end of file
+    return quality_report
+
+# ----------------11. Pulizia in Streaming (dataset piu' grandi della RAM)
+class RowDeduplicator:
+    """
+    Rileva righe duplicate tra chunk successivi tramite hash a 64 bit delle righe
+    
+    La memoria occupata e' proporzionale al numero di righe uniche viste
+    (un intero per riga), non alla dimensione delle righe stesse.
+    """
+    
+    def __init__(self):
+        self.seen_hashes = set()
+    
+    def filter(self, chunk):
+        """
+        Restituisce il chunk senza le righe gia' viste (anche nello stesso chunk)
+        
+        Returns:
+            Tupla (chunk_deduplicato, righe_rimosse)
+        """
+        if chunk.empty:
+            return chunk, 0
+        
+        keep = self.filter_hashes(self.hash_rows(chunk))
+        return chunk[keep], int((~keep).sum())
+    
+    @staticmethod
+    def hash_rows(chunk):
+        """Hash a 64 bit di ogni riga (indipendente dall'indice)"""
+        # Numeriche normalizzate a float64: la stessa riga deve avere lo stesso
+        # hash anche se in chunk diversi la colonna e' int8 oppure float32
+        numeric_columns = chunk.select_dtypes(include=[np.number]).columns
+        hash_frame = chunk.astype({col: 'float64' for col in numeric_columns})
+        return pd.util.hash_pandas_object(hash_frame, index=False).to_numpy()
+    
+    def filter_hashes(self, hashes):
+        """
+        Maschera delle righe da tenere dati gli hash e registra quelle nuove
+        
+        Returns:
+            Array booleano (True = riga non ancora vista)
+        """
+        # Duplicati interni al chunk + righe gia' viste nei chunk precedenti
+        first_in_chunk = ~pd.Index(hashes).duplicated()
+        seen = self.seen_hashes
+        not_seen = np.fromiter((h not in seen for h in hashes), dtype=bool, count=len(hashes))
+        keep = first_in_chunk & not_seen
+        
+        self.seen_hashes.update(hashes[keep].tolist())
+        return keep
+
+class CleaningStatistics:
+    """
+    Statistiche di pulizia aggregabili tra chunk (e tra worker tramite merge)
+    
+    Mediane e mode sono calcolate in modo esatto a partire dai conteggi dei
+    valori distinti, quindi il risultato coincide con clean_dataset_basic
+    applicata all'intero dataset.
+    """
+    
+    def __init__(self, value_count_columns=('Age', 'Embarked')):
+        self.value_count_columns = tuple(value_count_columns)
+        self.n_rows = 0
+        self.duplicates_removed = 0
+        self.columns = []
+        self.missing_counts = {}
+        self.value_counts = {}
+    
+    def update(self, chunk):
+        """Aggiorna le statistiche con un chunk gia' deduplicato"""
+        for column in chunk.columns:
+            if column not in self.missing_counts:
+                self.columns.append(column)
+                self.missing_counts[column] = 0
+        
+        self.n_rows += len(chunk)
+        for column, missing in chunk.isnull().sum().items():
+            self.missing_counts[column] += int(missing)
+        
+        for column in self.value_count_columns:
+            if column in chunk.columns:
+                series = chunk[column]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    # Evita i conteggi a zero delle categorie non presenti nel chunk
+                    series = series.astype(object)
+                self._add_counts(column, series.value_counts(dropna=True))
+        
+        return self
+    
+    def merge(self, other):
+        """Unisce le statistiche calcolate su un'altra partizione dei dati"""
+        for column in other.columns:
+            if column not in self.missing_counts:
+                self.columns.append(column)
+                self.missing_counts[column] = 0
+            self.missing_counts[column] += other.missing_counts[column]
+        
+        for column, counts in other.value_counts.items():
+            self._add_counts(column, counts)
+        
+        self.n_rows += other.n_rows
+        self.duplicates_removed += other.duplicates_removed
+        return self
+    
+    def _add_counts(self, column, counts):
+        if column in self.value_counts:
+            self.value_counts[column] = self.value_counts[column].add(counts, fill_value=0)
+        else:
+            self.value_counts[column] = counts.astype('int64')
+    
+    def missing_ratio(self, column):
+        """Percentuale (0-1) di valori mancanti della colonna"""
+        if self.n_rows == 0:
+            return 0.0
+        return self.missing_counts.get(column, 0) / self.n_rows
+    
+    def columns_to_drop(self, threshold=None):
+        """Colonne con percentuale di missing sopra la soglia"""
+        if threshold is None:
+            threshold = MISSING_VALUE_THRESHOLDS['drop_column_threshold']
+        return [col for col in self.columns if self.missing_ratio(col) > threshold]
+    
+    def median(self, column):
+        """Mediana esatta calcolata dai conteggi dei valori"""
+        counts = self.value_counts.get(column)
+        if counts is None or counts.sum() == 0:
+            return np.nan
+        
+        counts = counts.sort_index()
+        values = counts.index.to_numpy(dtype=float)
+        cumulative = counts.to_numpy().cumsum()
+        total = cumulative[-1]
+        
+        # Stessa convenzione di pandas: media dei due valori centrali se n e' pari
+        lower = values[np.searchsorted(cumulative, (total - 1) // 2, side='right')]
+        upper = values[np.searchsorted(cumulative, total // 2, side='right')]
+        return (lower + upper) / 2
+    
+    def mode(self, column):
+        """Moda (a parita' di frequenza il valore minore, come Series.mode)"""
+        counts = self.value_counts.get(column)
+        if counts is None or counts.empty:
+            return None
+        return counts[counts == counts.max()].sort_index().index[0]
+    
+    def categories(self, column):
+        """Valori distinti osservati (per dtype categorici stabili tra chunk)"""
+        counts = self.value_counts.get(column)
+        return [] if counts is None else sorted(counts.index.tolist())
+
+def compute_cleaning_statistics(chunks, value_count_columns=('Age', 'Embarked')):
+    """
+    Primo passaggio della pulizia in streaming: deduplica e statistiche
+    
+    Args:
+        chunks: Iterabile di DataFrame (es. iter_titanic_chunks)
+        value_count_columns: Colonne di cui tenere i conteggi (mediane/mode)
+    
+    Returns:
+        CleaningStatistics calcolate sulle righe uniche
+    """
+    stats = CleaningStatistics(value_count_columns)
+    deduplicator = RowDeduplicator()
+    
+    for chunk in chunks:
+        chunk, removed = deduplicator.filter(chunk)
+        stats.duplicates_removed += removed
+        stats.update(chunk)
+    
+    return stats
+
+def _stable_streaming_schema(stats):
+    """
+    Schema dei tipi stabile tra chunk: categorie fissate dalle statistiche
+    e colonne intere con missing (non imputate) promosse a float32
+    """
+    from src.utils.data_loader import build_dtype_schema
+    
+    schema = build_dtype_schema()
+    for column, dtype in list(schema.items()):
+        if dtype == 'category':
+            if column in stats.value_counts:
+                schema[column] = pd.CategoricalDtype(stats.categories(column))
+            else:
+                # Categorie non note a priori: stringhe semplici
+                schema[column] = 'object'
+        elif dtype.startswith('int') and stats.missing_counts.get(column, 0) > 0:
+            schema[column] = 'float32'
+    return schema
+
+def iter_cleaned_chunks(source=None, chunksize=None, stats=None):
+    """
+    Itera il dataset pulito a chunk (stesse regole di clean_dataset_basic)
+    
+    Se le statistiche non sono fornite viene eseguito prima un passaggio
+    completo sulla sorgente per calcolarle.
+    
+    Args:
+        source: Percorso o URL del CSV
+        chunksize: Righe per chunk
+        stats: CleaningStatistics gia' calcolate (opzionale)
+    
+    Yields:
+        DataFrame puliti
+    """
+    from src.utils.data_loader import iter_titanic_chunks
+    
+    if stats is None:
+        stats = compute_cleaning_statistics(iter_titanic_chunks(source, chunksize))
+    
+    schema = _stable_streaming_schema(stats)
+    columns_to_drop = stats.columns_to_drop()
+    fill_values = {}
+    if 'Age' in stats.columns and 'Age' not in columns_to_drop:
+        fill_values['Age'] = stats.median('Age')
+    if 'Embarked' in stats.columns and 'Embarked' not in columns_to_drop:
+        fill_values['Embarked'] = stats.mode('Embarked')
+    fill_values = {col: val for col, val in fill_values.items() if val is not None and not pd.isna(val)}
+    
+    deduplicator = RowDeduplicator()
+    for chunk in iter_titanic_chunks(source, chunksize, schema=schema):
+        chunk, _ = deduplicator.filter(chunk)
+        if chunk.empty:
+            continue
+        
+        chunk = chunk.drop(columns=columns_to_drop)
+        if fill_values:
+            chunk = chunk.fillna(fill_values)
+        yield chunk
+
+def clean_dataset_streaming(source=None, output_path=None, chunksize=None, output_format=None):
+    """
+    Pulisce un dataset piu' grande della memoria scrivendo il risultato su disco
+    
+    Il dataset viene letto due volte: il primo passaggio calcola le statistiche
+    (duplicati, missing per colonna, mediana Age, moda Embarked), il secondo
+    applica la pulizia chunk per chunk e scrive l'output in modo incrementale.
+    
+    Args:
+        source: Percorso o URL del CSV
+        output_path: File di destinazione (.parquet o .csv)
+        chunksize: Righe per chunk
+        output_format: 'parquet' o 'csv' (default: dall'estensione o da STREAMING_CONFIG)
+    
+    Returns:
+        Report della pulizia
+    """
+    from src.utils.data_loader import iter_titanic_chunks
+    
+    if output_path is None:
+        raise ValueError("output_path e' obbligatorio per la pulizia in streaming")
+    
+    if output_format is None:
+        extension = os.path.splitext(output_path)[1].lower().lstrip('.')
+        output_format = extension if extension in ('csv', 'parquet') else STREAMING_CONFIG['output_format']
+    
+    stats = compute_cleaning_statistics(iter_titanic_chunks(source, chunksize))
+    
+    rows_written = 0
+    writer = None
+    tmp_path = f"{output_path}.tmp"
+    
+    try:
+        for chunk in iter_cleaned_chunks(source, chunksize, stats=stats):
+            if output_format == 'parquet':
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+                
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table.cast(writer.schema))
+            else:
+                chunk.to_csv(tmp_path, mode='a' if rows_written else 'w',
+                             header=rows_written == 0, index=False)
+            rows_written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    
+    if rows_written:
+        os.replace(tmp_path, output_path)
+    
+    columns_dropped = stats.columns_to_drop()
+    return {
+        'output_path': output_path if rows_written else None,
+        'output_format': output_format,
+        'rows_unique': stats.n_rows,
+        'rows_written': rows_written,
+        'duplicates_removed': stats.duplicates_removed,
+        'columns_dropped': {col: stats.missing_ratio(col) for col in columns_dropped},
+        'age_median': stats.median('Age') if 'Age' not in columns_dropped else None,
+        'age_imputed': stats.missing_counts.get('Age', 0) if 'Age' not in columns_dropped else 0,
+        'embarked_mode': stats.mode('Embarked') if 'Embarked' not in columns_dropped else None,
+        'embarked_imputed': stats.missing_counts.get('Embarked', 0) if 'Embarked' not in columns_dropped else 0
+    }
+
+# ----------------12. Pulizia Incrementale (solo righe aggiunte)
+# Ultimo risultato per file di stato (stesso processo): deduplicatore e
+# dataset pulito, validi finche' run_id coincide con quello dello stato
+_incremental_cache = {}
+
+def _get_incremental_state_path(state_path=None):
+    if state_path is not None:
+        return state_path
+    return os.path.join(INCREMENTAL_CLEAN_CONFIG['state_dir'], INCREMENTAL_CLEAN_CONFIG['state_file'])
+
+def _incremental_state_files(state_path):
+    """Metadati (pickle) e file binari in sola aggiunta di hash e maschera delle righe"""
+    base = os.path.splitext(state_path)[0]
+    return {'meta': state_path, 'hashes': f"{base}.hashes", 'keep': f"{base}.keep"}
+
+def _load_incremental_state(state_path):
+    """Carica i metadati dello stato (None se assente, illeggibile, incompleto o di altra versione)"""
+    files = _incremental_state_files(state_path)
+    if not os.path.exists(state_path):
+        return None
+    try:
+        state = pd.read_pickle(state_path)
+    except Exception:
+        return None
+    if not isinstance(state, dict) or state.get('version') != INCREMENTAL_CLEAN_CONFIG['state_version']:
+        return None
+    # File binari piu' corti dei metadati: stato incompleto
+    for key, itemsize in (('hashes', 8), ('keep', 1)):
+        if not os.path.exists(files[key]) or os.path.getsize(files[key]) < state['n_rows'] * itemsize:
+            return None
+    return state
+
+def _save_incremental_state(state, new_hashes, new_keep, state_path, append):
+    """
+    Aggiunge hash e maschera delle nuove righe e riscrive i soli metadati
+
+    In modalita' append i file binari vengono estesi dalla posizione delle
+    righe gia' processate (eventuali code di un salvataggio interrotto sono
+    sovrascritte); i metadati sono scritti per ultimi con un rename atomico.
+    """
+    files = _incremental_state_files(state_path)
+    os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+    n_previous = state['n_rows'] - len(new_hashes)
+    for key, values in (('hashes', new_hashes.astype(np.uint64)), ('keep', new_keep.astype(np.bool_))):
+        with open(files[key], 'r+b' if append else 'wb') as f:
+            f.seek(n_previous * values.itemsize)
+            f.write(values.tobytes())
+            f.truncate()
+    tmp_path = f"{state_path}.tmp"
+    pd.to_pickle(state, tmp_path)
+    os.replace(tmp_path, state_path)
+
+def _prefix_matches(df, state, hashes_path):
+    """
+    Verifica che le righe gia' processate siano invariate
+
+    Rihasha solo un campione di verify_rows righe del prefisso (prima,
+    ultime e posizioni casuali, diverse a ogni esecuzione) invece
+    dell'intero dataset; verify_rows None verifica tutte le righe.
+    """
+    n_rows = state['n_rows']
+    if n_rows == 0:
+        return True
+    sample = INCREMENTAL_CLEAN_CONFIG['verify_rows']
+    if sample is None or sample >= n_rows:
+        positions = np.arange(n_rows)
+    else:
+        rng = np.random.default_rng()
+        positions = np.unique(np.concatenate([
+            [0], np.arange(max(0, n_rows - 16), n_rows), rng.integers(0, n_rows, sample)
+        ]))
+    stored = np.memmap(hashes_path, dtype=np.uint64, mode='r', shape=(n_rows,))[positions]
+    return np.array_equal(RowDeduplicator.hash_rows(df.iloc[positions]), stored)
+
+def _cleaning_rules(stats):
+    """Colonne da rimuovere e valori di imputazione dalle statistiche correnti"""
+    columns_to_drop = stats.columns_to_drop()
+    fill_values = {}
+    if 'Age' in stats.columns and 'Age' not in columns_to_drop:
+        fill_values['Age'] = stats.median('Age')
+    if 'Embarked' in stats.columns and 'Embarked' not in columns_to_drop:
+        fill_values['Embarked'] = stats.mode('Embarked')
+    fill_values = {col: val for col, val in fill_values.items() if val is not None and not pd.isna(val)}
+    return columns_to_drop, fill_values
+
+def clean_dataset_incremental(df, state_path=None):
+    """
+    Pulizia base incrementale guidata dagli hash di riga
+    
+    Lo stato salvato contiene gli hash delle righe gia' processate e la
+    maschera delle righe uniche (file binari in sola aggiunta) e le
+    CleaningStatistics (missing per colonna, conteggi per mediana Age e moda
+    Embarked). Se un campione delle righe gia' processate e' invariato
+    (_prefix_matches) vengono hashate, deduplicate e aggiunte alle
+    statistiche solo le righe nuove; altrimenti (righe modificate o rimosse,
+    colonne diverse) lo stato viene ricostruito da zero.
+    
+    Nello stesso processo il risultato precedente resta in memoria: le
+    righe nuove vengono pulite e accodate, e per le righe gia' pulite si
+    aggiornano solo i valori imputati se mediana o moda sono cambiate.
+    
+    Con righe gia' processate invariate (solo righe aggiunte in coda) il
+    risultato coincide con clean_dataset_basic(df). La verifica a campione
+    puo' non accorgersi di una riga modificata a meta' del prefisso: in quel
+    caso il risultato puo' differire, salvo impostare
+    INCREMENTAL_CLEAN_CONFIG['verify_rows'] a None (verifica completa).
+    
+    Args:
+        df: DataFrame originale (righe nuove in coda)
+        state_path: File di stato (default: INCREMENTAL_CLEAN_CONFIG)
+    
+    Returns:
+        Tupla (df_pulito, report)
+    """
+    import uuid
+    
+    state_path = _get_incremental_state_path(state_path)
+    files = _incremental_state_files(state_path)
+    
+    # ----------------12.1 Rilevamento modifiche (prefisso invariato = solo append)
+    state = _load_incremental_state(state_path)
+    mode = 'full'
+    if (state is not None and state['columns'] == list(df.columns) and state['n_rows'] <= len(df)
+            and _prefix_matches(df, state, files['hashes'])):
+        mode = 'incremental'
+    
+    n_processed = state['n_rows'] if mode == 'incremental' else 0
+    cache = _incremental_cache.get(state_path)
+    if mode == 'full' or cache is None or cache['run_id'] != state['run_id']:
+        cache = None
+    
+    keep_previous = None
+    if mode == 'incremental':
+        stats = state['stats']
+        if cache is not None:
+            deduplicator = cache['deduplicator']
+        else:
+            # Nuovo processo: insieme degli hash visti ricostruito dai file di stato
+            hashes = np.fromfile(files['hashes'], dtype=np.uint64, count=n_processed)
+            keep_previous = np.fromfile(files['keep'], dtype=np.bool_, count=n_processed)
+            deduplicator = RowDeduplicator()
+            deduplicator.seen_hashes.update(hashes[keep_previous].tolist())
+    else:
+        stats = CleaningStatistics()
+        keep_previous = np.zeros(0, dtype=bool)
+        deduplicator = RowDeduplicator()
+    
+    # ----------------12.2 Hash, deduplica e statistiche sulle sole righe nuove
+    new_rows = df.iloc[n_processed:]
+    new_hashes = RowDeduplicator.hash_rows(new_rows)
+    keep_new = deduplicator.filter_hashes(new_hashes)
+    stats.duplicates_removed += int((~keep_new).sum())
+    stats.update(new_rows[keep_new])
+    
+    run_id = state['run_id'] if mode == 'incremental' else None
+    if len(new_rows) > 0 or mode == 'full':
+        run_id = uuid.uuid4().hex
+        _save_incremental_state({
+            'version': INCREMENTAL_CLEAN_CONFIG['state_version'],
+            'run_id': run_id,
+            'columns': list(df.columns),
+            'n_rows': len(df),
+            'stats': stats
+        }, new_hashes, keep_new, state_path, append=mode == 'incremental')
+    
+    # ----------------12.3 Applicazione della pulizia con le statistiche aggiornate
+    columns_to_drop, fill_values = _cleaning_rules(stats)
+    
+    if (cache is not None and cache['columns_to_drop'] == columns_to_drop
+            and set(cache['fill_values']) == set(fill_values)):
+        # Solo le righe nuove; nelle righe gia' pulite si aggiornano i valori imputati cambiati
+        added = new_rows[keep_new].drop(columns=columns_to_drop)
+        n_previous = len(cache['df_clean'])
+        missing = {
+            col: np.concatenate([cache['missing'][col], n_previous + np.flatnonzero(added[col].isnull().to_numpy())])
+            for col in fill_values
+        }
+        if fill_values:
+            added = added.fillna(fill_values)
+        df_clean = pd.concat([cache['df_clean'], added]) if len(added) else cache['df_clean'].copy()
+        for col, value in fill_values.items():
+            if value != cache['fill_values'][col] and len(cache['missing'][col]):
+                df_clean.iloc[cache['missing'][col], df_clean.columns.get_loc(col)] = value
+    else:
+        if keep_previous is None:
+            # Cache riusata ma regole cambiate: maschera delle righe gia' processate dallo stato
+            keep_previous = np.fromfile(files['keep'], dtype=np.bool_, count=n_processed)
+        keep = np.concatenate([keep_previous, keep_new])
+        df_clean = df[keep].drop(columns=columns_to_drop)
+        missing = {col: np.flatnonzero(df_clean[col].isnull().to_numpy()) for col in fill_values}
+        if fill_values:
+            df_clean = df_clean.fillna(fill_values)
+    
+    _incremental_cache[state_path] = {
+        'run_id': run_id,
+        'deduplicator': deduplicator,
+        'df_clean': df_clean,
+        'columns_to_drop': columns_to_drop,
+        'fill_values': fill_values,
+        'missing': missing
+    }
+    
+    report = {
+        'mode': mode,
+        'rows_total': len(df),
+        'rows_processed': len(new_rows),
+        'duplicates_removed': stats.duplicates_removed,
+        'columns_dropped': {col: stats.missing_ratio(col) for col in columns_to_drop},
+        'fill_values': fill_values,
+        'imputed': {col: len(positions) for col, positions in missing.items()}
+    }
+    # Copia: il risultato in cache non deve cambiare se il chiamante modifica il suo
+    return df_clean.copy(), report
+
+def _show_incremental_report(report):
+    """Eventi della pulizia incrementale (stesso formato di clean_dataset_basic)"""
+    if report['mode'] == 'incremental':
+        emit('info', f"Pulizia incrementale: processate {report['rows_processed']} nuove righe "
+                     f"su {report['rows_total']}", source='clean_dataset_incremental', report=report)
+    
+    if report['duplicates_removed'] > 0:
+        emit('info', f"Rimosse {report['duplicates_removed']} righe duplicate",
+             source='clean_dataset_incremental')
+    
+    for column, missing_pct in report['columns_dropped'].items():
+        emit('info', f"Rimossa colonna '{column}' ({missing_pct:.1%} valori mancanti)",
+             source='clean_dataset_incremental', column=column, missing_pct=missing_pct)
+    
+    if report['imputed'].get('Age'):
+        emit('info', f"Sostituiti {report['imputed']['Age']} valori mancanti in 'Age' con mediana "
+                     f"({report['fill_values']['Age']:.1f})", source='clean_dataset_incremental')
+    if report['imputed'].get('Embarked'):
+        emit('info', f"Sostituiti {report['imputed']['Embarked']} valori mancanti in 'Embarked' con moda "
+                     f"('{report['fill_values']['Embarked']}')", source='clean_dataset_incremental')
@@ -0,0 +1,98 @@
+"""
+src/utils/dataset_registry.py
+Registro condiviso dei dataset preparati (originale, pulito, con feature base)
+"""
+
+import os
+from src.utils.headless import cache_resource
+from src.config import DATA_FILE, DATA_URL, DATASET_REGISTRY_CONFIG
+from src.utils.data_loader import load_titanic_data
+from src.utils.data_processor import clean_dataset_basic, create_basic_features
+
+# ----------------1. Versione Dataset
+def get_dataset_version():
+    """
+    Restituisce una chiave di versione economica del dataset
+    
+    Usa mtime e dimensione del file locale: nessuna lettura o hashing del
+    contenuto ad ogni rerun della pagina.
+    """
+    if os.path.exists(DATA_FILE):
+        stat = os.stat(DATA_FILE)
+        return f"{os.path.basename(DATA_FILE)}:{stat.st_mtime_ns}:{stat.st_size}"
+    return f"url:{DATA_URL}"
+
+# ----------------2. Costruzione Dataset (una volta per versione)
+@cache_resource(max_entries=DATASET_REGISTRY_CONFIG['max_versions'], show_spinner=False)
+def _build_datasets(version):
+    """
+    Costruisce tutti gli stadi del dataset per una versione
+    
+    Il cache e' indicizzato solo dalla stringa di versione: le pagine non
+    devono piu' hashare interi DataFrame per ottenere i dati preparati.
+    """
+    # Nuova versione del file: invalida il caricamento in cache
+    load_titanic_data.clear()
+    
+    df_original = load_titanic_data()
+    if df_original is None:
+        return None
+    
+    df_cleaned = clean_dataset_basic(df_original)
+    df_featured = create_basic_features(df_cleaned)
+    
+    datasets = {
+        'original': df_original,
+        'cleaned': df_cleaned,
+        'featured': df_featured
+    }
+    
+    # Provenienza del frame: la versione e' la chiave di memoization delle
+    # feature derivate (feature_registry), condivisa da tutti gli stadi
+    for stage, frame in datasets.items():
+        frame.attrs['dataset_version'] = version
+        frame.attrs['dataset_stage'] = stage
+    
+    return datasets
+
+# ----------------3. Accesso ai Dataset
+def get_dataset(stage='cleaned'):
+    """
+    Restituisce uno stadio del dataset condiviso
+    
+    I frame in cache sono condivisi tra pagine e sessioni: viene restituita
+    una copia superficiale, cosi' le colonne aggiunte da una pagina non
+    modificano il frame condiviso.
+    
+    Args:
+        stage: 'original', 'cleaned' o 'featured'
+    
+    Returns:
+        DataFrame o None se il caricamento fallisce
+    """
+    if stage not in DATASET_REGISTRY_CONFIG['stages']:
+        raise ValueError(f"Stadio dataset non supportato: {stage}")
+    
+    datasets = _build_datasets(get_dataset_version())
+    if datasets is None:
+        return None
+    
+    return datasets[stage].copy(deep=False)
+
+def get_datasets(*stages):
+    """
+    Restituisce piu' stadi del dataset in un'unica chiamata
+    
+    Returns:
+        Tupla di DataFrame nell'ordine richiesto (None se il caricamento fallisce)
+    """
+    stages = stages or tuple(DATASET_REGISTRY_CONFIG['stages'])
+    return tuple(get_dataset(stage) for stage in stages)
+
+def clear_datasets():
+    """Svuota il registro e le feature memorizzate (es. dopo aver sostituito il file dati)"""
+    from src.utils.feature_registry import clear_feature_memo
+
+    _build_datasets.clear()
+    load_titanic_data.clear()
+    clear_feature_memo()
@@ -3,11 +3,29 @@ src/utils/feature_engineering.py
 Funzioni per feature engineering avanzato
 """
 
-import pandas as pd
-import numpy as np
-import re
-from sklearn.preprocessing import LabelEncoder
-import streamlit as st
+from src.utils.headless import emit
+from contextlib import nullcontext
+from src.utils.helpers import track_peak_memory
+from src.utils.feature_registry import compute_features, available_features
+
+# Feature di apply_full_feature_engineering, nell'ordine delle colonne prodotte
+FULL_FEATURE_SET = [
+    # Nome
+    'Title', 'Name_Length', 'Name_Word_Count', 'Has_Nickname', 'Is_Nobility',
+    # Cabina
+    'Deck',
+    # Economiche
+    'Family_Size', 'Fare_Per_Person', 'Fare_Relative_To_Class', 'Fare_Percentile',
+    'Is_Economy_Fare', 'Is_Premium_Fare',
+    # Età
+    'Age_Group_Detailed', 'Is_Child', 'Is_Senior', 'Is_Adult_Prime',
+    # Famiglia
+    'Family_Type', 'Has_Spouse', 'Has_Children', 'Has_Siblings', 'Is_Optimal_Family',
+    # Categoriche
+    'Class_Rank', 'Is_Female', 'Embarked_Wealth_Score',
+    # Interazioni
+    'Class_Sex', 'Age_Class_Ratio', 'Family_Class_Score', 'Is_Luxury_Traveler'
+]
 
 # ----------------1. Estrazione Titolo dal Nome (estensione analisi nomi)
 def extract_title_from_name(df):
@@ -18,41 +36,22 @@ def extract_title_from_name(df):
     if df is None or 'Name' not in df.columns:
         return df
     
-    df_copy = df.copy()
-    
-    # Estrai titolo usando regex
-    df_copy['Title'] = df_copy['Name'].str.extract(' ([A-Za-z]+)\.', expand=False)
-    
-    # Raggruppa titoli rari in categorie comuni
-    title_mapping = {
-        'Mr': 'Mr',
-        'Mrs': 'Mrs', 
-        'Miss': 'Miss',
-        'Master': 'Master',
-        'Dr': 'Officer',
-        'Rev': 'Officer',
-        'Col': 'Officer',
-        'Major': 'Officer',
-        'Mlle': 'Miss',
-        'Countess': 'Royalty',
-        'Ms': 'Miss',
-        'Lady': 'Royalty',
-        'Jonkheer': 'Royalty',
-        'Don': 'Royalty',
-        'Dona': 'Royalty',
-        'Mme': 'Mrs',
-        'Capt': 'Officer',
-        'Sir': 'Royalty'
-    }
-    
-    df_copy['Title'] = df_copy['Title'].map(title_mapping)
-    df_copy['Title'].fillna('Other', inplace=True)
+    # Titoli rari raggruppati (Officer, Royalty, Other) - vedi feature_registry
+    df_titles = compute_features(df, ['Title'])
     
-    st.info(f"Estratti {df_copy['Title'].nunique()} titoli unici dal nome")
+    emit('info', f"Estratti {df_titles['Title'].nunique()} titoli unici dal nome",
+         source='extract_title_from_name', n_titles=int(df_titles['Title'].nunique()))
     
-    return df_copy
+    return df_titles
 
 # ----------------2. Estrazione Deck dalla Cabina (analisi posizione nave)
+def _group_rare_decks(df, min_count=10):
+    """Raggruppa in 'Other' i deck con meno di min_count passeggeri (in place)"""
+    deck_counts = df['Deck'].value_counts()
+    rare_decks = deck_counts[deck_counts < min_count].index
+    df['Deck'] = df['Deck'].where(~df['Deck'].isin(rare_decks), 'Other')
+    return df
+
 def extract_deck_from_cabin(df):
     """
     Estrae il deck dalla cabina per analisi posizione sulla nave
@@ -60,24 +59,20 @@ def extract_deck_from_cabin(df):
     if df is None or 'Cabin' not in df.columns:
         return df
     
-    df_copy = df.copy()
-    
-    # Estrai prima lettera della cabina come deck
-    df_copy['Deck'] = df_copy['Cabin'].str[0]
-    
-    # Sostituisci NaN con 'Unknown'
-    df_copy['Deck'].fillna('Unknown', inplace=True)
+    # Prima lettera della cabina come deck ('Unknown' se mancante)
+    df_decks = _group_rare_decks(compute_features(df, ['Deck']))
     
-    # Raggruppa deck rari
-    deck_counts = df_copy['Deck'].value_counts()
-    rare_decks = deck_counts[deck_counts < 10].index
-    df_copy.loc[df_copy['Deck'].isin(rare_decks), 'Deck'] = 'Other'
+    emit('info', f"Estratti {df_decks['Deck'].nunique()} deck dalla cabina",
+         source='extract_deck_from_cabin', n_decks=int(df_decks['Deck'].nunique()))
     
-    st.info(f"Estratti {df_copy['Deck'].nunique()} deck dalla cabina")
-    
-    return df_copy
+    return df_decks
 
 # ----------------3. Calcolo Tariffa per Persona (analisi economica)
+def _fill_fare_per_person(df):
+    """Valori nulli della tariffa per persona sostituiti con la mediana (in place)"""
+    df['Fare_Per_Person'] = df['Fare_Per_Person'].fillna(df['Fare_Per_Person'].median())
+    return df
+
 def calculate_fare_per_person(df):
     """
     Calcola tariffa per persona considerando la famiglia
@@ -85,21 +80,12 @@ def calculate_fare_per_person(df):
     if df is None or 'Fare' not in df.columns:
         return df
     
-    df_copy = df.copy()
-    
-    # Calcola dimensione famiglia se non esiste
-    if 'Family_Size' not in df_copy.columns:
-        df_copy['Family_Size'] = df_copy['SibSp'] + df_copy['Parch'] + 1
+    df_fare = _fill_fare_per_person(compute_features(df, ['Family_Size', 'Fare_Per_Person']))
     
-    # Calcola tariffa per persona
-    df_copy['Fare_Per_Person'] = df_copy['Fare'] / df_copy['Family_Size']
+    emit('info', "Calcolata tariffa per persona basata sulla dimensione famiglia",
+         source='calculate_fare_per_person')
     
-    # Gestisci divisioni per zero o valori nulli
-    df_copy['Fare_Per_Person'].fillna(df_copy['Fare_Per_Person'].median(), inplace=True)
-    
-    st.info("Calcolata tariffa per persona basata sulla dimensione famiglia")
-    
-    return df_copy
+    return df_fare
 
 # ----------------4. Creazione Fasce Età Avanzate (da notebook gruppi età)
 def create_advanced_age_groups(df):
@@ -110,22 +96,8 @@ def create_advanced_age_groups(df):
     if df is None or 'Age' not in df.columns:
         return df
     
-    df_copy = df.copy()
-    
-    # Fasce età dettagliate
-    df_copy['Age_Group_Detailed'] = pd.cut(
-        df_copy['Age'],
-        bins=[0, 5, 12, 18, 25, 35, 50, 65, 100],
-        labels=['Infant', 'Child', 'Teen', 'Young_Adult', 'Adult', 'Middle_Age', 'Senior', 'Elderly'],
-        include_lowest=True
-    )
-    
-    # Indicatori binari per fasce critiche
-    df_copy['Is_Child'] = (df_copy['Age'] <= 12).astype(int)
-    df_copy['Is_Senior'] = (df_copy['Age'] >= 60).astype(int)
-    df_copy['Is_Adult_Prime'] = ((df_copy['Age'] >= 25) & (df_copy['Age'] <= 45)).astype(int)
-    
-    return df_copy
+    # Fasce età dettagliate e indicatori binari per fasce critiche
+    return compute_features(df, ['Age_Group_Detailed', 'Is_Child', 'Is_Senior', 'Is_Adult_Prime'])
 
 # ----------------5. Analisi Nome Avanzata (pattern nei nomi)
 def analyze_name_patterns(df):
@@ -135,22 +107,8 @@ def analyze_name_patterns(df):
     if df is None or 'Name' not in df.columns:
         return df
     
-    df_copy = df.copy()
-    
-    # Lunghezza nome
-    df_copy['Name_Length'] = df_copy['Name'].str.len()
-    
-    # Numero di parole nel nome
-    df_copy['Name_Word_Count'] = df_copy['Name'].str.split().str.len()
-    
-    # Presenza di nickname (parentesi)
-    df_copy['Has_Nickname'] = df_copy['Name'].str.contains(r'\(.*\)').astype(int)
-    
-    # Presenza di titoli nobiliari
-    nobility_pattern = r'(Count|Countess|Lady|Sir|Don|Dona|Jonkheer)'
-    df_copy['Is_Nobility'] = df_copy['Name'].str.contains(nobility_pattern, case=False).astype(int)
-    
-    return df_copy
+    # Lunghezza, numero di parole, nickname (parentesi) e titoli nobiliari
+    return compute_features(df, ['Name_Length', 'Name_Word_Count', 'Has_Nickname', 'Is_Nobility'])
 
 # ----------------6. Feature Interazioni (combinazioni variabili)
 def create_interaction_features(df):
@@ -160,26 +118,8 @@ def create_interaction_features(df):
     if df is None:
         return df
     
-    df_copy = df.copy()
-    
-    # Interazione Classe-Genere
-    if 'Pclass' in df_copy.columns and 'Sex' in df_copy.columns:
-        df_copy['Class_Sex'] = df_copy['Pclass'].astype(str) + '_' + df_copy['Sex']
-    
-    # Interazione Età-Classe
-    if 'Age' in df_copy.columns and 'Pclass' in df_copy.columns:
-        df_copy['Age_Class_Ratio'] = df_copy['Age'] / df_copy['Pclass']
-    
-    # Interazione Famiglia-Classe
-    if 'Family_Size' in df_copy.columns and 'Pclass' in df_copy.columns:
-        df_copy['Family_Class_Score'] = df_copy['Family_Size'] * (4 - df_copy['Pclass'])  # Peso inverso classe
-    
-    # Indicatore viaggiatore di lusso
-    if 'Fare' in df_copy.columns and 'Pclass' in df_copy.columns:
-        fare_threshold = df_copy['Fare'].quantile(0.8)  # Top 20% fare
-        df_copy['Is_Luxury_Traveler'] = ((df_copy['Fare'] > fare_threshold) & (df_copy['Pclass'] == 1)).astype(int)
-    
-    return df_copy
+    features = ['Class_Sex', 'Age_Class_Ratio', 'Family_Class_Score', 'Is_Luxury_Traveler']
+    return compute_features(df, available_features(df, features))
 
 # ----------------7. Feature Economiche Avanzate (analisi tariffe)
 def create_economic_features(df):
@@ -189,24 +129,8 @@ def create_economic_features(df):
     if df is None or 'Fare' not in df.columns:
         return df
     
-    df_copy = df.copy()
-    
-    # Fare relativo alla classe
-    if 'Pclass' in df_copy.columns:
-        class_fare_mean = df_copy.groupby('Pclass')['Fare'].transform('mean')
-        df_copy['Fare_Relative_To_Class'] = df_copy['Fare'] / class_fare_mean
-    
-    # Fare percentile
-    df_copy['Fare_Percentile'] = df_copy['Fare'].rank(pct=True)
-    
-    # Indicatori economici
-    fare_q25 = df_copy['Fare'].quantile(0.25)
-    fare_q75 = df_copy['Fare'].quantile(0.75)
-    
-    df_copy['Is_Economy_Fare'] = (df_copy['Fare'] <= fare_q25).astype(int)
-    df_copy['Is_Premium_Fare'] = (df_copy['Fare'] >= fare_q75).astype(int)
-    
-    return df_copy
+    features = ['Fare_Relative_To_Class', 'Fare_Percentile', 'Is_Economy_Fare', 'Is_Premium_Fare']
+    return compute_features(df, available_features(df, features))
 
 # ----------------8. Feature Familiari Avanzate (da notebook famiglia)
 def create_advanced_family_features(df):
@@ -217,25 +141,8 @@ def create_advanced_family_features(df):
     if df is None:
         return df
     
-    df_copy = df.copy()
-    
-    # Tipo famiglia dettagliato
-    if 'SibSp' in df_copy.columns and 'Parch' in df_copy.columns:
-        df_copy['Family_Type'] = 'Single'
-        df_copy.loc[(df_copy['SibSp'] > 0) & (df_copy['Parch'] == 0), 'Family_Type'] = 'Couple'
-        df_copy.loc[(df_copy['SibSp'] == 0) & (df_copy['Parch'] > 0), 'Family_Type'] = 'Parent'
-        df_copy.loc[(df_copy['SibSp'] > 0) & (df_copy['Parch'] > 0), 'Family_Type'] = 'Full_Family'
-        
-        # Indicatori specifici
-        df_copy['Has_Spouse'] = (df_copy['SibSp'] > 0).astype(int)
-        df_copy['Has_Children'] = (df_copy['Parch'] > 0).astype(int)
-        df_copy['Has_Siblings'] = (df_copy['SibSp'] > 1).astype(int)  # Più di 1 significa anche fratelli
-        
-        # Famiglia ottimale (2-4 membri)
-        if 'Family_Size' in df_copy.columns:
-            df_copy['Is_Optimal_Family'] = ((df_copy['Family_Size'] >= 2) & (df_copy['Family_Size'] <= 4)).astype(int)
-    
-    return df_copy
+    features = ['Family_Type', 'Has_Spouse', 'Has_Children', 'Has_Siblings', 'Is_Optimal_Family']
+    return compute_features(df, available_features(df, features))
 
 # ----------------9. Feature Categoriche Avanzate
 def create_advanced_categorical_features(df):
@@ -245,67 +152,62 @@ def create_advanced_categorical_features(df):
     if df is None:
         return df
     
-    df_copy = df.copy()
-    
-    # Encoding ordinale per classe (inverso per importanza)
-    if 'Pclass' in df_copy.columns:
-        df_copy['Class_Rank'] = 4 - df_copy['Pclass']  # 1st class = 3, 3rd class = 1
-    
-    # Binario sesso
-    if 'Sex' in df_copy.columns:
-        df_copy['Is_Female'] = (df_copy['Sex'] == 'female').astype(int)
-    
-    # Porto di imbarco con logica
-    if 'Embarked' in df_copy.columns:
-        # S = Southampton (più comune), C = Cherbourg (ricchi), Q = Queenstown (poveri)
-        df_copy['Embarked_Wealth_Score'] = df_copy['Embarked'].map({'S': 2, 'C': 3, 'Q': 1}).fillna(2)
-    
-    return df_copy
+    features = ['Class_Rank', 'Is_Female', 'Embarked_Wealth_Score']
+    return compute_features(df, available_features(df, features))
 
 # ----------------10. Feature Engineering Completo
-def apply_full_feature_engineering(df):
+def apply_full_feature_engineering(df, inplace=False, track_memory=False, verbose=True):
     """
-    Applica tutto il feature engineering in sequenza
+    Applica tutto il feature engineering in un unico passaggio
+    
+    Args:
+        df: DataFrame di partenza
+        inplace: Se True il DataFrame passato diventa il frame di lavoro: le
+            nuove colonne vengono aggiunte direttamente, senza alcuna copia
+            (da usare quando il chiamante non ha piu' bisogno dell'originale)
+        track_memory: Misura e mostra il picco di memoria del passaggio
+            (tracemalloc rallenta sensibilmente le operazioni su stringhe)
+        verbose: Emette gli eventi di avanzamento (vedi src/utils/headless.py)
+    
+    Returns:
+        DataFrame con le nuove feature (lo stesso oggetto se inplace=True)
     """
     if df is None:
         return df
     
-    st.info("Iniziando feature engineering completo...")
-    
-    # Pipeline completa
-    df_engineered = df.copy()
-    
-    # 1. Feature da nomi
-    df_engineered = extract_title_from_name(df_engineered)
-    df_engineered = analyze_name_patterns(df_engineered)
-    
-    # 2. Feature da cabine
-    df_engineered = extract_deck_from_cabin(df_engineered)
-    
-    # 3. Feature economiche
-    df_engineered = calculate_fare_per_person(df_engineered)
-    df_engineered = create_economic_features(df_engineered)
-    
-    # 4. Feature età
-    df_engineered = create_advanced_age_groups(df_engineered)
-    
-    # 5. Feature famiglia
-    df_engineered = create_advanced_family_features(df_engineered)
+    if verbose:
+        emit('info', "Iniziando feature engineering completo...", source='apply_full_feature_engineering')
     
-    # 6. Feature categoriche
-    df_engineered = create_advanced_categorical_features(df_engineered)
+    n_original_columns = len(df.columns)
     
-    # 7. Feature interazioni
-    df_engineered = create_interaction_features(df_engineered)
-    
-    # Rimuovi colonne con troppi NaN
-    for col in df_engineered.columns:
-        null_pct = df_engineered[col].isnull().sum() / len(df_engineered)
-        if null_pct > 0.8:  # Rimuovi se >80% NaN
-            df_engineered.drop(col, axis=1, inplace=True)
-            st.warning(f"Rimossa colonna {col} (troppi valori mancanti)")
-    
-    new_features_count = len(df_engineered.columns) - len(df.columns)
-    st.success(f"Feature engineering completato! Aggiunte {new_features_count} nuove feature")
+    with track_peak_memory() if track_memory else nullcontext({}) as memory_report:
+        # Tutte le feature calcolabili in un solo passaggio (nessuna copia intermedia)
+        df_engineered = compute_features(df, available_features(df, FULL_FEATURE_SET), inplace=inplace)
+        
+        # Passaggi che dipendono dall'intero dataset (sul frame di lavoro)
+        if 'Deck' in df_engineered.columns:
+            _group_rare_decks(df_engineered)
+        if 'Fare_Per_Person' in df_engineered.columns:
+            _fill_fare_per_person(df_engineered)
+        
+        # Rimuovi colonne con troppi NaN (>80%)
+        # (una colonna alla volta: nessuna maschera booleana dell'intero frame)
+        columns_to_drop = [col for col in df_engineered.columns
+                           if df_engineered[col].isnull().mean() > 0.8]
+        df_engineered.drop(columns=columns_to_drop, inplace=True)
+    
+    if verbose:
+        for col in columns_to_drop:
+            emit('warning', f"Rimossa colonna {col} (troppi valori mancanti)",
+                 source='apply_full_feature_engineering', column=col)
+        
+        new_features_count = len(df_engineered.columns) - n_original_columns
+        emit('success', f"Feature engineering completato! Aggiunte {new_features_count} nuove feature",
+             source='apply_full_feature_engineering', new_features=new_features_count)
+        
+        if track_memory:
+            emit('info', f"Picco memoria feature engineering: {memory_report['peak_mb']:.1f} MB "
+                         f"({memory_report['seconds']:.2f} s)",
+                 source='apply_full_feature_engineering', memory=memory_report)
     
-    return df_engineered
\ No newline at end of file
+    return df_engineered
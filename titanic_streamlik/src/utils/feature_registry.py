@@ -0,0 +1,420 @@
+"""
+src/utils/feature_registry.py
+Registro dichiarativo delle feature derivate, condiviso da feature_engineering.py
+(pagine di analisi) e TitanicFeatureEngineer (pipeline ML)
+"""
+
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from src.config import DATASET_REGISTRY_CONFIG
+
+# ----------------1. Definizione Feature
+class FeatureSpec:
+    """
+    Descrizione dichiarativa di una feature derivata
+
+    Args:
+        name: Nome della colonna prodotta
+        inputs: Colonne richieste (originali o altre feature registrate)
+        dtype: Tipo della colonna prodotta
+        func: Funzione che riceve un dizionario colonna -> Series e
+            restituisce valori allineati alle righe
+        rowwise: True se il valore di una riga dipende solo da quella riga
+            (False per feature che usano statistiche dell'intera colonna)
+        memoize: Riusa i valori gia' calcolati sulla stessa versione del dataset
+            (solo per feature riga per riga costose, es. parsing di stringhe)
+    """
+
+    def __init__(self, name, inputs, dtype, func, rowwise=True, memoize=False, description=''):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.dtype = dtype
+        self.func = func
+        self.rowwise = rowwise
+        self.memoize = memoize and rowwise
+        self.description = description
+
+FEATURE_REGISTRY = {}
+
+def register_feature(name, inputs, dtype, rowwise=True, memoize=False, description=''):
+    """Decoratore che registra una funzione come feature"""
+    def decorator(func):
+        FEATURE_REGISTRY[name] = FeatureSpec(name, inputs, dtype, func, rowwise, memoize, description)
+        return func
+    return decorator
+
+# ----------------2. Tabelle Condivise
+# Titolo preceduto da uno spazio (copre anche 'Rothes, the Countess. of ...')
+TITLE_PATTERN = r' ([A-Za-z]+)\.'
+
+TITLE_MAPPING = {
+    'Mr': 'Mr',
+    'Mrs': 'Mrs',
+    'Miss': 'Miss',
+    'Master': 'Master',
+    'Dr': 'Officer',
+    'Rev': 'Officer',
+    'Col': 'Officer',
+    'Major': 'Officer',
+    'Mlle': 'Miss',
+    'Countess': 'Royalty',
+    'Ms': 'Miss',
+    'Lady': 'Royalty',
+    'Jonkheer': 'Royalty',
+    'Don': 'Royalty',
+    'Dona': 'Royalty',
+    'Mme': 'Mrs',
+    'Capt': 'Officer',
+    'Sir': 'Royalty'
+}
+
+NOBILITY_PATTERN = r'(?:Count|Countess|Lady|Sir|Don|Dona|Jonkheer)'
+
+FAMILY_CATEGORY_LABELS = np.array(['Alone', 'Small', 'Large'], dtype=object)
+
+# Limiti superiori (esclusi) dei gruppi di età; 'Unknown' per i mancanti
+AGE_GROUP_LIMITS = np.array([13, 25, 40, 60], dtype='float64')
+AGE_GROUP_LABELS = np.array(['Unknown', 'Child', 'Young_Adult', 'Adult', 'Middle_Aged', 'Senior'], dtype=object)
+
+AGE_GROUP_DETAILED_BINS = [0, 5, 12, 18, 25, 35, 50, 65, 100]
+AGE_GROUP_DETAILED_LABELS = ['Infant', 'Child', 'Teen', 'Young_Adult', 'Adult', 'Middle_Age', 'Senior', 'Elderly']
+
+EMBARKED_WEALTH_SCORE = {'S': 2, 'C': 3, 'Q': 1}
+
+# ----------------3. Feature da Nome
+@register_feature('Title', ['Name'], 'object', memoize=True,
+                  description="Titolo estratto dal nome e raggruppato")
+def _title(cols):
+    titles = cols['Name'].astype(str).str.extract(TITLE_PATTERN, expand=False)
+
+    # Mapping sui soli titoli distinti: nessun titolo (o nome mancante) ->
+    # Unknown, titolo non mappato -> Other
+    codes, uniques = pd.factorize(titles)
+    labels = np.append(uniques.map(TITLE_MAPPING).fillna('Other').to_numpy(dtype=object), 'Unknown')
+    return labels[codes]
+
+@register_feature('Name_Length', ['Name'], 'int64')
+def _name_length(cols):
+    return cols['Name'].str.len()
+
+@register_feature('Name_Word_Count', ['Name'], 'int64', memoize=True)
+def _name_word_count(cols):
+    # Numero di sequenze di caratteri non spazio (equivale a split().len())
+    return cols['Name'].str.count(r'\S+')
+
+@register_feature('Has_Nickname', ['Name'], 'int64', memoize=True)
+def _has_nickname(cols):
+    return cols['Name'].str.contains(r'\(.*\)', na=False)
+
+@register_feature('Is_Nobility', ['Name'], 'int64', memoize=True)
+def _is_nobility(cols):
+    return cols['Name'].str.contains(NOBILITY_PATTERN, case=False, na=False)
+
+# ----------------4. Feature da Cabina
+@register_feature('Deck', ['Cabin'], 'object',
+                  description="Primo carattere della cabina se alfabetico, altrimenti Unknown")
+def _deck(cols):
+    cabin = cols['Cabin']
+    first_chars = cabin.astype(str).str[:1]
+
+    # isalpha valutato solo sui caratteri distinti
+    codes, uniques = pd.factorize(first_chars)
+    decks = np.array([char if char.isalpha() else 'Unknown' for char in uniques] + ['Unknown'], dtype=object)
+    codes[cabin.isna().to_numpy()] = -1
+    return decks[codes]
+
+# ----------------5. Feature Famiglia
+@register_feature('Family_Size', ['SibSp', 'Parch'], None)
+def _family_size(cols):
+    return cols['SibSp'] + cols['Parch'] + 1
+
+@register_feature('Is_Alone', ['Family_Size'], 'int64')
+def _is_alone(cols):
+    return cols['Family_Size'] == 1
+
+@register_feature('Family_Category', ['Family_Size'], 'object')
+def _family_category(cols):
+    # 1 -> Alone, <= 4 -> Small, altrimenti Large
+    size = cols['Family_Size'].to_numpy(dtype='float64', na_value=np.nan)
+    return FAMILY_CATEGORY_LABELS[np.select([size == 1, size <= 4], [0, 1], default=2)]
+
+@register_feature('Family_Type', ['SibSp', 'Parch'], 'object')
+def _family_type(cols):
+    has_sibsp = (cols['SibSp'] > 0).to_numpy()
+    has_parch = (cols['Parch'] > 0).to_numpy()
+    return np.select(
+        [has_sibsp & has_parch, has_parch, has_sibsp],
+        ['Full_Family', 'Parent', 'Couple'],
+        default='Single'
+    ).astype(object)
+
+@register_feature('Has_Spouse', ['SibSp'], 'int64')
+def _has_spouse(cols):
+    return cols['SibSp'] > 0
+
+@register_feature('Has_Children', ['Parch'], 'int64')
+def _has_children(cols):
+    return cols['Parch'] > 0
+
+@register_feature('Has_Siblings', ['SibSp'], 'int64')
+def _has_siblings(cols):
+    # Più di 1 significa anche fratelli
+    return cols['SibSp'] > 1
+
+@register_feature('Is_Optimal_Family', ['Family_Size'], 'int64')
+def _is_optimal_family(cols):
+    return (cols['Family_Size'] >= 2) & (cols['Family_Size'] <= 4)
+
+# ----------------6. Feature Tariffa
+@register_feature('Fare_Per_Person', ['Fare', 'Family_Size'], 'float64')
+def _fare_per_person(cols):
+    return cols['Fare'] / cols['Family_Size']
+
+@register_feature('Fare_Log', ['Fare'], 'float64', rowwise=False)
+def _fare_log(cols):
+    return np.log1p(cols['Fare'].fillna(cols['Fare'].median()))
+
+@register_feature('Fare_Binned', ['Fare'], 'category', rowwise=False)
+def _fare_binned(cols):
+    return pd.qcut(cols['Fare'].fillna(cols['Fare'].median()),
+                   q=4, labels=['Low', 'Medium', 'High', 'Very_High'])
+
+@register_feature('Fare_Relative_To_Class', ['Fare', 'Pclass'], 'float64', rowwise=False)
+def _fare_relative_to_class(cols):
+    class_fare_mean = cols['Fare'].groupby(cols['Pclass'], observed=True).transform('mean')
+    return cols['Fare'] / class_fare_mean
+
+@register_feature('Fare_Percentile', ['Fare'], 'float64', rowwise=False)
+def _fare_percentile(cols):
+    return cols['Fare'].rank(pct=True)
+
+@register_feature('Is_Economy_Fare', ['Fare'], 'int64', rowwise=False)
+def _is_economy_fare(cols):
+    return cols['Fare'] <= cols['Fare'].quantile(0.25)
+
+@register_feature('Is_Premium_Fare', ['Fare'], 'int64', rowwise=False)
+def _is_premium_fare(cols):
+    return cols['Fare'] >= cols['Fare'].quantile(0.75)
+
+# ----------------7. Feature Età
+@register_feature('Age_Group', ['Age'], 'object')
+def _age_group(cols):
+    age = cols['Age'].to_numpy(dtype='float64', na_value=np.nan)
+
+    # Indice del gruppo: numero di limiti <= età (1 = Child ... 5 = Senior)
+    group_index = np.searchsorted(AGE_GROUP_LIMITS, age, side='right') + 1
+    group_index[np.isnan(age)] = 0
+    return AGE_GROUP_LABELS[group_index]
+
+@register_feature('Age_Binned', ['Age'], 'category', rowwise=False)
+def _age_binned(cols):
+    return pd.cut(cols['Age'].fillna(cols['Age'].median()),
+                  bins=5, labels=['Very_Young', 'Young', 'Middle', 'Mature', 'Old'])
+
+@register_feature('Age_Group_Detailed', ['Age'], 'category')
+def _age_group_detailed(cols):
+    return pd.cut(cols['Age'], bins=AGE_GROUP_DETAILED_BINS,
+                  labels=AGE_GROUP_DETAILED_LABELS, include_lowest=True)
+
+@register_feature('Is_Child', ['Age'], 'int64')
+def _is_child(cols):
+    return cols['Age'] <= 12
+
+@register_feature('Is_Senior', ['Age'], 'int64')
+def _is_senior(cols):
+    return cols['Age'] >= 60
+
+@register_feature('Is_Adult_Prime', ['Age'], 'int64')
+def _is_adult_prime(cols):
+    return (cols['Age'] >= 25) & (cols['Age'] <= 45)
+
+# ----------------8. Feature Categoriche
+@register_feature('Class_Rank', ['Pclass'], None)
+def _class_rank(cols):
+    # 1st class = 3, 3rd class = 1
+    return 4 - cols['Pclass']
+
+@register_feature('Is_Female', ['Sex'], 'int64')
+def _is_female(cols):
+    return cols['Sex'] == 'female'
+
+@register_feature('Embarked_Wealth_Score', ['Embarked'], 'float64')
+def _embarked_wealth_score(cols):
+    # S = Southampton (più comune), C = Cherbourg (ricchi), Q = Queenstown (poveri)
+    return cols['Embarked'].astype(object).map(EMBARKED_WEALTH_SCORE).fillna(2)
+
+# ----------------9. Feature di Interazione
+@register_feature('Class_Sex', ['Pclass', 'Sex'], 'object')
+def _class_sex(cols):
+    return cols['Pclass'].astype(str) + '_' + cols['Sex'].astype(str)
+
+@register_feature('Sex_Pclass', ['Sex', 'Pclass'], 'object')
+def _sex_pclass(cols):
+    return cols['Sex'].astype(str) + '_' + cols['Pclass'].astype(str)
+
+@register_feature('Age_Sex', ['Age_Group', 'Sex'], 'object')
+def _age_sex(cols):
+    return cols['Age_Group'].astype(str) + '_' + cols['Sex'].astype(str)
+
+@register_feature('Title_Pclass', ['Title', 'Pclass'], 'object')
+def _title_pclass(cols):
+    return cols['Title'].astype(str) + '_' + cols['Pclass'].astype(str)
+
+@register_feature('Age_Class_Ratio', ['Age', 'Pclass'], 'float64')
+def _age_class_ratio(cols):
+    return cols['Age'] / cols['Pclass']
+
+@register_feature('Family_Class_Score', ['Family_Size', 'Pclass'], None)
+def _family_class_score(cols):
+    # Peso inverso classe
+    return cols['Family_Size'] * (4 - cols['Pclass'])
+
+@register_feature('Is_Luxury_Traveler', ['Fare', 'Pclass'], 'int64', rowwise=False)
+def _is_luxury_traveler(cols):
+    # Top 20% fare in prima classe
+    return (cols['Fare'] > cols['Fare'].quantile(0.8)) & (cols['Pclass'] == 1)
+
+# ----------------10. Risoluzione Dipendenze
+def _resolve_order(names):
+    """Ordine di calcolo (dipendenze prima) delle feature richieste"""
+    order = []
+    visiting = set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"Dipendenza circolare sulla feature {name}")
+        visiting.add(name)
+        for column in FEATURE_REGISTRY[name].inputs:
+            if column in FEATURE_REGISTRY:
+                visit(column)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in names:
+        if name not in FEATURE_REGISTRY:
+            raise KeyError(f"Feature non registrata: {name}")
+        visit(name)
+    return order
+
+def is_feature_available(df, name):
+    """True se tutte le colonne di base necessarie alla feature sono presenti"""
+    return all(
+        is_feature_available(df, column) if column in FEATURE_REGISTRY else column in df.columns
+        for column in FEATURE_REGISTRY[name].inputs
+    )
+
+def available_features(df, names=None):
+    """Feature (tra quelle richieste) calcolabili sul DataFrame"""
+    names = FEATURE_REGISTRY.keys() if names is None else names
+    return [name for name in names if is_feature_available(df, name)]
+
+# ----------------11. Memoization per Versione del Dataset
+# versione -> {feature: valori indicizzati come le righe del dataset}. La
+# versione (dataset_registry.get_dataset_version) identifica il contenuto
+# del file: le righe con la stessa etichetta di indice hanno gli stessi
+# input, quindi nessun hashing dei valori a ogni lookup
+_MEMO = OrderedDict()
+_MEMO_LOCK = threading.Lock()
+
+def _memo_lookup(version, spec, df):
+    """Valori memorizzati per le righe del DataFrame (None se alcune righe mancano)"""
+    with _MEMO_LOCK:
+        values = _MEMO.get(version, {}).get(spec.name)
+    if values is None:
+        return None
+
+    if values.index is df.index:
+        return values
+    positions = values.index.get_indexer(df.index)
+    if (positions < 0).any():
+        return None
+    return values.iloc[positions].set_axis(df.index)
+
+def _memo_store(version, spec, df, values):
+    if not df.index.is_unique:
+        return
+    with _MEMO_LOCK:
+        features = _MEMO.setdefault(version, {})
+        _MEMO.move_to_end(version)
+        while len(_MEMO) > DATASET_REGISTRY_CONFIG['max_versions']:
+            _MEMO.popitem(last=False)
+
+        previous = features.get(spec.name)
+        if previous is not None:
+            # Unione con le righe gia' note (es. train e test dello stesso dataset)
+            values = pd.concat([previous[~previous.index.isin(df.index)], values])
+        features[spec.name] = values
+
+def clear_feature_memo():
+    """Svuota i valori memorizzati"""
+    with _MEMO_LOCK:
+        _MEMO.clear()
+
+# ----------------12. Calcolo Feature
+def _cast(values, dtype, index):
+    series = values if isinstance(values, pd.Series) else pd.Series(values, index=index)
+    if dtype is None or str(series.dtype) == dtype:
+        return series
+    if dtype.startswith('int') and series.isna().any():
+        # Interi con valori mancanti: float64 invece di un cast che fallirebbe
+        return series.astype('float64')
+    return series.astype(dtype)
+
+def compute_features(df, names, inplace=False, dataset_version=None):
+    """
+    Calcola un insieme di feature in un unico passaggio
+
+    Le dipendenze (es. Family_Size per Fare_Per_Person) sono calcolate una
+    volta sola e aggiunte all'output solo se richieste. Nessuna copia
+    intermedia del DataFrame: le colonne sono raccolte e assegnate insieme.
+
+    Args:
+        df: DataFrame con le colonne di base
+        names: Feature da calcolare (vedi FEATURE_REGISTRY)
+        inplace: Se True aggiunge le colonne a df invece di restituire un nuovo DataFrame
+        dataset_version: Chiave di memoization (default: df.attrs['dataset_version'],
+            impostato da dataset_registry). I valori sono riusati per
+            etichetta di riga senza ricontrollare gli input: un frame con
+            colonne di input modificate non deve conservare la versione
+
+    Returns:
+        DataFrame con le feature richieste
+    """
+    names = list(names)
+    if dataset_version is None:
+        dataset_version = df.attrs.get('dataset_version')
+
+    computed = {}
+    columns = {}
+
+    def get_column(column):
+        return computed[column] if column in computed else df[column]
+
+    for name in _resolve_order(names):
+        spec = FEATURE_REGISTRY[name]
+
+        values = None
+        if spec.memoize and dataset_version is not None:
+            values = _memo_lookup(dataset_version, spec, df)
+
+        if values is None:
+            inputs = {column: get_column(column) for column in spec.inputs}
+            values = _cast(spec.func(inputs), spec.dtype, df.index)
+            if spec.memoize and dataset_version is not None:
+                _memo_store(dataset_version, spec, df, values)
+
+        if inplace and name in names:
+            # Colonna inserita subito: nel dizionario resta solo la vista sul frame
+            df[name] = values
+            values = df[name]
+        elif name in names:
+            columns[name] = values
+        computed[name] = values
+
+    if inplace:
+        return df
+    return df.assign(**columns)
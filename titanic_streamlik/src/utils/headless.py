@@ -0,0 +1,151 @@
+"""
+src/utils/headless.py
+Livello di esecuzione headless: log strutturato degli eventi e cache
+indipendenti da Streamlit
+"""
+
+import functools
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+logger = logging.getLogger('titanic')
+
+EVENT_LEVELS = ('info', 'success', 'warning', 'error')
+
+_LOG_LEVELS = {
+    'info': logging.INFO,
+    'success': logging.INFO,
+    'warning': logging.WARNING,
+    'error': logging.ERROR
+}
+
+# Collettore attivo nel contesto corrente (thread / task)
+_active_events = ContextVar('titanic_events', default=None)
+
+# ----------------1. Rilevamento Contesto Streamlit
+def _streamlit_module():
+    """Modulo streamlit solo se gia' importato dal processo (mai importato qui)"""
+    return sys.modules.get('streamlit')
+
+def in_streamlit_script():
+    """True se il codice gira dentro uno script Streamlit in esecuzione"""
+    st = _streamlit_module()
+    if st is None:
+        return False
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return False
+    return get_script_run_ctx() is not None
+
+# ----------------2. Log degli Eventi
+def emit(level, message, source=None, **data):
+    """
+    Registra un evento delle funzioni di calcolo
+
+    Dentro collect_events l'evento viene solo raccolto; altrimenti viene
+    mostrato in Streamlit se c'e' uno script in esecuzione, o inviato al
+    logger 'titanic' in esecuzione batch.
+
+    Args:
+        level: 'info', 'success', 'warning' o 'error'
+        message: Testo per l'utente
+        source: Funzione/modulo di origine (opzionale)
+        **data: Dati strutturati aggiuntivi (conteggi, colonne, ...)
+
+    Returns:
+        Dizionario dell'evento
+    """
+    if level not in EVENT_LEVELS:
+        raise ValueError(f"Livello evento non supportato: {level}")
+
+    event = {
+        'level': level,
+        'message': message,
+        'source': source,
+        'timestamp': time.time(),
+        'data': data
+    }
+
+    events = _active_events.get()
+    if events is not None:
+        events.append(event)
+    elif in_streamlit_script():
+        render_event(event)
+    else:
+        logger.log(_LOG_LEVELS[level], message)
+    return event
+
+def info(message, **kwargs):
+    return emit('info', message, **kwargs)
+
+def success(message, **kwargs):
+    return emit('success', message, **kwargs)
+
+def warning(message, **kwargs):
+    return emit('warning', message, **kwargs)
+
+def error(message, **kwargs):
+    return emit('error', message, **kwargs)
+
+@contextmanager
+def collect_events():
+    """
+    Raccoglie gli eventi emessi nel blocco invece di mostrarli
+
+    Yields:
+        Lista (riempita durante il blocco) di eventi
+    """
+    events = []
+    token = _active_events.set(events)
+    try:
+        yield events
+    finally:
+        _active_events.reset(token)
+
+def render_event(event):
+    """Mostra un evento con il widget Streamlit del suo livello"""
+    st = _streamlit_module()
+    if st is None:
+        logger.log(_LOG_LEVELS[event['level']], event['message'])
+        return
+    getattr(st, event['level'])(event['message'])
+
+def render_events(events, min_level='info'):
+    """Mostra in Streamlit una lista di eventi (da collect_events)"""
+    threshold = EVENT_LEVELS.index(min_level)
+    for event in events:
+        if EVENT_LEVELS.index(event['level']) >= threshold:
+            render_event(event)
+
+# ----------------3. Cache Indipendente da Streamlit
+def _passthrough_cache(func):
+    """Nessuna cache fuori da Streamlit: stessa interfaccia (.clear)"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return func(*args, **kwargs)
+    wrapper.clear = lambda *args, **kwargs: None
+    return wrapper
+
+def _cache_shim(cache_name, func, kwargs):
+    st = _streamlit_module()
+    if st is None:
+        decorator = _passthrough_cache
+    else:
+        decorator = getattr(st, cache_name)(**kwargs) if kwargs else getattr(st, cache_name)
+    return decorator if func is None else decorator(func)
+
+def cache_data(func=None, **kwargs):
+    """
+    st.cache_data se Streamlit e' gia' caricato, altrimenti nessuna cache
+
+    Si usa come @cache_data oppure @cache_data(ttl=3600).
+    """
+    return _cache_shim('cache_data', func, kwargs)
+
+def cache_resource(func=None, **kwargs):
+    """st.cache_resource se Streamlit e' gia' caricato, altrimenti nessuna cache"""
+    return _cache_shim('cache_resource', func, kwargs)
@@ -1 +1,87 @@
 # Funzioni di utilità
+
+import hashlib
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+# ----------------1. Misura Picco di Memoria
+@contextmanager
+def track_peak_memory():
+    """
+    Misura il picco di memoria allocata (tracemalloc) all'interno del blocco
+    
+    Le allocazioni di numpy/pandas sono incluse. Se tracemalloc era gia'
+    attivo non viene fermato all'uscita.
+    
+    Yields:
+        Dizionario riempito all'uscita con peak_mb, current_mb e seconds
+    """
+    report = {}
+    already_tracing = tracemalloc.is_tracing()
+    if not already_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline, _ = tracemalloc.get_traced_memory()
+    start = time.perf_counter()
+    
+    try:
+        yield report
+    finally:
+        current, peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+        report['peak_mb'] = max(peak - baseline, 0) / 1024 ** 2
+        report['current_mb'] = max(current - baseline, 0) / 1024 ** 2
+        report['seconds'] = time.perf_counter() - start
+
+def measure_peak_memory(func, *args, **kwargs):
+    """
+    Esegue func misurando il picco di memoria
+    
+    Returns:
+        Tupla (risultato, report di track_peak_memory)
+    """
+    with track_peak_memory() as report:
+        result = func(*args, **kwargs)
+    return result, report
+
+# ----------------2. Fingerprint dei Dati
+def compute_data_fingerprint(*objects):
+    """
+    Impronta (sha1) del contenuto di DataFrame, Series o array
+    
+    Dipende da valori, indice, nomi e dtype delle colonne: due oggetti con
+    lo stesso contenuto hanno la stessa impronta anche se sono copie
+    diverse (es. dopo il pickling verso un processo worker).
+    
+    Args:
+        *objects: DataFrame, Series, array numpy o None
+    
+    Returns:
+        Stringa esadecimale
+    """
+    digest = hashlib.sha1()
+    for obj in objects:
+        if obj is None:
+            digest.update(b'none')
+            continue
+        
+        if isinstance(obj, (pd.DataFrame, pd.Series)):
+            if isinstance(obj, pd.DataFrame):
+                digest.update(repr(list(zip(obj.columns, obj.dtypes.astype(str)))).encode())
+            else:
+                digest.update(repr((obj.name, str(obj.dtype))).encode())
+            values = pd.util.hash_pandas_object(obj, index=True).to_numpy()
+        else:
+            values = np.asarray(obj)
+            digest.update(repr((values.shape, str(values.dtype))).encode())
+            if values.dtype == object:
+                values = pd.util.hash_array(values.ravel())
+            values = np.ascontiguousarray(values)
+        
+        digest.update(values.tobytes())
+    return digest.hexdigest()
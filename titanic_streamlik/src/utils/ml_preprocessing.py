@@ -7,32 +7,30 @@ import pandas as pd
 import numpy as np
 import warnings
 from sklearn.preprocessing import (
-    StandardScaler, MinMaxScaler, RobustScaler, PowerTransformer,
-    LabelEncoder, OneHotEncoder, OrdinalEncoder, TargetEncoder
+    StandardScaler, MinMaxScaler, RobustScaler,
+    LabelEncoder, OneHotEncoder
 )
-from sklearn.impute import SimpleImputer, KNNImputer
-# Import IterativeImputer correttamente
-try:
-    from sklearn.experimental import enable_iterative_imputer
-    from sklearn.impute import IterativeImputer
-    ITERATIVE_IMPUTER_AVAILABLE = True
-except ImportError:
-    ITERATIVE_IMPUTER_AVAILABLE = False
-from sklearn.feature_selection import (
-    SelectKBest, f_classif, chi2, mutual_info_classif,
-    RFE, SelectFromModel, VarianceThreshold
-)
-from sklearn.decomposition import PCA
+from sklearn.impute import SimpleImputer
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.pipeline import Pipeline
-from sklearn.compose import ColumnTransformer
-from scipy import stats
-import re
 
-from src.config import FEATURE_ENGINEERING, PREPROCESSING_CONFIG, COLUMN_LABELS
+from src.utils.quantile_sketch import column_quantiles
+from src.utils.feature_registry import compute_features, is_feature_available
 
 warnings.filterwarnings('ignore')
 
+# ----------------0. Import Differiti
+# Imputazione avanzata, selezione feature, PowerTransformer e PCA vengono
+# importati solo dai metodi che li usano: la pagina di overview non li paga.
+def _iterative_imputer_class():
+    """IterativeImputer (sperimentale in sklearn) oppure None se non disponibile"""
+    try:
+        from sklearn.experimental import enable_iterative_imputer  # noqa: F401
+        from sklearn.impute import IterativeImputer
+    except ImportError:
+        return None
+    return IterativeImputer
+
 # ----------------1. Custom Transformers
 
 class TitanicFeatureEngineer(BaseEstimator, TransformerMixin):
@@ -65,161 +63,43 @@ class TitanicFeatureEngineer(BaseEstimator, TransformerMixin):
         if not self.fitted_:
             raise ValueError("Transformer deve essere fittato prima del transform")
         
-        X_transformed = X.copy()
+        columns = X.columns
+        features = []
         
         # Extract title from name
-        if self.extract_title and 'Name' in X_transformed.columns:
-            X_transformed = self._extract_title(X_transformed)
+        if self.extract_title and 'Name' in columns:
+            features.append('Title')
         
         # Extract deck from cabin
-        if self.extract_deck and 'Cabin' in X_transformed.columns:
-            X_transformed = self._extract_deck(X_transformed)
+        if self.extract_deck and 'Cabin' in columns:
+            features.append('Deck')
         
         # Family features
-        if self.create_family_features:
-            X_transformed = self._create_family_features(X_transformed)
+        if self.create_family_features and 'SibSp' in columns and 'Parch' in columns:
+            features += ['Family_Size', 'Is_Alone', 'Family_Category']
         
-        # Fare features
-        if self.create_fare_features:
-            X_transformed = self._create_fare_features(X_transformed)
+        # Fare features (fare per persona solo se la dimensione famiglia e' disponibile)
+        if self.create_fare_features and 'Fare' in columns:
+            if ('Family_Size' in features or 'Family_Size' in columns) and \
+                    is_feature_available(X, 'Fare_Per_Person'):
+                features.append('Fare_Per_Person')
+            features += ['Fare_Binned', 'Fare_Log']
         
         # Age groups
-        if self.create_age_groups and 'Age' in X_transformed.columns:
-            X_transformed = self._create_age_groups(X_transformed)
+        if self.create_age_groups and 'Age' in columns:
+            features += ['Age_Group', 'Age_Binned']
         
         # Interaction features
         if self.create_interaction_features:
-            X_transformed = self._create_interaction_features(X_transformed)
-        
-        return X_transformed
-    
-    def _extract_title(self, X):
-        """Estrae titolo dal nome"""
-        def extract_title_from_name(name):
-            if pd.isna(name):
-                return 'Unknown'
-            
-            # Pattern per estrarre titolo
-            title_pattern = r', ([A-Za-z]+)\.'
-            match = re.search(title_pattern, str(name))
-            
-            if match:
-                title = match.group(1)
-                
-                # Raggruppa titoli rari
-                title_mapping = {
-                    'Mr': 'Mr',
-                    'Mrs': 'Mrs', 
-                    'Miss': 'Miss',
-                    'Master': 'Master',
-                    'Dr': 'Officer',
-                    'Rev': 'Officer',
-                    'Col': 'Officer',
-                    'Major': 'Officer',
-                    'Mlle': 'Miss',
-                    'Countess': 'Royal',
-                    'Ms': 'Mrs',
-                    'Lady': 'Royal',
-                    'Jonkheer': 'Royal',
-                    'Don': 'Royal',
-                    'Dona': 'Royal',
-                    'Mme': 'Mrs',
-                    'Capt': 'Officer',
-                    'Sir': 'Royal'
-                }
-                
-                return title_mapping.get(title, 'Other')
-            
-            return 'Unknown'
-        
-        X['Title'] = X['Name'].apply(extract_title_from_name)
-        return X
-    
-    def _extract_deck(self, X):
-        """Estrae deck dalla cabina"""
-        def extract_deck_from_cabin(cabin):
-            if pd.isna(cabin):
-                return 'Unknown'
-            
-            # Primo carattere della cabina è il deck
-            deck = str(cabin)[0]
-            return deck if deck.isalpha() else 'Unknown'
-        
-        X['Deck'] = X['Cabin'].apply(extract_deck_from_cabin)
-        return X
-    
-    def _create_family_features(self, X):
-        """Crea features relative alla famiglia"""
-        if 'SibSp' in X.columns and 'Parch' in X.columns:
-            X['Family_Size'] = X['SibSp'] + X['Parch'] + 1
-            X['Is_Alone'] = (X['Family_Size'] == 1).astype(int)
-            
-            # Categorie famiglia
-            def categorize_family_size(size):
-                if size == 1:
-                    return 'Alone'
-                elif size <= 4:
-                    return 'Small'
-                else:
-                    return 'Large'
-            
-            X['Family_Category'] = X['Family_Size'].apply(categorize_family_size)
-        
-        return X
-    
-    def _create_fare_features(self, X):
-        """Crea features relative al prezzo"""
-        if 'Fare' in X.columns:
-            # Fare per persona
-            if 'Family_Size' in X.columns:
-                X['Fare_Per_Person'] = X['Fare'] / X['Family_Size']
-            
-            # Binning del fare
-            X['Fare_Binned'] = pd.qcut(X['Fare'].fillna(X['Fare'].median()), 
-                                      q=4, labels=['Low', 'Medium', 'High', 'Very_High'])
-            
-            # Log fare per ridurre skewness
-            X['Fare_Log'] = np.log1p(X['Fare'].fillna(X['Fare'].median()))
-        
-        return X
-    
-    def _create_age_groups(self, X):
-        """Crea gruppi di età"""
-        def categorize_age(age):
-            if pd.isna(age):
-                return 'Unknown'
-            elif age < 13:
-                return 'Child'
-            elif age < 25:
-                return 'Young_Adult'
-            elif age < 40:
-                return 'Adult'
-            elif age < 60:
-                return 'Middle_Aged'
-            else:
-                return 'Senior'
-        
-        X['Age_Group'] = X['Age'].apply(categorize_age)
-        
-        # Age binning
-        X['Age_Binned'] = pd.cut(X['Age'].fillna(X['Age'].median()), 
-                                bins=5, labels=['Very_Young', 'Young', 'Middle', 'Mature', 'Old'])
-        
-        return X
-    
-    def _create_interaction_features(self, X):
-        """Crea features di interazione"""
-        # Interazioni importanti per sopravvivenza
-        if 'Sex' in X.columns and 'Pclass' in X.columns:
-            X['Sex_Pclass'] = X['Sex'].astype(str) + '_' + X['Pclass'].astype(str)
-        
-        if 'Age_Group' in X.columns and 'Sex' in X.columns:
-            X['Age_Sex'] = X['Age_Group'].astype(str) + '_' + X['Sex'].astype(str)
-        
-        if 'Title' in X.columns and 'Pclass' in X.columns:
-            X['Title_Pclass'] = X['Title'].astype(str) + '_' + X['Pclass'].astype(str)
-        
-        return X
+            if 'Sex' in columns and 'Pclass' in columns:
+                features.append('Sex_Pclass')
+            if 'Age_Group' in features and 'Sex' in columns:
+                features.append('Age_Sex')
+            if 'Title' in features and 'Pclass' in columns:
+                features.append('Title_Pclass')
+        
+        # Tutte le feature in un unico passaggio (definizioni in feature_registry)
+        return compute_features(X, features)
 
 class SmartImputer(BaseEstimator, TransformerMixin):
     """
@@ -238,13 +118,18 @@ class SmartImputer(BaseEstimator, TransformerMixin):
         
     def fit(self, X, y=None):
         """Fit degli imputers"""
+        iterative_imputer = None
+        if self.use_advanced_imputation:
+            from sklearn.impute import KNNImputer
+            iterative_imputer = _iterative_imputer_class()
+
         for column in X.columns:
-            if X[column].dtype in ['int64', 'float64']:
+            if pd.api.types.is_numeric_dtype(X[column]):
                 self.feature_types_[column] = 'numerical'
                 
-                if self.use_advanced_imputation and ITERATIVE_IMPUTER_AVAILABLE:
+                if iterative_imputer is not None:
                     # IterativeImputer per valori numerici se disponibile
-                    self.imputers_[column] = IterativeImputer(random_state=42)
+                    self.imputers_[column] = iterative_imputer(random_state=42)
                 elif self.use_advanced_imputation:
                     # Fallback a KNN se IterativeImputer non disponibile
                     self.imputers_[column] = KNNImputer(n_neighbors=5)
@@ -279,11 +164,13 @@ class OutlierHandler(BaseEstimator, TransformerMixin):
                  method='iqr',
                  action='clip',
                  threshold=3,
-                 columns=None):
+                 columns=None,
+                 quantile_backend=None):
         self.method = method  # 'iqr', 'zscore', 'isolation'
         self.action = action  # 'clip', 'remove', 'transform'
         self.threshold = threshold
         self.columns = columns
+        self.quantile_backend = quantile_backend  # 'exact', 'kll', 'auto' (default QUANTILE_CONFIG)
         self.outlier_bounds_ = {}
         
     def fit(self, X, y=None):
@@ -292,10 +179,14 @@ class OutlierHandler(BaseEstimator, TransformerMixin):
         if self.columns is not None:
             numeric_columns = [col for col in numeric_columns if col in self.columns]
         
+        if self.method == 'iqr':
+            # Quantili di tutte le colonne in un'unica chiamata
+            quantiles = column_quantiles(X, [0.25, 0.75], columns=list(numeric_columns),
+                                         backend=self.quantile_backend)
+        
         for column in numeric_columns:
             if self.method == 'iqr':
-                Q1 = X[column].quantile(0.25)
-                Q3 = X[column].quantile(0.75)
+                Q1, Q3 = quantiles[column]
                 IQR = Q3 - Q1
                 lower_bound = Q1 - 1.5 * IQR
                 upper_bound = Q3 + 1.5 * IQR
@@ -343,7 +234,7 @@ class AdvancedEncoder(BaseEstimator, TransformerMixin):
         
     def fit(self, X, y=None):
         """Fit degli encoders"""
-        categorical_columns = X.select_dtypes(include=['object']).columns
+        categorical_columns = X.select_dtypes(include=['object', 'category']).columns
         
         for column in categorical_columns:
             unique_values = X[column].nunique()
@@ -454,6 +345,8 @@ class IntelligentFeatureSelector(BaseEstimator, TransformerMixin):
         
     def fit(self, X, y=None):
         """Seleziona features"""
+        from sklearn.feature_selection import SelectKBest, VarianceThreshold, chi2, f_classif
+
         selected_features = set(X.columns)
         
         # 1. Variance threshold
@@ -584,6 +477,7 @@ class PreprocessingPipelineBuilder:
         elif method == 'robust':
             scaler = RobustScaler(**kwargs)
         elif method == 'power':
+            from sklearn.preprocessing import PowerTransformer
             scaler = PowerTransformer(**kwargs)
         else:
             raise ValueError(f"Metodo scaling non supportato: {method}")
@@ -594,6 +488,7 @@ class PreprocessingPipelineBuilder:
     def add_dimensionality_reduction(self, method='pca', **kwargs):
         """Aggiunge riduzione dimensionalità"""
         if method == 'pca':
+            from sklearn.decomposition import PCA
             reducer = PCA(**kwargs)
         else:
             raise ValueError(f"Metodo riduzione dimensionalità non supportato: {method}")
@@ -656,7 +551,7 @@ class DataQualityChecker:
                 report['constant_features'].append(col)
         
         # High cardinality features
-        for col in X.select_dtypes(include=['object']).columns:
+        for col in X.select_dtypes(include=['object', 'category']).columns:
             unique_ratio = X[col].nunique() / len(X)
             if unique_ratio > 0.9:
                 report['high_cardinality_features'].append({
@@ -676,9 +571,9 @@ class DataQualityChecker:
                 })
         
         # Outliers summary
+        quantiles = column_quantiles(X, [0.25, 0.75], columns=list(numeric_columns))
         for col in numeric_columns:
-            Q1 = X[col].quantile(0.25)
-            Q3 = X[col].quantile(0.75)
+            Q1, Q3 = quantiles[col]
             IQR = Q3 - Q1
             lower_bound = Q1 - 1.5 * IQR
             upper_bound = Q3 + 1.5 * IQR
@@ -886,21 +781,30 @@ def validate_preprocessing_pipeline(pipeline, X_train, X_test, y_train=None, y_t
     
     return report
 
-def optimize_preprocessing_pipeline(X, y, base_pipeline, scoring='accuracy', cv=3):
+def optimize_preprocessing_pipeline(X, y, base_pipeline, scoring='accuracy', cv=3, trial_store=None):
     """
     Ottimizza iperparametri della pipeline di preprocessing
     
+    Ricerca a griglia esaustiva; ogni combinazione valutata viene salvata
+    nel TrialStore, quindi una ricerca interrotta riprende senza ricalcolare
+    le combinazioni gia' valutate sugli stessi dati.
+    
     Args:
         X, y: Dati di training
         base_pipeline: Pipeline base da ottimizzare
         scoring: Metrica per ottimizzazione
         cv: Numero fold cross-validation
+        trial_store: TrialStore da usare (default: get_trial_store())
     
     Returns:
         Pipeline ottimizzata
     """
-    from sklearn.model_selection import GridSearchCV
+    from sklearn.base import clone
+    from sklearn.model_selection import StratifiedKFold
     from sklearn.ensemble import RandomForestClassifier
+    from src.models.hyperparameter_search import BudgetedSearch
+    from src.models.trial_store import get_trial_store, estimator_signature
+    from src.utils.helpers import compute_data_fingerprint
     
     # Crea pipeline completa con classificatore
     full_pipeline = Pipeline([
@@ -946,25 +850,36 @@ def optimize_preprocessing_pipeline(X, y, base_pipeline, scoring='accuracy', cv=
         # Se nessun parametro da ottimizzare, ritorna pipeline originale
         return base_pipeline
     
+    # Fold come GridSearchCV con cv intero (stratificati, senza shuffle)
+    splitter = StratifiedKFold(n_splits=cv)
+    folds = [(X.iloc[train_idx], y.iloc[train_idx], X.iloc[val_idx], y.iloc[val_idx])
+             for train_idx, val_idx in splitter.split(X, y)]
+    
+    if trial_store is None:
+        trial_store = get_trial_store()
+    trial_context = '|'.join(['optimize_preprocessing_pipeline', str(scoring), repr(splitter),
+                              estimator_signature(full_pipeline)])
+    
     # Ottimizzazione
-    grid_search = GridSearchCV(
+    search = BudgetedSearch(
         full_pipeline,
         param_grid,
-        cv=cv,
+        strategy='grid',
         scoring=scoring,
         n_jobs=-1,
-        verbose=1
-    )
+        trial_store=trial_store,
+        trial_key=(trial_context, compute_data_fingerprint(X, y))
+    ).fit(folds)
     
-    grid_search.fit(X, y)
+    best_pipeline = clone(full_pipeline).set_params(**search.best_params_).fit(X, y)
     
     # Estrae pipeline preprocessing ottimizzata
-    optimized_pipeline = grid_search.best_estimator_.named_steps['preprocessing']
+    optimized_pipeline = best_pipeline.named_steps['preprocessing']
     
     return optimized_pipeline, {
-        'best_params': grid_search.best_params_,
-        'best_score': grid_search.best_score_,
-        'optimization_results': grid_search.cv_results_
+        'best_params': search.best_params_,
+        'best_score': search.best_score_,
+        'optimization_results': search.cv_results_
     }
 
 def get_preprocessing_recommendations(X, y=None):
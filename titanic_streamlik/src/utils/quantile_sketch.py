@@ -0,0 +1,318 @@
+"""
+src/utils/quantile_sketch.py
+Quantili approssimati in streaming (sketch KLL aggregabili) e backend pluggabile
+"""
+
+import json
+import math
+import os
+import numpy as np
+import pandas as pd
+from src.config import QUANTILE_CONFIG
+
+# ----------------1. Sketch KLL
+class KLLSketch:
+    """
+    Sketch di quantili KLL (Karnin-Lang-Liberty) aggregabile
+
+    Mantiene una gerarchia di compattatori: al livello h ogni elemento
+    rappresenta 2^h valori originali. Quando un livello supera la capacita'
+    viene ordinato e ne viene promosso un elemento su due (offset casuale),
+    quindi la memoria e' O(k) indipendentemente dal numero di righe.
+
+    L'errore sul rango normalizzato e' circa epsilon (dipende da k); due
+    sketch costruiti su partizioni diverse possono essere uniti con merge.
+    """
+
+    _CAPACITY_DECAY = 2 / 3
+
+    def __init__(self, k=None, epsilon=None, seed=None):
+        if k is None:
+            k = self.k_for_epsilon(epsilon if epsilon is not None else QUANTILE_CONFIG['epsilon'])
+        self.k = max(int(k), 8)
+        self.seed = QUANTILE_CONFIG['seed'] if seed is None else seed
+        self._rng = np.random.default_rng(self.seed)
+        self.levels = [np.empty(0, dtype='float64')]
+        self.n = 0
+        self.min_value = np.inf
+        self.max_value = -np.inf
+
+    @staticmethod
+    def k_for_epsilon(epsilon):
+        """Parametro k che garantisce circa l'errore di rango richiesto"""
+        if not 0 < epsilon < 1:
+            raise ValueError(f"epsilon deve essere in (0, 1): {epsilon}")
+        # Approssimazione empirica dell'errore KLL: eps ~ 2.296 / k^0.9444
+        return int(math.ceil((2.296 / epsilon) ** (1 / 0.9444)))
+
+    @property
+    def epsilon(self):
+        """Errore di rango normalizzato atteso"""
+        return 2.296 / self.k ** 0.9444
+
+    def _capacity(self, level):
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * self._CAPACITY_DECAY ** depth)))
+
+    def _total_capacity(self):
+        return sum(self._capacity(level) for level in range(len(self.levels)))
+
+    def _size(self):
+        return sum(len(level) for level in self.levels)
+
+    def update(self, values):
+        """Aggiunge un batch di valori (i NaN sono ignorati)"""
+        values = np.asarray(values, dtype='float64').ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return self
+
+        self.n += values.size
+        self.min_value = min(self.min_value, float(values.min()))
+        self.max_value = max(self.max_value, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Unisce uno sketch costruito su un'altra partizione dei dati"""
+        if other.n == 0:
+            return self
+
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype='float64'))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+
+        self.n += other.n
+        self.min_value = min(self.min_value, other.min_value)
+        self.max_value = max(self.max_value, other.max_value)
+        self._compress()
+        return self
+
+    def _compress(self):
+        while self._size() > self._total_capacity():
+            for level in range(len(self.levels)):
+                if len(self.levels[level]) < self._capacity(level):
+                    continue
+
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype='float64'))
+
+                items = np.sort(self.levels[level])
+                # Con un numero dispari di elementi uno resta al livello corrente
+                leftover = items[:len(items) % 2]
+                items = items[len(items) % 2:]
+                offset = int(self._rng.integers(2))
+
+                self.levels[level] = leftover
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], items[offset::2]])
+                break
+
+    def quantiles(self, qs):
+        """
+        Quantili approssimati
+
+        Args:
+            qs: Lista di quantili in [0, 1]
+
+        Returns:
+            Array numpy (NaN se lo sketch e' vuoto)
+        """
+        qs = np.atleast_1d(np.asarray(qs, dtype='float64'))
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2 ** level, dtype='float64')
+                                  for level, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='mergesort')
+        values = values[order]
+        cumulative = np.cumsum(weights[order])
+
+        ranks = qs * (cumulative[-1] - 1)
+        positions = np.searchsorted(cumulative, ranks, side='right')
+        result = values[np.minimum(positions, len(values) - 1)]
+
+        # Estremi esatti
+        result = np.where(qs <= 0, self.min_value, result)
+        return np.where(qs >= 1, self.max_value, result)
+
+    def quantile(self, q):
+        """Singolo quantile approssimato"""
+        return float(self.quantiles([q])[0])
+
+    def to_dict(self):
+        """Rappresentazione serializzabile in JSON"""
+        return {
+            'type': 'kll',
+            'k': self.k,
+            'seed': self.seed,
+            'n': self.n,
+            'min': self.min_value if self.n else None,
+            'max': self.max_value if self.n else None,
+            'levels': [items.tolist() for items in self.levels]
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Ricostruisce uno sketch da to_dict"""
+        sketch = cls(k=data['k'], seed=data['seed'])
+        sketch.levels = [np.asarray(items, dtype='float64') for items in data['levels']] or [np.empty(0)]
+        sketch.n = data['n']
+        sketch.min_value = data['min'] if data['min'] is not None else np.inf
+        sketch.max_value = data['max'] if data['max'] is not None else -np.inf
+        return sketch
+
+# ----------------2. Backend Esatto (stessa interfaccia dello sketch)
+class ExactQuantiles:
+    """
+    Quantili esatti (interpolazione lineare come pandas)
+
+    Conserva tutti i valori: adatto solo a dati che stanno in memoria.
+    """
+
+    def __init__(self, **kwargs):
+        self._chunks = []
+        self.n = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype='float64').ravel()
+        values = values[~np.isnan(values)]
+        if values.size:
+            self._chunks.append(values)
+            self.n += values.size
+        return self
+
+    def merge(self, other):
+        self._chunks.extend(other._chunks)
+        self.n += other.n
+        return self
+
+    def quantiles(self, qs):
+        qs = np.atleast_1d(np.asarray(qs, dtype='float64'))
+        if self.n == 0:
+            return np.full(qs.shape, np.nan)
+        return np.quantile(np.concatenate(self._chunks), qs)
+
+    def quantile(self, q):
+        return float(self.quantiles([q])[0])
+
+    def to_dict(self):
+        values = np.concatenate(self._chunks).tolist() if self._chunks else []
+        return {'type': 'exact', 'values': values}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls().update(data['values'])
+
+QUANTILE_BACKENDS = {
+    'kll': KLLSketch,
+    'exact': ExactQuantiles
+}
+
+# ----------------3. Selezione Backend
+def resolve_backend(backend=None, n_rows=None):
+    """
+    Risolve il backend effettivo
+
+    'auto' usa i quantili esatti sotto QUANTILE_CONFIG['sketch_min_rows']
+    righe e lo sketch KLL sopra.
+    """
+    backend = backend or QUANTILE_CONFIG['backend']
+    if backend == 'auto':
+        if n_rows is not None and n_rows < QUANTILE_CONFIG['sketch_min_rows']:
+            return 'exact'
+        return 'kll'
+    if backend not in QUANTILE_BACKENDS:
+        raise ValueError(f"Backend quantili non supportato: {backend}")
+    return backend
+
+def create_quantile_sketch(backend=None, **kwargs):
+    """Crea uno sketch vuoto del backend richiesto ('kll' o 'exact')"""
+    backend = resolve_backend(backend)
+    return QUANTILE_BACKENDS[backend](**kwargs)
+
+def sketch_from_dict(data):
+    """Ricostruisce uno sketch serializzato con to_dict"""
+    return QUANTILE_BACKENDS[data['type']].from_dict(data)
+
+# ----------------4. Quantili per Colonna
+def column_quantiles(df, qs, columns=None, backend=None):
+    """
+    Quantili di piu' colonne con il backend configurato
+
+    Con il backend esatto equivale a df[columns].quantile(qs).
+
+    Returns:
+        DataFrame con indice i quantili e una colonna per variabile
+    """
+    if columns is None:
+        columns = df.select_dtypes(include=[np.number]).columns.tolist()
+    qs = list(qs)
+
+    if resolve_backend(backend, n_rows=len(df)) == 'exact':
+        return df[columns].quantile(qs)
+
+    sketches = {col: KLLSketch().update(df[col].to_numpy(dtype='float64', na_value=np.nan))
+                for col in columns}
+    return sketches_to_quantiles(sketches, qs)
+
+def series_quantiles(series, qs, backend=None):
+    """Quantili di una singola Series con il backend configurato"""
+    if resolve_backend(backend, n_rows=len(series)) == 'exact':
+        return series.quantile(list(qs)).to_numpy()
+    return KLLSketch().update(series.to_numpy(dtype='float64', na_value=np.nan)).quantiles(qs)
+
+# ----------------5. Sketch in Streaming (chunk, worker, persistenza)
+def build_column_sketches(chunks, columns=None, **sketch_kwargs):
+    """
+    Costruisce uno sketch KLL per colonna con un solo passaggio sui chunk
+
+    Args:
+        chunks: Iterabile di DataFrame
+        columns: Colonne (default: numeriche del primo chunk)
+
+    Returns:
+        Dizionario colonna -> KLLSketch
+    """
+    sketches = {}
+    for chunk in chunks:
+        if columns is None:
+            columns = chunk.select_dtypes(include=[np.number]).columns.tolist()
+        for col in columns:
+            if col not in chunk.columns:
+                continue
+            if col not in sketches:
+                sketches[col] = KLLSketch(**sketch_kwargs)
+            sketches[col].update(chunk[col].to_numpy(dtype='float64', na_value=np.nan))
+    return sketches
+
+def merge_column_sketches(*sketch_dicts):
+    """Unisce dizionari colonna -> sketch prodotti da worker diversi"""
+    merged = {}
+    for sketches in sketch_dicts:
+        for col, sketch in sketches.items():
+            if col in merged:
+                merged[col].merge(sketch)
+            else:
+                merged[col] = sketch_from_dict(sketch.to_dict())
+    return merged
+
+def sketches_to_quantiles(sketches, qs):
+    """Quantili da un dizionario di sketch (stesso formato di DataFrame.quantile)"""
+    qs = list(qs)
+    return pd.DataFrame({col: sketch.quantiles(qs) for col, sketch in sketches.items()}, index=qs)
+
+def save_column_sketches(sketches, path):
+    """Salva gli sketch in JSON (scrittura atomica)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({col: sketch.to_dict() for col, sketch in sketches.items()}, f)
+    os.replace(tmp_path, path)
+
+def load_column_sketches(path):
+    """Carica gli sketch salvati con save_column_sketches"""
+    with open(path) as f:
+        return {col: sketch_from_dict(data) for col, data in json.load(f).items()}
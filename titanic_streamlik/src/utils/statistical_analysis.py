@@ -5,10 +5,7 @@ Funzioni per analisi statistiche avanzate
 
 import pandas as pd
 import numpy as np
-from scipy import stats
-from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-import streamlit as st
+from src.utils.headless import emit
 
 # ----------------1. Correlazioni con Target (da notebook correlazioni estese)
 def calculate_target_correlations(df, target_col):
@@ -50,6 +47,8 @@ def calculate_normality_statistics(df, variable):
     """
     Calcola statistiche di normalità per una variabile
     """
+    from scipy import stats
+
     if df is None or variable not in df.columns:
         return None
     
@@ -110,7 +109,7 @@ def calculate_feature_importance_proxy(df, target_col):
             })
     
     # Per variabili categoriche: Cramér's V
-    categorical_cols = df.select_dtypes(include=['object']).columns
+    categorical_cols = df.select_dtypes(include=['object', 'category']).columns
     categorical_cols = [col for col in categorical_cols if col not in ['Name', 'Ticket']]
     
     for col in categorical_cols:
@@ -123,7 +122,8 @@ def calculate_feature_importance_proxy(df, target_col):
                     'Type': 'Categorical'
                 })
             except Exception as e:
-                st.warning(f"Errore nel calcolo Cramers V per {col}: {str(e)}")
+                emit('warning', f"Errore nel calcolo Cramers V per {col}: {str(e)}",
+                     source='calculate_feature_importance_proxy', column=col)
                 continue
     
     if not importance_scores:
@@ -139,6 +139,8 @@ def calculate_cramers_v(x, y):
     """
     Calcola Cramér's V per misurare associazione tra variabili categoriche
     """
+    from scipy import stats
+
     try:
         # Rimuovi valori nulli
         mask = x.notna() & y.notna()
@@ -187,7 +189,7 @@ def discover_survival_patterns(df):
     for i, var1 in enumerate(categorical_vars):
         for var2 in categorical_vars[i+1:]:
             if var1 in df.columns and var2 in df.columns:
-                pattern_data = df.groupby([var1, var2]).agg({
+                pattern_data = df.groupby([var1, var2], observed=True).agg({
                     'Survived': ['count', 'sum', 'mean']
                 }).round(3)
                 
@@ -273,7 +275,7 @@ def find_rare_but_significant_combinations(df):
         df_temp = df.copy()
         df_temp['Age_Band'] = pd.cut(df_temp['Age'], bins=[0, 18, 60, 100], labels=['Young', 'Adult', 'Senior'])
         
-        triple_analysis = df_temp.groupby(['Sex', 'Pclass', 'Age_Band']).agg({
+        triple_analysis = df_temp.groupby(['Sex', 'Pclass', 'Age_Band'], observed=True).agg({
             'Survived': ['count', 'mean']
         }).round(3)
         
@@ -332,6 +334,9 @@ def create_passenger_segments(df):
     # Prepara dati per clustering
     cluster_data = df_cluster[cluster_vars].fillna(df_cluster[cluster_vars].median())
     
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.cluster import KMeans
+
     # Normalizza
     scaler = StandardScaler()
     cluster_data_scaled = scaler.fit_transform(cluster_data)
@@ -360,18 +365,18 @@ def analyze_segments(df):
         return None
     
     # Analisi per segmento
-    segment_analysis = df.groupby('Segment')[available_vars].agg(['count', 'mean']).round(3)
+    segment_analysis = df.groupby('Segment', observed=True)[available_vars].agg(['count', 'mean']).round(3)
     
     # Flatten column names
     segment_analysis.columns = [f"{var}_{stat}" for var, stat in segment_analysis.columns]
     
     # Aggiungi percentuale femminile se disponibile
     if 'Sex' in df.columns:
-        female_pct = df.groupby('Segment')['Sex'].apply(lambda x: (x == 'female').mean() * 100)
+        female_pct = df.groupby('Segment', observed=True)['Sex'].apply(lambda x: (x == 'female').mean() * 100)
         segment_analysis['Female_Percentage'] = female_pct
     
     if 'Pclass' in df.columns:
-        avg_class = df.groupby('Segment')['Pclass'].mean()
+        avg_class = df.groupby('Segment', observed=True)['Pclass'].mean()
         segment_analysis['Avg_Class'] = avg_class
     
     return segment_analysis
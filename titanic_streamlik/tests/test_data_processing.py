@@ -1 +1,78 @@
 # Test per il processing dei dati
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.utils import data_processor
+from src.utils.data_processor import clean_dataset_basic, clean_dataset_incremental
+
+
+# ----------------1. Pulizia Incrementale
+def _passengers(n_rows, start=0, cabin_missing_every=2):
+    ids = np.arange(start, start + n_rows)
+    return pd.DataFrame({
+        'PassengerId': ids,
+        'Survived': ids % 2,
+        'Pclass': ids % 3 + 1,
+        'Age': np.where(ids % 4 == 0, np.nan, 20.0 + ids),
+        'Cabin': [None if i % cabin_missing_every == 0 else f"C{i}" for i in ids],
+        'Embarked': [None if i % 5 == 0 else 'SCQ'[i % 3] for i in ids]
+    })
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    path = str(tmp_path / 'clean_state.pkl')
+    yield path
+    data_processor._incremental_cache.pop(path, None)
+
+
+def test_incremental_append_matches_full_clean(state_path):
+    base = _passengers(40)
+    df = pd.concat([base, _passengers(10, start=40), base.iloc[:3]], ignore_index=True)
+
+    clean_dataset_incremental(base, state_path)
+    result, report = clean_dataset_incremental(df, state_path)
+
+    assert report['mode'] == 'incremental'
+    assert report['rows_processed'] == 13
+    pd.testing.assert_frame_equal(result, clean_dataset_basic(df), check_dtype=False)
+
+
+@pytest.mark.parametrize('cold_start', [False, True])
+def test_incremental_rebuild_when_appended_rows_change_dropped_columns(state_path, cold_start):
+    # Cabin al 50% di missing (soglia non superata), poi 4 righe senza cabina
+    base = _passengers(8)
+    appended = _passengers(4, start=8, cabin_missing_every=1)
+    df = pd.concat([base, appended], ignore_index=True)
+
+    first, _ = clean_dataset_incremental(base, state_path)
+    assert 'Cabin' in first.columns
+    if cold_start:
+        data_processor._incremental_cache.clear()
+
+    result, report = clean_dataset_incremental(df, state_path)
+
+    assert report['mode'] == 'incremental'
+    assert 'Cabin' in report['columns_dropped']
+    pd.testing.assert_frame_equal(result, clean_dataset_basic(df), check_dtype=False)
+
+
+# ----------------2. Snapshot Colonnare
+@pytest.mark.parametrize('snapshot_format', ['feather', 'parquet'])
+def test_snapshot_load_matches_csv_load(tmp_path, snapshot_format):
+    from src.utils.data_loader import apply_dtype_schema, load_csv_with_snapshot
+
+    csv_path = tmp_path / 'passengers.csv'
+    _passengers(20).assign(Name=lambda df: [f"Name{i}" for i in df['PassengerId']]).to_csv(csv_path, index=False)
+
+    from_csv, cached = load_csv_with_snapshot(str(csv_path), snapshot_format, postprocess=apply_dtype_schema)
+    assert not cached
+    from_snapshot, cached = load_csv_with_snapshot(str(csv_path), snapshot_format, postprocess=apply_dtype_schema)
+    assert cached
+
+    pd.testing.assert_frame_equal(from_snapshot, from_csv)
+    # Stesso marcatore dei mancanti (NaN, non None) nelle colonne object
+    for column in from_csv.columns[from_csv.dtypes == object]:
+        assert [type(value) for value in from_snapshot[column]] == [type(value) for value in from_csv[column]]
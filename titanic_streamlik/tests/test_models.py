@@ -1 +1,119 @@
 # Test per i modelli
+
+import numpy as np
+import pandas as pd
+
+from src.models.scoring_service import ScoringService
+from src.utils.ml_preprocessing import create_titanic_preprocessing_pipeline
+
+
+# ----------------1. Servizio di Scoring
+def _training_frame(n_rows=200, seed=0):
+    rng = np.random.default_rng(seed)
+    titles = rng.choice(['Mr', 'Mrs', 'Miss', 'Master'], n_rows)
+    X = pd.DataFrame({
+        'Pclass': rng.integers(1, 4, n_rows),
+        'Name': [f"Surname{i}, {title}. Name" for i, title in enumerate(titles)],
+        'Sex': np.where(np.isin(titles, ['Mrs', 'Miss']), 'female', 'male'),
+        'Age': np.where(rng.random(n_rows) < 0.2, np.nan, rng.uniform(1, 80, n_rows).round()),
+        'SibSp': rng.integers(0, 4, n_rows),
+        'Parch': rng.integers(0, 3, n_rows),
+        'Fare': rng.uniform(5, 300, n_rows).round(2),
+        'Embarked': rng.choice(['S', 'C', 'Q'], n_rows)
+    })
+    y = pd.Series((X['Sex'] == 'female').astype(int) | (X['Pclass'] == 1).astype(int), name='Survived')
+    return X, y
+
+
+def test_single_passenger_with_advanced_pipeline():
+    # IterativeImputer non e' compilabile: il resto della pipeline (bin di
+    # Fare congelati) resta compilato, una riga non ricalcola i quantili
+    from sklearn.linear_model import LogisticRegression
+
+    X, y = _training_frame()
+    pipeline = create_titanic_preprocessing_pipeline('advanced')
+    features = pipeline.fit_transform(X, y)
+    model = LogisticRegression(max_iter=1000).fit(features, y)
+
+    service = ScoringService(pipeline, {'LogisticRegression': model}, X)
+    assert service.is_compiled
+    assert service.features.fallback_steps
+
+    row = service.features.transform_records([X.iloc[0].to_dict()])
+    np.testing.assert_allclose(row[0], np.asarray(features, dtype='float64')[0], atol=1e-6)
+
+    result = service.score_one({'Pclass': 1, 'Sex': 'female', 'Age': 30.0, 'SibSp': 0,
+                                'Parch': 0, 'Fare': 50.0, 'Embarked': 'S'})
+    assert result['prediction'] in (0, 1)
+
+
+# ----------------2. Cache delle Matrici per Fold
+def test_fold_cache_keyed_on_preprocessor_version(tmp_path, monkeypatch):
+    from joblib import Memory
+    from sklearn.model_selection import KFold
+    from src.models import model_trainer
+    from src.models.model_trainer import ModelTrainer
+
+    memory = Memory(location=str(tmp_path), verbose=0)
+    monkeypatch.setattr(model_trainer, '_cv_memory', memory)
+    X, y = _training_frame(60)
+    X = X.drop(columns=['Name'])
+    cv = KFold(n_splits=3)
+
+    def cached_calls():
+        return len(list(tmp_path.rglob('output.pkl')))
+
+    ModelTrainer()._cv_fold_matrices(X, y, cv, 'standard')
+    ModelTrainer()._cv_fold_matrices(X, y, cv, 'standard')
+    assert cached_calls() == 3
+
+    # Codice di DataPreprocessor modificato: nessun riuso delle matrici precedenti
+    monkeypatch.setattr(model_trainer, '_preprocessor_version', 'modified')
+    ModelTrainer()._cv_fold_matrices(X, y, cv, 'standard')
+    assert cached_calls() == 6
+
+
+# ----------------3. Output delle Predizioni Batch
+def test_cleanup_batch_outputs_removes_only_stale_files(tmp_path):
+    import os
+    import time
+    from src.models.batch_scoring import cleanup_batch_outputs
+
+    stale = tmp_path / 'titanic_predictions_old.parquet'
+    recent = tmp_path / 'titanic_predictions_new.parquet'
+    other = tmp_path / 'other_old.parquet'
+    for path in (stale, recent, other):
+        path.write_bytes(b'x')
+    two_days_ago = time.time() - 48 * 3600
+    for path in (stale, other):
+        os.utime(path, (two_days_ago, two_days_ago))
+
+    assert cleanup_batch_outputs(str(tmp_path), max_age_hours=24) == 1
+    assert not stale.exists() and recent.exists() and other.exists()
+
+
+# ----------------4. Archivio dei Trial
+def test_failed_trials_are_not_reused_on_resume(tmp_path):
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import KFold
+    from src.models.hyperparameter_search import BudgetedSearch
+    from src.models.trial_store import TrialStore
+
+    X, y = _training_frame(90)
+    X = pd.get_dummies(X[['Pclass', 'Sex', 'SibSp', 'Parch', 'Fare']], dtype=float).to_numpy()
+    folds = [(X[train], y.iloc[train], X[val], y.iloc[val]) for train, val in KFold(3).split(X)]
+    store = TrialStore(str(tmp_path / 'trials.sqlite'))
+    # 'l1' non e' supportata da lbfgs: candidato fallito
+    grid = {'penalty': ['l2', 'l1'], 'solver': ['lbfgs'], 'max_iter': [500]}
+
+    def search():
+        return BudgetedSearch(LogisticRegression(), grid, strategy='grid', n_jobs=1,
+                              trial_store=store, trial_key=('test', 'data')).fit(folds)
+
+    first = search()
+    assert any('error' in result for result in first.results_)
+    assert store.count('test') == 1
+
+    resumed = search()
+    assert resumed.n_reused_ == 1
+    assert [result.get('reused', False) for result in resumed.results_] == [True, False]